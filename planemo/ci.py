@@ -3,14 +3,20 @@
 from __future__ import print_function
 
 import copy
+import datetime
+import json
 import math
 import os
+import re
 
 import yaml
 
 from planemo import git
 from planemo import io
-from planemo.shed import SHED_CONFIG_NAME
+from planemo.tools import yield_tool_sources
+
+TEST_DATA_DIRECTORY = "test-data"
+TEST_ID_TOOL_REGEX = re.compile(r".*TestForTool_(.+)\.test_tool_\d+$")
 
 
 def filter_paths(ctx, raw_paths, path_type="repo", **kwds):
@@ -25,17 +31,12 @@ def filter_paths(ctx, raw_paths, path_type="repo", **kwds):
     diff_paths = None
     if changed_in_commit_range is not None:
         diff_files = git.diff(ctx, cwd, changed_in_commit_range)
+        change_index = ChangeIndex(ctx, diff_files, directory=cwd)
         if path_type == "repo":
-            diff_dirs = set(os.path.dirname(p) for p in diff_files)
-            diff_paths = set()
-            for diff_dir in diff_dirs:
-                while diff_dir:
-                    if os.path.isfile(os.path.join(diff_dir, SHED_CONFIG_NAME)):
-                        diff_paths.add(diff_dir)
-                        break
-                    diff_dir = os.path.dirname(diff_dir)
+            affected_paths = change_index.affected_repos(raw_paths)
         else:
-            diff_paths = diff_files
+            affected_paths = change_index.affected_tools(raw_paths)
+        diff_paths = set(os.path.relpath(p, cwd) for p in affected_paths)
 
     unique_paths = set(os.path.relpath(p, cwd) for p in raw_paths)
     if diff_paths is not None:
@@ -49,16 +50,261 @@ def filter_paths(ctx, raw_paths, path_type="repo", **kwds):
     if excluded_paths:
         ctx.log("List of excluded paths: %s" % excluded_paths)
 
-    path_count = len(filtered_paths)
-    chunk_size = ((1.0 * path_count) / kwds["chunk_count"])
-    chunk = kwds["chunk"]
+    chunk_count = kwds["chunk_count"]
+    durations = None
+    if chunk_count > 1 and kwds.get("chunk_durations"):
+        durations = path_durations(ctx, filtered_paths, path_type, load_durations(kwds["chunk_durations"]))
+    return chunk_paths(filtered_paths, chunk_count, kwds["chunk"], durations)
+
+
+def chunk_paths(paths, chunk_count, chunk, durations=None):
+    """Return the paths assigned to the 0-indexed ``chunk`` of ``chunk_count``.
 
+    With ``durations`` (a dictionary of expected seconds per path) paths are
+    assigned longest first to the chunk with the least total runtime so far,
+    paths without a duration are assumed to take the average. Otherwise
+    chunks are consecutive runs of ``paths`` of (nearly) equal length.
+    """
+    if not durations:
+        chunk_size = ((1.0 * len(paths)) / chunk_count)
+        return [p for (i, p) in enumerate(paths) if int(math.floor(i / chunk_size)) == chunk]
+
+    default_duration = sum(durations.values()) / len(durations)
+    path_durations = [(durations.get(p, default_duration), p) for p in paths]
+    chunk_totals = [0.0] * chunk_count
     chunked_paths = []
-    for i, path in enumerate(filtered_paths):
-        if int(math.floor(i / chunk_size)) == chunk:
+    for duration, path in sorted(path_durations, key=lambda d: (-d[0], d[1])):
+        lightest_chunk = chunk_totals.index(min(chunk_totals))
+        chunk_totals[lightest_chunk] += duration
+        if lightest_chunk == chunk:
             chunked_paths.append(path)
+    return sorted(chunked_paths)
+
+
+def load_durations(duration_files):
+    """Load expected seconds per tool id or path from ``duration_files``.
+
+    Each file is either a ``tool_test_output.json`` file, whose test times
+    are summed per tool id, or a JSON dictionary of tool ids or paths to
+    seconds. Tools found in several files are averaged.
+    """
+    all_durations = {}
+    for duration_file in duration_files:
+        with open(duration_file, "r") as f:
+            contents = json.load(f)
+        if "tests" in contents:
+            durations = test_output_durations(contents)
+        else:
+            durations = dict((_duration_key(k), float(v)) for (k, v) in contents.items())
+        for key, duration in durations.items():
+            all_durations.setdefault(key, []).append(duration)
+    return dict((k, sum(v) / len(v)) for (k, v) in all_durations.items())
+
+
+def test_output_durations(test_output):
+    """Sum the test times recorded in a ``tool_test_output.json`` per tool id."""
+    durations = {}
+    for test in test_output.get("tests", []):
+        data = test.get("data") or {}
+        tool_id = data.get("tool_id") or (data.get("job") or {}).get("tool_id")
+        if tool_id is None:
+            match = TEST_ID_TOOL_REGEX.match(test.get("id", ""))
+            tool_id = match and match.group(1)
+        duration = _test_duration(data)
+        if tool_id is None or duration is None:
+            continue
+        tool_id = _short_tool_id(tool_id)
+        durations[tool_id] = durations.get(tool_id, 0.0) + duration
+    return durations
+
+
+def path_durations(ctx, paths, path_type, durations):
+    """Map ``paths`` to the seconds expected for their tools according to ``durations``.
+
+    Repositories take the sum of their tools, paths with no known duration
+    are left out.
+    """
+    known_durations = {}
+    for path in paths:
+        if _duration_key(path) in durations:
+            known_durations[path] = durations[_duration_key(path)]
+            continue
+        tool_durations = []
+        for (_, tool_source) in yield_tool_sources(ctx, path, recursive=path_type == "repo", yield_load_errors=False, use_index=True):
+            tool_id = tool_source.parse_id()
+            if tool_id in durations:
+                tool_durations.append(durations[tool_id])
+        if tool_durations:
+            known_durations[path] = sum(tool_durations)
+    return known_durations
+
+
+def _test_duration(data):
+    if data.get("time_seconds") is not None:
+        return float(data["time_seconds"])
+    job = data.get("job") or {}
+    try:
+        create_time = _parse_job_time(job["create_time"])
+        update_time = _parse_job_time(job["update_time"])
+    except (KeyError, ValueError):
+        return None
+    return (update_time - create_time).total_seconds()
+
+
+def _parse_job_time(value):
+    for time_format in ["%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S"]:
+        try:
+            return datetime.datetime.strptime(value, time_format)
+        except ValueError:
+            pass
+    raise ValueError("Unrecognized job time [%s]" % value)
+
+
+def _short_tool_id(tool_id):
+    # toolshed.g2.bx.psu.edu/repos/<owner>/<repo>/<tool_id>/<version>
+    if "/repos/" in tool_id:
+        return tool_id.rstrip("/").split("/")[-2]
+    return tool_id
+
+
+def _duration_key(key):
+    return os.path.normpath(key) if os.sep in key else key
+
+
+class ChangeIndex(object):
+    """Map files changed in a commit range to the tools and repositories they affect.
+
+    A tool is affected by changes to its file, the macro files it imports,
+    the ``test-data`` files its tests reference, and any other file in (or
+    below) its directory. A repository is affected by changes to any file
+    in it or to a macro file imported by one of its tools.
+    """
+
+    def __init__(self, ctx, changed_files, directory=None):
+        directory = directory or os.getcwd()
+        self.ctx = ctx
+        self.changed_files = set(_real_path(os.path.join(directory, f)) for f in changed_files)
+        self._test_data_files = {}
+
+    def affected_repos(self, repo_paths):
+        """Return the subset of ``repo_paths`` affected by the changed files."""
+        repo_roots = dict((_real_path(p), p) for p in repo_paths)
+        affected = set()
+        outside_changes = set()
+        for changed_file in self.changed_files:
+            repo_root = _find_ancestor(changed_file, repo_roots)
+            if repo_root is None:
+                outside_changes.add(changed_file)
+            else:
+                affected.add(repo_roots[repo_root])
+
+        # Macros shared between repositories live outside of them, only
+        # load tools when such a file changed.
+        outside_changes = set(p for p in outside_changes if p.endswith(".xml"))
+        if outside_changes:
+            for repo_path in repo_paths:
+                if repo_path in affected:
+                    continue
+                tool_sources = yield_tool_sources(self.ctx, repo_path, recursive=True, yield_load_errors=False, use_index=True)
+                if self._affected(tool_sources, outside_changes):
+                    affected.add(repo_path)
+        return affected
+
+    def affected_tools(self, tool_paths):
+        """Return the subset of ``tool_paths`` affected by the changed files."""
+        tool_sources = []
+        for tool_path in tool_paths:
+            tool_sources.extend(yield_tool_sources(self.ctx, tool_path, yield_load_errors=False, use_index=True))
+        return self._affected(tool_sources, self.changed_files)
+
+    def _affected(self, tool_sources, changed_files):
+        dependents = {}
+        tool_directories = {}
+        for tool_path, tool_source in tool_sources:
+            real_tool_path = _real_path(tool_path)
+            tool_directory = os.path.dirname(real_tool_path)
+            tool_directories.setdefault(tool_directory, set()).add(tool_path)
+            dependencies = [real_tool_path]
+            dependencies.extend(_real_path(p) for p in getattr(tool_source, "macro_paths", None) or [])
+            dependencies.extend(self._referenced_test_data(tool_directory, tool_source))
+            for dependency in dependencies:
+                dependents.setdefault(dependency, set()).add(tool_path)
+
+        affected = set()
+        for changed_file in changed_files:
+            if changed_file in dependents:
+                affected.update(dependents[changed_file])
+                continue
+            # Scripts, unreferenced test data, etc... - anything next to a tool.
+            tool_directory = _find_ancestor(changed_file, tool_directories)
+            if tool_directory is not None:
+                affected.update(tool_directories[tool_directory])
+        return affected
+
+    def _referenced_test_data(self, tool_directory, tool_source):
+        test_data_files = self._test_data_files_in(tool_directory)
+        if not test_data_files:
+            return []
+        try:
+            tests = tool_source.parse_tests_to_dict()
+        except Exception:
+            # Changes in test-data still affect every tool in the directory.
+            return []
+        referenced = set()
+        _collect_test_files(tests, referenced)
+        return [test_data_files[p] for p in referenced if p in test_data_files]
+
+    def _test_data_files_in(self, tool_directory):
+        if tool_directory not in self._test_data_files:
+            test_data_directory = os.path.join(tool_directory, TEST_DATA_DIRECTORY)
+            test_data_files = {}
+            for dirpath, _, filenames in os.walk(test_data_directory, followlinks=True):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    test_data_files[os.path.relpath(path, test_data_directory)] = _real_path(path)
+            self._test_data_files[tool_directory] = test_data_files
+        return self._test_data_files[tool_directory]
+
+
+def _collect_test_files(value, referenced):
+    """Add the test-data file names in a ``parse_tests_to_dict()`` structure to ``referenced``.
+
+    These are the ``value`` and ``file`` attributes of test inputs, outputs,
+    collection elements and extra files along with composite input files.
+    """
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+    if isinstance(value, dict):
+        for key, child in value.items():
+            if key in ("value", "file") and isinstance(child, str):
+                referenced.add(os.path.normpath(child))
+            elif key == "composite_data":
+                referenced.update(os.path.normpath(c) for c in child if isinstance(c, str))
+            elif key == "element_tests":
+                # element identifier -> (file, attributes)
+                for element_file, element_attributes in child.values():
+                    if isinstance(element_file, str):
+                        referenced.add(os.path.normpath(element_file))
+                    _collect_test_files(element_attributes, referenced)
+            else:
+                _collect_test_files(child, referenced)
+    elif isinstance(value, (list, tuple)):
+        for child in value:
+            _collect_test_files(child, referenced)
+
+
+def _real_path(path):
+    return os.path.realpath(os.path.abspath(path))
+
 
-    return chunked_paths
+def _find_ancestor(path, directories):
+    """Return the closest parent directory of ``path`` in ``directories``."""
+    parent = os.path.dirname(path)
+    while parent not in directories:
+        if parent == path:
+            return None
+        path, parent = parent, os.path.dirname(parent)
+    return parent
 
 
 def group_paths(paths):
@@ -1,11 +1,27 @@
 """Module describing the planemo ``conda_install`` command."""
+import contextlib
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
 import click
 from galaxy.tool_util.deps import conda_util
 
 from planemo import options
 from planemo.cli import command_function
-from planemo.conda import build_conda_context, collect_conda_targets
-from planemo.io import coalesce_return_codes
+from planemo.conda import (
+    build_conda_context,
+    collect_conda_environments,
+    collect_conda_targets,
+    isolated_package_cache_context,
+)
+from planemo.io import (
+    coalesce_return_codes,
+    error,
+    temp_directory,
+    thread_buffered_io,
+    thread_output_buffer,
+)
 
 
 @click.command('conda_install')
@@ -13,11 +29,27 @@ from planemo.io import coalesce_return_codes
 @options.recursive_option()
 @options.conda_target_options()
 @options.conda_global_option()
+@options.conda_tool_environments_option()
+@options.conda_install_parallelism_option()
 @options.conda_auto_init_option()
 @command_function
 def cli(ctx, paths, **kwds):
-    """Install conda packages for tool requirements."""
+    """Install conda packages for tool requirements.
+
+    By default each requirement is installed into its own environment. With
+    ``--tool_environments`` the requirement lists of all tools are collected
+    first and each distinct list is installed once into the environment
+    Galaxy would resolve it against - environments that already exist are
+    skipped and ``--conda_install_parallelism`` creates the rest concurrently.
+    """
+    if kwds.get("global", False) and kwds.get("tool_environments", False):
+        error("--global and --tool_environments cannot be combined.")
+        return 1
     conda_context = build_conda_context(ctx, handle_auto_init=True, **kwds)
+    if kwds.get("tool_environments", False):
+        environments = collect_conda_environments(ctx, paths, recursive=kwds["recursive"])
+        return _create_environments(ctx, conda_context, environments, kwds.get("conda_install_parallelism") or 1)
+
     return_codes = []
     for conda_target in collect_conda_targets(ctx, paths, recursive=kwds["recursive"]):
         ctx.log("Install conda target %s" % conda_target)
@@ -26,3 +58,54 @@ def cli(ctx, paths, **kwds):
         )
         return_codes.append(return_code)
     return coalesce_return_codes(return_codes, assert_at_least_one=True)
+
+
+def _create_environments(ctx, conda_context, environments, parallelism):
+    """Create missing ``environments`` (a name to targets mapping) concurrently.
+
+    Each environment's output is buffered and written out as a block. With
+    more than one worker every ``conda create`` downloads into a package
+    cache of its own, so concurrent runs never write to the same one.
+    """
+    return_codes = []
+    pending = []
+    for env_name, conda_targets in environments.items():
+        if conda_context.has_env(env_name):
+            ctx.vlog("Conda environment %s already exists, skipping" % env_name)
+            return_codes.append(0)
+        else:
+            pending.append((env_name, conda_targets))
+
+    def create(env_name, conda_targets, pkgs_dir):
+        env_conda_context = conda_context
+        if pkgs_dir is not None:
+            env_conda_context = isolated_package_cache_context(conda_context, pkgs_dir)
+        with thread_output_buffer() as output:
+            ctx.log("Install conda targets %s into %s" % (", ".join(map(str, conda_targets)), env_name))
+            return_code = conda_util.install_conda_targets(
+                conda_targets, conda_context=env_conda_context, env_name=env_name
+            )
+            if return_code:
+                conda_util.cleanup_failed_install_of_environment(env_name, conda_context=env_conda_context)
+        return return_code, output.getvalue()
+
+    with contextlib.ExitStack() as stack:
+        pkgs_directory = None
+        if parallelism > 1 and pending:
+            # Next to the shared cache so packages can still be hard linked,
+            # installed files don't need the cache once created.
+            pkgs_directory = stack.enter_context(
+                temp_directory(prefix="planemo_pkgs_", dir=conda_context.conda_prefix)
+            )
+        stack.enter_context(thread_buffered_io())
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=max(parallelism, 1)))
+        futures = []
+        for env_name, conda_targets in pending:
+            pkgs_dir = os.path.join(pkgs_directory, env_name) if pkgs_directory else None
+            futures.append(executor.submit(create, env_name, conda_targets, pkgs_dir))
+        for future in futures:
+            return_code, output = future.result()
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            return_codes.append(return_code)
+    return coalesce_return_codes(return_codes, assert_at_least_one=True)
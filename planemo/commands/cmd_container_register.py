@@ -20,6 +20,7 @@ from planemo.conda import (
     build_conda_context,
     collect_conda_target_lists_and_tool_paths
 )
+from planemo.conda_repodata import configure_repodata_index
 from planemo.git import add, branch, commit, push
 from planemo.github_util import clone_fork_branch, get_repository_object, pull_request
 from planemo.mulled import conda_to_mulled_targets
@@ -78,6 +79,7 @@ def cli(ctx, paths, **kwds):
     """
     registry_target = RegistryTarget(ctx, **kwds)
     conda_context = build_conda_context(ctx, **kwds)
+    configure_repodata_index(ctx)
 
     combinations_added = 0
     conda_targets_list, tool_paths_list = collect_conda_target_lists_and_tool_paths(ctx, paths, recursive=kwds["recursive"])
@@ -3,7 +3,11 @@ import click
 
 from planemo import options
 from planemo.cli import command_function
-from planemo.tool_lint import build_tool_lint_args, lint_tools_on_path
+from planemo.tool_lint import (
+    build_lint_cache,
+    build_tool_lint_args,
+    lint_tools_on_path,
+)
 
 
 @click.command('lint')
@@ -13,6 +17,8 @@ from planemo.tool_lint import build_tool_lint_args, lint_tools_on_path
 @options.fail_level_option()
 @options.skip_option()
 @options.lint_xsd_option()
+@options.lint_cache_option()
+@options.lint_parallelism_option()
 @options.recursive_option()
 @click.option(
     "--urls",
@@ -54,7 +60,9 @@ def cli(ctx, uris, **kwds):
         ctx,
         uris,
         lint_args,
-        recursive=kwds["recursive"]
+        recursive=kwds["recursive"],
+        parallelism=kwds["lint_parallelism"],
+        lint_cache=build_lint_cache(ctx, lint_args, **kwds),
     )
 
     # TODO: rearchitect XUnit.
@@ -12,6 +12,7 @@ from planemo.cli import command_function
 
 @click.command("shed_build")
 @options.optional_tools_arg(multiple=False)
+@options.shed_compression_level_option()
 @command_function
 def cli(ctx, path, **kwds):
     """Create a Galaxy tool tarball.
@@ -20,7 +21,7 @@ def cli(ctx, path, **kwds):
     (which you could upload to the Tool Shed manually).
     """
     def build(realized_repository):
-        tarpath = shed.build_tarball(realized_repository.path)
+        tarpath = shed.build_tarball(realized_repository.path, **kwds)
         outpath = realized_repository.real_path + ".tar.gz"
         shutil.move(tarpath, outpath)
         print("Created: %s" % (outpath))
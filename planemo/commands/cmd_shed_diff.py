@@ -34,6 +34,12 @@ from planemo.reports.xunit_handler import handle_report_xunit_kwd
     help="Do not attempt smart diff of XML to filter out attributes "
          "populated by the Tool Shed.",
 )
+@click.option(
+    "--full_report",
+    is_flag=True,
+    help="Report every difference found by the smart XML diff rather than "
+         "only the first difference in each file.",
+)
 @options.report_xunit()
 @command_function
 def cli(ctx, paths, **kwds):
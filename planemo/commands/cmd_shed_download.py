@@ -33,6 +33,10 @@ def cli(ctx, paths, **kwds):
 
     Download a tool repository as a tarball from the tool shed and extract
     to the specified directory.
+
+    Use ``--shed_parallelism`` to download many repositories at once.
+    Interrupted tarball downloads are resumed from the partial
+    ``<destination>.part`` file on the next run.
     """
     shed_context = shed.get_shed_context(ctx, read_only=True, **kwds)
 
@@ -18,6 +18,7 @@ from planemo.cli import command_function
     help=("Lint tools discovered in the process of linting repositories.")
 )
 @options.lint_xsd_option()
+@options.lint_cache_option()
 @options.click.option(
     '--ensure_metadata',
     is_flag=True,
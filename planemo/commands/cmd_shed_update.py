@@ -49,6 +49,10 @@ def cli(ctx, paths, **kwds):
     cause unwanted installable revisions to be created when there are no
     important changes.
 
+    For mass updates, ``--skip_unchanged`` skips uploading repositories whose
+    realized contents and ``.shed.yml`` metadata have not changed since planemo
+    last uploaded them to the targeted tool shed, without downloading anything.
+
     The lower-level ``shed_upload`` command should be used instead if
     the repository doesn't define complete metadata in a ``.shed.yml``.
     """
@@ -32,6 +32,14 @@ from planemo.runnable import (
          "instances to limit generated traffic.",
     default="0",
 )
+@click.option(
+    "--test_parallelism",
+    type=int,
+    help="Run up to this many test cases concurrently against the same "
+         "Galaxy (or other engine). Each test case uses its own history and "
+         "results are still reported in a fixed order.",
+    default=1,
+)
 @click.option(
     "--history_name",
     help="Name for history (if a history is generated as part of testing.)"
@@ -6,13 +6,15 @@ The extend galaxy-tool-util's features with planemo specific idioms.
 from __future__ import absolute_import
 
 import collections
+import copy
 import os
-import threading
 
 from galaxy.tool_util.deps import conda_util
+from galaxy.util import unicodify
 
+from planemo.conda_repodata import get_repodata_index
 from planemo.exit_codes import EXIT_CODE_FAILED_DEPENDENCIES, ExitCodeException
-from planemo.io import error, shell
+from planemo.io import error, shell, warn
 from planemo.tools import yield_tool_sources_on_paths
 
 MESSAGE_ERROR_FAILED_INSTALL = "Attempted to install conda and failed."
@@ -76,7 +78,7 @@ def collect_conda_targets(ctx, paths, recursive=False, found_tool_callback=None)
         else:
             real_paths.append(path)
 
-    for (tool_path, tool_source) in yield_tool_sources_on_paths(ctx, real_paths, recursive=recursive, exclude_deprecated=True):
+    for (tool_path, tool_source) in yield_tool_sources_on_paths(ctx, real_paths, recursive=recursive, exclude_deprecated=True, use_index=True):
         if found_tool_callback:
             found_tool_callback(tool_path)
         for target in tool_source_conda_targets(tool_source):
@@ -117,7 +119,7 @@ def collect_conda_target_lists_and_tool_paths(ctx, paths, recursive=False, found
     """
     conda_target_lists = set([])
     tool_paths = collections.defaultdict(list)
-    for (tool_path, tool_source) in yield_tool_sources_on_paths(ctx, paths, recursive=recursive, yield_load_errors=False):
+    for (tool_path, tool_source) in yield_tool_sources_on_paths(ctx, paths, recursive=recursive, yield_load_errors=False, use_index=True):
         if found_tool_callback:
             found_tool_callback(tool_path)
         targets = frozenset(tool_source_conda_targets(tool_source))
@@ -131,24 +133,72 @@ def collect_conda_target_lists_and_tool_paths(ctx, paths, recursive=False, found
     return conda_target_lists, conda_target_tool_paths
 
 
+def collect_conda_environments(ctx, paths, recursive=False, found_tool_callback=None):
+    """Map the conda environment each tool would use to its CondaTarget list.
+
+    Environments are named as Galaxy's conda dependency resolver names them
+    (see :func:`conda_environment_name`), so tools sharing a requirement list
+    share an entry. Tools without requirements are skipped and the mapping
+    is ordered by the first tool found for each environment.
+    """
+    environments = collections.OrderedDict()
+    for (tool_path, tool_source) in yield_tool_sources_on_paths(ctx, paths, recursive=recursive, yield_load_errors=False, use_index=True):
+        if found_tool_callback:
+            found_tool_callback(tool_path)
+        conda_targets = tool_source_conda_targets(tool_source)
+        if not conda_targets:
+            continue
+        environments.setdefault(conda_environment_name(conda_targets), conda_targets)
+    return environments
+
+
+def isolated_package_cache_context(conda_context, pkgs_dir):
+    """Return a copy of ``conda_context`` that writes packages to ``pkgs_dir``.
+
+    Concurrent ``conda create`` runs writing to one package cache race on it.
+    Commands of the copy list ``pkgs_dir`` first in ``CONDA_PKGS_DIRS`` so
+    missing packages are fetched there, packages already in the shared cache
+    of ``conda_context`` are still used.
+    """
+    shared_pkgs_dir = os.path.join(conda_context.conda_prefix, "pkgs")
+    shell_exec = conda_context.shell_exec
+
+    def isolated_shell_exec(cmds, env=None, **kwds):
+        env = dict(env or {})
+        env["CONDA_PKGS_DIRS"] = ",".join([pkgs_dir, shared_pkgs_dir])
+        return shell_exec(cmds, env=env, **kwds)
+
+    isolated_context = copy.copy(conda_context)
+    isolated_context.shell_exec = isolated_shell_exec
+    return isolated_context
+
+
+def conda_environment_name(conda_targets):
+    """Return the environment name Galaxy resolves ``conda_targets`` against."""
+    if len(conda_targets) > 1:
+        return "mulled-v1-%s" % conda_util.hash_conda_packages(conda_targets)
+    return conda_targets[0].install_environment
+
+
 def tool_source_conda_targets(tool_source):
     """Load CondaTarget object from supplied abstract tool source."""
     requirements, _ = tool_source.parse_requirements_and_containers()
     return conda_util.requirements_to_conda_targets(requirements)
 
 
-best_practice_search_first = threading.local()
-
-
 def best_practice_search(conda_target, conda_context=None, platform=None):
-    # Call it in offline mode after the first time.
-    try:
-        best_practice_search_first.previously_called
-        # TODO: Undo this...
-        offline = False
-    except AttributeError:
-        best_practice_search_first.previously_called = True
-        offline = False
+    """Find the best match for ``conda_target`` in the best practice channels.
+
+    Searches are answered from an index of the channels' ``repodata.json``
+    loaded once per process, falling back to ``conda search`` if the
+    channels can't be indexed.
+    """
+    repodata_index = get_repodata_index(BEST_PRACTICE_CHANNELS, platform=platform)
+    if repodata_index.load_error is None:
+        try:
+            return repodata_index.best_search_result(conda_target)
+        except Exception as e:
+            warn("Failed to index best practice channels, falling back to conda search: %s" % unicodify(e))
 
     if not conda_context:
         conda_context = conda_util.CondaContext()
@@ -156,7 +206,6 @@ def best_practice_search(conda_target, conda_context=None, platform=None):
         conda_target,
         conda_context=conda_context,
         channels_override=BEST_PRACTICE_CHANNELS,
-        offline=offline,
         platform=platform,
     )
 
@@ -165,8 +214,10 @@ __all__ = (
     "BEST_PRACTICE_CHANNELS",
     "best_practice_search",
     "build_conda_context",
+    "collect_conda_environments",
     "collect_conda_targets",
     "collect_conda_target_lists",
     "collect_conda_target_lists_and_tool_paths",
+    "conda_environment_name",
     "tool_source_conda_targets",
 )
@@ -0,0 +1,224 @@
+"""In-memory index of conda channel ``repodata.json`` for best practice searches.
+
+Each channel/subdir ``repodata.json`` is downloaded (or read from a
+``file://`` channel) at most once per process and reduced to a mapping of
+package names to available versions. Reduced indices are cached in the
+planemo workspace together with the HTTP ``ETag`` so later runs only
+revalidate them, and are used as is when the channel can't be reached.
+"""
+import hashlib
+import json
+import os
+import platform as _platform
+import sys
+import tempfile
+import threading
+
+import packaging.version
+import requests
+from six.moves.urllib.parse import unquote, urlparse
+
+REPODATA_CACHE_DIRECTORY = "conda_repodata"
+DEFAULT_CHANNEL_ALIAS = "https://conda.anaconda.org"
+DEFAULTS_CHANNEL_URLS = ["https://repo.anaconda.com/pkgs/main", "https://repo.anaconda.com/pkgs/r"]
+DEFAULT_TIMEOUT = 60
+HIT_KEYS = ["name", "version", "build", "build_number", "timestamp"]
+
+_repodata_index_settings = {}
+_repodata_indices = {}
+_repodata_indices_lock = threading.Lock()
+
+
+class RepodataIndex(object):
+    """Answer ``conda search``-like queries from channels' ``repodata.json``."""
+
+    def __init__(self, channels, platform=None, cache_directory=None, timeout=DEFAULT_TIMEOUT):
+        self.channels = channels
+        self.platform = platform or conda_platform()
+        self.cache_directory = cache_directory
+        if cache_directory and not os.path.exists(cache_directory):
+            os.makedirs(cache_directory)
+        self.timeout = timeout
+        self._packages = None
+        self._lock = threading.Lock()
+        self.load_error = None
+
+    def prepare(self):
+        """Load the index now, e.g. before forking workers that should share it.
+
+        Failures are recorded in ``load_error`` rather than raised.
+        """
+        try:
+            self._load()
+        except Exception:
+            pass
+
+    def search(self, package):
+        """Return hits for ``package`` ordered by channel priority."""
+        return list(self._load().get(package, []))
+
+    def best_search_result(self, conda_target):
+        """Mirror ``conda_util.best_search_result`` for ``conda_target``.
+
+        Returns a ``(hit, exact)`` tuple or ``(None, None)`` if no channel
+        provides the package.
+        """
+        hits = self.search(conda_target.package)
+        if not hits:
+            return (None, None)
+        # Stable sorts keep channel priority for otherwise identical hits.
+        hits = sorted(hits, key=lambda hit: hit.get("timestamp") or 0, reverse=True)
+        hits = sorted(hits, key=lambda hit: hit["build_number"], reverse=True)
+        hits = sorted(hits, key=lambda hit: _parse_version(hit["version"]), reverse=True)
+        for hit in hits:
+            if not conda_target.version or hit["version"] == conda_target.version:
+                return (hit, True)
+        return (hits[0], False)
+
+    def _load(self):
+        with self._lock:
+            if self.load_error is not None:
+                raise self.load_error
+            if self._packages is None:
+                try:
+                    self._packages = self._index_channels()
+                except Exception as e:
+                    # Don't retry unreachable channels for every search.
+                    self.load_error = e
+                    raise
+            return self._packages
+
+    def _index_channels(self):
+        packages = {}
+        for channel in self.channels:
+            for channel_url in channel_urls(channel):
+                for subdir in [self.platform, "noarch"]:
+                    subdir_packages = self._subdir_packages("%s/%s/repodata.json" % (channel_url, subdir))
+                    for name, hits in subdir_packages.items():
+                        for hit in hits:
+                            hit = dict(hit, channel=channel, subdir=subdir)
+                            packages.setdefault(name, []).append(hit)
+        return packages
+
+    def _subdir_packages(self, url):
+        if url.startswith("file://"):
+            path = unquote(urlparse(url).path)
+            if not os.path.exists(path):
+                return {}
+            with open(path, "r") as f:
+                return _index_repodata(json.load(f))
+
+        cached = self._read_cache(url)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        try:
+            r = requests.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException:
+            if cached is None:
+                raise
+            # Offline, use what was indexed last time.
+            return cached["packages"]
+        if r.status_code == 304 and cached is not None:
+            return cached["packages"]
+        if r.status_code == 404:
+            # Channel doesn't provide this subdir.
+            packages = {}
+        else:
+            r.raise_for_status()
+            packages = _index_repodata(r.json())
+        self._write_cache(url, {"etag": r.headers.get("ETag"), "packages": packages})
+        return packages
+
+    def _cache_path(self, url):
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_directory, "%s.json" % digest)
+
+    def _read_cache(self, url):
+        if not self.cache_directory:
+            return None
+        path = self._cache_path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except ValueError:
+            return None
+
+    def _write_cache(self, url, entry):
+        if not self.cache_directory:
+            return
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.rename(temp_path, self._cache_path(url))
+
+
+def channel_urls(channel):
+    """Return the base URLs backing a channel name or URL."""
+    if "://" in channel:
+        return [channel.rstrip("/")]
+    if channel == "defaults":
+        return DEFAULTS_CHANNEL_URLS
+    return ["%s/%s" % (DEFAULT_CHANNEL_ALIAS, channel)]
+
+
+def conda_platform():
+    """Return the conda subdir (e.g. ``linux-64``) for the running interpreter."""
+    machine = _platform.machine().lower()
+    if sys.platform.startswith("linux"):
+        system = "linux"
+    elif sys.platform == "darwin":
+        system = "osx"
+    elif sys.platform.startswith("win"):
+        system = "win"
+    else:
+        system = sys.platform
+    if machine in ["x86_64", "amd64"]:
+        arch = "64"
+    elif machine in ["arm64"] and system == "osx":
+        arch = "arm64"
+    else:
+        arch = machine
+    return "%s-%s" % (system, arch)
+
+
+def configure_repodata_index(ctx):
+    """Cache indexed repodata in ``ctx``'s workspace."""
+    with _repodata_indices_lock:
+        _repodata_index_settings["cache_directory"] = os.path.join(ctx.workspace, REPODATA_CACHE_DIRECTORY)
+        _repodata_indices.clear()
+
+
+def get_repodata_index(channels, platform=None):
+    """Return the process-wide :class:`RepodataIndex` for channels and platform."""
+    key = (tuple(channels), platform or conda_platform())
+    with _repodata_indices_lock:
+        if key not in _repodata_indices:
+            _repodata_indices[key] = RepodataIndex(list(channels), platform=key[1], **_repodata_index_settings)
+        return _repodata_indices[key]
+
+
+def _index_repodata(repodata):
+    packages = {}
+    for records_key in ["packages", "packages.conda"]:
+        for record in repodata.get(records_key, {}).values():
+            hit = dict((k, record.get(k)) for k in HIT_KEYS)
+            packages.setdefault(record["name"], []).append(hit)
+    return packages
+
+
+def _parse_version(version):
+    try:
+        return packaging.version.parse(version)
+    except packaging.version.InvalidVersion:
+        return packaging.version.parse("0")
+
+
+__all__ = (
+    "configure_repodata_index",
+    "conda_platform",
+    "get_repodata_index",
+    "RepodataIndex",
+)
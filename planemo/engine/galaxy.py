@@ -9,7 +9,10 @@ from six import add_metaclass
 
 from planemo.galaxy.activity import execute
 from planemo.galaxy.config import external_galaxy_config
-from planemo.galaxy.serve import serve_daemon
+from planemo.galaxy.serve import (
+    serve_daemon,
+    warm_galaxy_config,
+)
 from planemo.runnable import RunnableType
 from .interface import BaseEngine
 
@@ -29,10 +32,35 @@ class GalaxyEngine(BaseEngine):
         RunnableType.galaxy_datamanager,
     ]
 
+    _served_config = None
+
+    def test(self, runnables):
+        """Serve all runnables with a single Galaxy and test them against it."""
+        self._check_can_run_all(runnables)
+        self._ctx.vlog("Serving artifacts [%s] with Galaxy for testing." % (runnables,))
+        with self.ensure_runnables_served(runnables) as config:
+            # Resolve the lazily created user API key up front, test cases
+            # may run concurrently against this config.
+            config.user_api_key
+            self._served_config = config
+            try:
+                return super(GalaxyEngine, self).test(runnables)
+            finally:
+                self._served_config = None
+
+    @contextlib.contextmanager
+    def _runnables_served(self, runnables):
+        # Reuse the Galaxy served for the whole test run if there is one.
+        if self._served_config is not None:
+            yield self._served_config
+        else:
+            with self.ensure_runnables_served(runnables) as config:
+                yield config
+
     def _run(self, runnable, job_path):
         """Run CWL job in Galaxy."""
         self._ctx.vlog("Serving artifact [%s] with Galaxy." % (runnable,))
-        with self.ensure_runnables_served([runnable]) as config:
+        with self._runnables_served([runnable]) as config:
             self._ctx.vlog("Running job path [%s]" % job_path)
             if self._ctx.verbose:
                 self._ctx.log("Running Galaxy with API configuration [%s]" % config.user_api_config)
@@ -49,7 +77,7 @@ class GalaxyEngine(BaseEngine):
             # Simple file-based job path.
             return super(GalaxyEngine, self)._run_test_case(test_case)
         else:
-            with self.ensure_runnables_served([test_case.runnable]) as config:
+            with self._runnables_served([test_case.runnable]) as config:
                 galaxy_interactor_kwds = {
                     "galaxy_url": config.galaxy_url,
                     "master_api_key": config.master_api_key,
@@ -101,8 +129,13 @@ class LocalManagedGalaxyEngine(GalaxyEngine):
     def ensure_runnables_served(self, runnables):
         # TODO: define an interface for this - not everything in config would make sense for a
         # pre-existing Galaxy interface.
-        with serve_daemon(self._ctx, runnables, **self._serve_kwds()) as config:
-            yield config
+        serve_kwds = self._serve_kwds()
+        if serve_kwds.get("warm_galaxy"):
+            with warm_galaxy_config(self._ctx, runnables, **serve_kwds) as config:
+                yield config
+        else:
+            with serve_daemon(self._ctx, runnables, **serve_kwds) as config:
+                yield config
 
     def _serve_kwds(self):
         return self._kwds.copy()
@@ -4,6 +4,7 @@ import abc
 import json
 import os
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from six import add_metaclass
@@ -93,19 +94,34 @@ class BaseEngine(Engine):
         return structured_results
 
     def _collect_test_results(self, test_cases):
-        test_results = []
-        for test_case in test_cases:
+        test_parallelism = self._test_parallelism(test_cases)
+        if test_parallelism > 1:
             self._ctx.vlog(
-                "Running tests %s" % test_case
+                "Running %d test cases with parallelism %d" % (len(test_cases), test_parallelism)
             )
-            run_response = self._run_test_case(test_case)
-            self._ctx.vlog(
-                "Test case [%s] resulted in run response [%s]",
-                test_case,
-                run_response,
-            )
-            test_results.append((test_case, run_response))
-        return test_results
+            with ThreadPoolExecutor(max_workers=test_parallelism) as executor:
+                # map yields results in submission order so the structured
+                # data stays deterministic regardless of completion order.
+                run_responses = list(executor.map(self._run_and_log_test_case, test_cases))
+        else:
+            run_responses = [self._run_and_log_test_case(t) for t in test_cases]
+        return list(zip(test_cases, run_responses))
+
+    def _test_parallelism(self, test_cases):
+        test_parallelism = self._kwds.get("test_parallelism") or 1
+        return max(1, min(int(test_parallelism), len(test_cases)))
+
+    def _run_and_log_test_case(self, test_case):
+        self._ctx.vlog(
+            "Running tests %s" % test_case
+        )
+        run_response = self._run_test_case(test_case)
+        self._ctx.vlog(
+            "Test case [%s] resulted in run response [%s]",
+            test_case,
+            run_response,
+        )
+        return run_response
 
     def _run_test_case(self, test_case):
         runnable = test_case.runnable
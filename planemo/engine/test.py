@@ -18,7 +18,7 @@ def test_runnables(ctx, runnables, original_paths=None, **kwds):
     engine_type = kwds["engine"]
     test_engine_testable = {RunnableType.galaxy_tool, RunnableType.galaxy_datamanager, RunnableType.directory}
     enable_test_engines = any(r.type not in test_engine_testable for r in runnables)
-    enable_test_engines = enable_test_engines or engine_type != "galaxy"
+    enable_test_engines = enable_test_engines or engine_type != "galaxy" or bool(kwds.get("warm_galaxy"))
     if enable_test_engines:
         ctx.vlog("Using test engine type %s" % engine_type)
         with engine_context(ctx, **kwds) as engine:
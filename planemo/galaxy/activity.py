@@ -2,10 +2,11 @@
 
 import json
 import os
+import shutil
 import sys
 import tempfile
-import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 import bioblend
 import requests
@@ -25,11 +26,22 @@ from galaxy.util import (
     safe_makedirs,
     unicodify,
 )
-from requests.exceptions import RequestException
+from requests.adapters import HTTPAdapter
+from requests.exceptions import (
+    ChunkedEncodingError,
+    ConnectionError,
+)
 from six.moves.urllib.parse import urljoin
 
 from planemo.galaxy.api import summarize_history
-from planemo.io import wait_on
+from planemo.galaxy.upload_cache import (
+    is_simple_upload,
+    UploadCache,
+)
+from planemo.galaxy.wait import (
+    polling_gi,
+    StateWaiter,
+)
 from planemo.runnable import (
     ErrorRunResponse,
     get_outputs,
@@ -38,6 +50,9 @@ from planemo.runnable import (
 )
 
 DEFAULT_HISTORY_NAME = "CWL Target History"
+DEFAULT_DOWNLOAD_CONCURRENCY = 4
+DOWNLOAD_RETRIES = 3
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
 ERR_NO_SUCH_TOOL = ("Failed to find tool with ID [%s] in Galaxy - cannot execute job. "
                     "You may need to enable verbose logging and determine why the tool did not load. [%s]")
 
@@ -79,23 +94,53 @@ def log_contents_str(config):
 
 class PlanemoStagingInterface(StagingInterace):
 
-    def __init__(self, ctx, runnable, user_gi, version_major):
+    def __init__(self, ctx, runnable, user_gi, version_major, upload_cache=None):
         self._ctx = ctx
         self._user_gi = user_gi
         self._runnable = runnable
         self._version_major = version_major
+        self._upload_cache = upload_cache
+        self._attached_paths = []
+        self.job_ids = []
 
     def _post(self, api_path, payload, files_attached=False):
+        attached_paths, self._attached_paths = self._attached_paths, []
+        cache_key = None
+        if self._upload_cache is not None and len(attached_paths) == 1 and is_simple_upload(api_path, payload):
+            cache_key = self._upload_cache.key(
+                self._user_gi.url, attached_paths[0], api_path, payload, api_key=self._user_gi.key
+            )
+            dataset = self._upload_cache.copy_to_history(self._user_gi, cache_key, payload["history_id"])
+            if dataset is not None:
+                self._ctx.vlog("Reusing previously uploaded dataset for path [%s]" % attached_paths[0])
+                for attachment in payload["__files"].values():
+                    attachment.close()
+                return {"outputs": [dataset], "jobs": []}
+
         params = dict(key=self._user_gi.key)
         url = urljoin(self._user_gi.url, "api/" + api_path)
-        return galaxy_requests_post(url, data=payload, params=params, as_json=True).json()
+        response = galaxy_requests_post(url, data=payload, params=params, as_json=True).json()
+        if cache_key is not None and response.get("outputs"):
+            self._record_upload(cache_key, response["outputs"][0])
+        return response
+
+    def _record_upload(self, cache_key, output):
+        dataset_uuid = output.get("uuid")
+        if dataset_uuid is None:
+            try:
+                dataset_uuid = self._user_gi.datasets.show_dataset(output["id"]).get("uuid")
+            except Exception:
+                return
+        if dataset_uuid:
+            self._upload_cache.record(cache_key, output["id"], dataset_uuid)
 
     def _attach_file(self, path):
+        self._attached_paths.append(path)
         return attach_file(path)
 
     def _handle_job(self, job_response):
-        job_id = job_response["id"]
-        _wait_for_job(self._user_gi, job_id)
+        # Don't block on each upload, stage_in waits on all of them in a batch.
+        self.job_ids.append(job_response["id"])
 
     @property
     def use_fetch_api(self):
@@ -110,11 +155,18 @@ class PlanemoStagingInterface(StagingInterace):
 def _execute(ctx, config, runnable, job_path, **kwds):
     user_gi = config.user_gi
     admin_gi = config.gi
+    waiter = StateWaiter(ctx, polling_gi(user_gi), polling_backoff=kwds.get("polling_backoff", 0))
+    try:
+        return _execute_with_waiter(ctx, config, runnable, job_path, user_gi, admin_gi, waiter, **kwds)
+    finally:
+        ctx.vlog("Made [%d] Galaxy API requests waiting on job, history and invocation states" % waiter.api_calls)
+
 
+def _execute_with_waiter(ctx, config, runnable, job_path, user_gi, admin_gi, waiter, **kwds):
     history_id = _history_id(user_gi, **kwds)
 
     try:
-        job_dict, _ = stage_in(ctx, runnable, config, user_gi, history_id, job_path, **kwds)
+        job_dict, _ = stage_in(ctx, runnable, config, user_gi, history_id, job_path, waiter=waiter, **kwds)
     except Exception:
         ctx.vlog("Problem with staging in data for Galaxy activities...")
         raise
@@ -135,7 +187,7 @@ def _execute(ctx, config, runnable, job_path, **kwds):
         job = tool_run_response["jobs"][0]
         job_id = job["id"]
         try:
-            final_state = _wait_for_job(user_gi, job_id)
+            final_state = waiter.wait_for_job(job_id, history_id=history_id)
         except Exception:
             summarize_history(ctx, user_gi, history_id)
             raise
@@ -178,18 +230,17 @@ def _execute(ctx, config, runnable, job_path, **kwds):
         invocation = user_gi.workflows._post(payload, url=invocations_url)
         invocation_id = invocation["id"]
         ctx.vlog("Waiting for invocation [%s]" % invocation_id)
-        polling_backoff = kwds.get("polling_backoff", 0)
         final_invocation_state = 'new'
         error_message = ""
         try:
-            final_invocation_state = _wait_for_invocation(ctx, user_gi, history_id, workflow_id, invocation_id, polling_backoff)
+            final_invocation_state = waiter.wait_for_invocation(workflow_id, invocation_id)
             assert final_invocation_state == 'scheduled'
         except Exception:
             ctx.vlog("Problem waiting on invocation...")
             summarize_history(ctx, user_gi, history_id)
             error_message = "Final invocation state is [%s]" % final_invocation_state
         ctx.vlog("Final invocation state is [%s]" % final_invocation_state)
-        final_state = _wait_for_history(ctx, user_gi, history_id, polling_backoff)
+        final_state = waiter.wait_for_history(history_id)
         if final_state != "ok":
             msg = "Failed to run workflow final history state is [%s]." % final_state
             error_message = msg if not error_message else "%s. %s" % (error_message, msg)
@@ -216,27 +267,34 @@ def _execute(ctx, config, runnable, job_path, **kwds):
         **response_kwds
     )
     output_directory = kwds.get("output_directory", None)
+    download_concurrency = kwds.get("download_concurrency") or DEFAULT_DOWNLOAD_CONCURRENCY
     ctx.vlog("collecting outputs from run...")
-    run_response.collect_outputs(ctx, output_directory)
+    run_response.collect_outputs(ctx, output_directory, download_concurrency=download_concurrency)
     ctx.vlog("collecting outputs complete")
     return run_response
 
 
-def stage_in(ctx, runnable, config, user_gi, history_id, job_path, **kwds):  # noqa C901
+def stage_in(ctx, runnable, config, user_gi, history_id, job_path, waiter=None, **kwds):  # noqa C901
+    if waiter is None:
+        waiter = StateWaiter(ctx, polling_gi(user_gi), polling_backoff=kwds.get("polling_backoff", 0))
     # only upload objects as files/collections for CWL workflows...
     tool_or_workflow = "tool" if runnable.type != RunnableType.cwl_workflow else "workflow"
     to_posix_lines = runnable.type.is_galaxy_artifact
-    job_dict, datasets = PlanemoStagingInterface(ctx, runnable, user_gi, config.version_major).stage(
+    upload_cache = UploadCache.for_context(ctx) if kwds.get("upload_cache") else None
+    staging_interface = PlanemoStagingInterface(ctx, runnable, user_gi, config.version_major, upload_cache=upload_cache)
+    job_dict, datasets = staging_interface.stage(
         tool_or_workflow,
         history_id=history_id,
         job_path=job_path,
         use_path_paste=config.use_path_paste,
         to_posix_lines=to_posix_lines,
     )
+    if staging_interface.job_ids:
+        waiter.wait_for_jobs(staging_interface.job_ids, history_id=history_id)
 
     if datasets:
         ctx.vlog("uploaded datasets [%s] for activity, checking history state" % datasets)
-        final_state = _wait_for_history(ctx, user_gi, history_id)
+        final_state = waiter.wait_for_history(history_id)
 
         for (dataset, path) in datasets:
             dataset_details = user_gi.histories.show_dataset(
@@ -284,6 +342,8 @@ class GalaxyBaseRunResponse(SuccessfulRunResponse):
         self._job_info = None
 
         self._outputs_dict = None
+        self._session = None
+        self._prefetched = {}
 
     def to_galaxy_output(self, output):
         """Convert runnable output to a GalaxyOutput object.
@@ -313,16 +373,68 @@ class GalaxyBaseRunResponse(SuccessfulRunResponse):
         else:
             raise Exception("Unknown history content type encountered [%s]" % history_content_type)
 
-    def collect_outputs(self, ctx, output_directory):
+    def collect_outputs(self, ctx, output_directory, download_concurrency=DEFAULT_DOWNLOAD_CONCURRENCY):
         assert self._outputs_dict is None, "collect_outputs pre-condition violated"
 
-        outputs_dict = {}
         if not output_directory:
             # TODO: rather than creating a directory just use
             # Galaxy paths if they are available in this
             # configuration.
             output_directory = tempfile.mkdtemp()
 
+        download_concurrency = max(1, download_concurrency)
+        self._session = _download_session(download_concurrency)
+        prefetch_directory = tempfile.mkdtemp(prefix="planemo_prefetch_", dir=output_directory)
+        executor = ThreadPoolExecutor(max_workers=download_concurrency)
+        try:
+            self._prefetched = self._prefetch_outputs(executor, prefetch_directory)
+            self._collect_outputs(ctx, output_directory)
+        finally:
+            executor.shutdown(wait=True)
+            shutil.rmtree(prefetch_directory, ignore_errors=True)
+            self._prefetched = {}
+            self._session.close()
+            self._session = None
+
+    def _prefetch_outputs(self, executor, prefetch_directory):
+        """Start concurrent downloads of all primary output datasets.
+
+        ``_collect_outputs`` still walks outputs serially (file properties
+        are computed as it goes) but it picks up these prefetched files
+        instead of downloading each dataset in turn.
+        """
+        dataset_ids = []
+        for runnable_output in get_outputs(self._runnable):
+            if not runnable_output.get_id():
+                continue
+            try:
+                output_src = self.output_src(runnable_output)
+            except Exception:
+                # Reported when outputs are collected.
+                continue
+            if output_src is None:
+                continue
+            if output_src["src"] == "hda":
+                dataset_ids.append(output_src["id"])
+            elif output_src["src"] == "hdca":
+                collection = self._get_metadata("dataset_collection", output_src["id"])
+                dataset_ids.extend(_collection_dataset_ids(collection))
+
+        prefetched = {}
+        for dataset_id in dataset_ids:
+            if dataset_id in prefetched:
+                continue
+            prefetched[dataset_id] = executor.submit(
+                self._history_content_download,
+                self._history_id,
+                dataset_id,
+                to_path=os.path.join(prefetch_directory, dataset_id),
+            )
+        return prefetched
+
+    def _collect_outputs(self, ctx, output_directory):
+        outputs_dict = {}
+
         def get_dataset(dataset_details, filename=None):
             parent_basename = dataset_details.get("cwl_file_name")
             if not parent_basename:
@@ -423,12 +535,16 @@ class GalaxyBaseRunResponse(SuccessfulRunResponse):
         else:
             local_filename = filename
         destination = os.path.join(output_directory, local_filename)
-        self._history_content_download(
-            self._history_id,
-            dataset_details["id"],
-            to_path=destination,
-            filename=filename,
-        )
+        prefetched = self._prefetched.pop(dataset_details["id"], None) if filename is None else None
+        if prefetched is not None and prefetched.exception() is None:
+            shutil.move(prefetched.result(), destination)
+        else:
+            self._history_content_download(
+                self._history_id,
+                dataset_details["id"],
+                to_path=destination,
+                filename=filename,
+            )
         return destination
 
     def _history_content_download(self, history_id, dataset_id, to_path, filename=None):
@@ -439,13 +555,19 @@ class GalaxyBaseRunResponse(SuccessfulRunResponse):
         if filename:
             data["filename"] = filename
 
-        r = requests.get(url, params=data, verify=user_gi.verify, stream=True, timeout=user_gi.timeout)
-        r.raise_for_status()
-
-        with open(to_path, 'wb') as fp:
-            for chunk in r.iter_content(chunk_size=bioblend.CHUNK_SIZE):
-                if chunk:
-                    fp.write(chunk)
+        session = self._session or requests
+        partial_path = to_path + PARTIAL_DOWNLOAD_SUFFIX
+        if os.path.exists(partial_path):
+            # Left by another run, possibly for another dataset.
+            os.remove(partial_path)
+        for try_num in range(DOWNLOAD_RETRIES):
+            try:
+                _resumable_download(session, url, data, to_path, verify=user_gi.verify, timeout=user_gi.timeout)
+                return to_path
+            except (ConnectionError, ChunkedEncodingError):
+                if try_num + 1 == DOWNLOAD_RETRIES:
+                    raise
+                self._ctx.vlog("Download of dataset [%s] interrupted, resuming." % dataset_id)
 
 
 class GalaxyToolRunResponse(GalaxyBaseRunResponse):
@@ -577,6 +699,65 @@ class GalaxyWorkflowRunResponse(GalaxyBaseRunResponse):
         return self.history_state == 'ok' and self.invocation_state == 'scheduled'
 
 
+def _download_session(download_concurrency):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=download_concurrency)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _resumable_download(session, url, params, to_path, verify=True, timeout=None):
+    """Download url to to_path through ``to_path`` + ``.part``.
+
+    A partial file left by an interrupted attempt is continued with a Range
+    request, the destination itself is never resumed from and is only
+    replaced once the download is complete.
+    """
+    partial_path = to_path + PARTIAL_DOWNLOAD_SUFFIX
+    offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+    headers = {"Range": "bytes=%d-" % offset} if offset else {}
+    r = session.get(url, params=params, headers=headers, verify=verify, stream=True, timeout=timeout)
+    if r.status_code == 416:
+        # Requested range not satisfiable - partial file is already complete
+        # or stale, start over.
+        r.close()
+        os.remove(partial_path)
+        return _resumable_download(session, url, params, to_path, verify=verify, timeout=timeout)
+    r.raise_for_status()
+    resumed = r.status_code == 206
+    expected_size = r.headers.get("Content-Length")
+    if expected_size is not None and not r.headers.get("Content-Encoding"):
+        expected_size = int(expected_size) + (offset if resumed else 0)
+    else:
+        expected_size = None
+
+    with open(partial_path, 'ab' if resumed else 'wb') as fp:
+        for chunk in r.iter_content(chunk_size=bioblend.CHUNK_SIZE):
+            if chunk:
+                fp.write(chunk)
+
+    if expected_size is not None:
+        actual_size = os.path.getsize(partial_path)
+        if actual_size < expected_size:
+            raise ChunkedEncodingError("Downloaded %d of %d bytes from [%s]" % (actual_size, expected_size, url))
+        elif actual_size > expected_size:
+            os.remove(partial_path)
+            raise Exception("Downloaded %d bytes from [%s] but expected %d" % (actual_size, url, expected_size))
+    os.replace(partial_path, to_path)
+
+
+def _collection_dataset_ids(collection):
+    dataset_ids = []
+    for element in collection.get("elements", []):
+        element_object = element.get("object") or {}
+        if element.get("element_type") == "hda" and "id" in element_object:
+            dataset_ids.append(element_object["id"])
+        elif "elements" in element_object:
+            dataset_ids.extend(_collection_dataset_ids(element_object))
+    return dataset_ids
+
+
 def _tool_id(tool_path):
     tool_source = get_tool_source(tool_path)
     return tool_source.parse_id()
@@ -590,33 +771,6 @@ def _history_id(gi, **kwds):
     return history_id
 
 
-def _wait_for_invocation(ctx, gi, history_id, workflow_id, invocation_id, polling_backoff=0):
-
-    def state_func():
-        return _retry_on_timeouts(ctx, gi, lambda gi: gi.workflows.show_invocation(workflow_id, invocation_id))
-
-    return _wait_on_state(state_func, polling_backoff)
-
-
-def _retry_on_timeouts(ctx, gi, f):
-    gi.timeout = 60
-    try_count = 5
-    try:
-        for try_num in range(try_count):
-            start_time = time.time()
-            try:
-                return f(gi)
-            except RequestException:
-                end_time = time.time()
-                if end_time - start_time > 45 and (try_num + 1) < try_count:
-                    ctx.vlog("Galaxy seems to have timedout, retrying to fetch status.")
-                    continue
-                else:
-                    raise
-    finally:
-        gi.timeout = None
-
-
 def has_jobs_in_states(ctx, gi, history_id, states):
     params = {"history_id": history_id}
     jobs_url = gi.url + '/jobs'
@@ -625,38 +779,6 @@ def has_jobs_in_states(ctx, gi, history_id, states):
     return len(target_jobs) > 0
 
 
-def _wait_for_history(ctx, gi, history_id, polling_backoff=0):
-    # Used to wait for active jobs and then wait for history, but now this is called
-    # after upload is complete and after the invocation has been done scheduling - so
-    # no need to wait for active jobs anymore I think.
-
-    def state_func():
-        return _retry_on_timeouts(ctx, gi, lambda gi: gi.histories.show_history(history_id))
-
-    return _wait_on_state(state_func, polling_backoff)
-
-
-def _wait_for_job(gi, job_id):
-    def state_func():
-        return gi.jobs.show_job(job_id, full_details=True)
-
-    return _wait_on_state(state_func)
-
-
-def _wait_on_state(state_func, polling_backoff=0):
-
-    def get_state():
-        response = state_func()
-        state = response["state"]
-        if str(state) not in ["running", "queued", "new", "ready"]:
-            return state
-        else:
-            return None
-    timeout = 60 * 60 * 24
-    final_state = wait_on(get_state, "state", timeout, polling_backoff)
-    return final_state
-
-
 __all__ = (
     "execute",
 )
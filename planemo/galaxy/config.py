@@ -4,14 +4,19 @@ from __future__ import print_function
 
 import abc
 import contextlib
+import hashlib
 import os
 import random
+import re
 import shutil
+import subprocess
+import sys
 from string import Template
 from tempfile import mkdtemp
 
 from galaxy.containers.docker_model import DockerVolume
 from galaxy.tool_util.deps import docker_util
+from galaxy.util import unicodify
 from galaxy.util.commands import argv_to_str
 from pkg_resources import parse_version
 from six import (
@@ -198,6 +203,10 @@ DATABASE_LOCATION_TEMPLATE = "sqlite:///%s?isolation_level=IMMEDIATE"
 COMMAND_STARTUP_COMMAND = './scripts/common_startup.sh ${COMMON_STARTUP_ARGS}'
 
 CLEANUP_IGNORE_ERRORS = True
+GALAXY_ROOT_SNAPSHOTS_DIRECTORY = "gx_roots"
+GALAXY_ROOT_SNAPSHOTS_KEEP = 3
+GALAXY_ROOT_BUILD_PREFIX = "build_"
+GIT_COMMIT_RE = re.compile(r"^[0-9a-f]{40}([0-9a-f]{24})?$")
 DEFAULT_GALAXY_BRAND = 'Configured by Planemo'
 DEFAULT_TOOL_INSTALL_TIMEOUT = 60 * 60 * 1
 UNINITIALIZED = object()
@@ -757,7 +766,7 @@ class BaseGalaxyConfig(GalaxyInterface):
 
     def install_workflows(self):
         for runnable in self.runnables:
-            if runnable.type.name in ["galaxy_workflow", "cwl_workflow"]:
+            if runnable.type.name in ["galaxy_workflow", "cwl_workflow"] and runnable.path not in self._workflow_ids:
                 self._install_workflow(runnable)
 
     def _install_workflow(self, runnable):
@@ -1151,6 +1160,16 @@ def _install_galaxy_via_download(ctx, galaxy_root, env, kwds):
 def _install_galaxy_via_git(ctx, galaxy_root, env, kwds):
     gx_repo = _ensure_galaxy_repository_available(ctx, kwds)
     branch = _galaxy_branch(kwds)
+    commit = _galaxy_commit(gx_repo, branch)
+    if commit is None:
+        ctx.vlog("Failed to resolve Galaxy branch [%s] to a commit, not using a Galaxy root snapshot." % branch)
+        _clone_and_install_galaxy(ctx, gx_repo, branch, galaxy_root, env, kwds)
+        return
+    snapshot = _galaxy_root_snapshot(ctx, gx_repo, branch, commit, env, kwds)
+    _copy_galaxy_root(snapshot, galaxy_root)
+
+
+def _clone_and_install_galaxy(ctx, gx_repo, branch, galaxy_root, env, kwds):
     command = git.command_clone(ctx, gx_repo, galaxy_root, branch=branch)
     exit_code = shell(command, env=env)
     if exit_code != 0:
@@ -1158,6 +1177,80 @@ def _install_galaxy_via_git(ctx, galaxy_root, env, kwds):
     _install_with_command(ctx, galaxy_root, env, kwds)
 
 
+def _galaxy_commit(gx_repo, branch):
+    """Return the commit ``branch`` points at in ``gx_repo`` or None."""
+    p = subprocess.Popen(
+        ['git', '--git-dir', gx_repo, 'rev-parse', '--verify', '--quiet', '%s^{commit}' % branch],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    stdout, _ = p.communicate()
+    commit = unicodify(stdout).strip()
+    if p.returncode != 0 or not GIT_COMMIT_RE.match(commit):
+        return None
+    return commit
+
+
+def _galaxy_root_snapshot(ctx, gx_repo, branch, commit, env, kwds):
+    """Return a fully installed Galaxy root for the requested source, commit and Python.
+
+    Snapshots are built once per key under the workspace and copied into
+    each new config, skipping the clone and ``common_startup.sh`` run. Only
+    the most recently used ``GALAXY_ROOT_SNAPSHOTS_KEEP`` snapshots are kept.
+    """
+    key_parts = [
+        _galaxy_source(kwds),
+        commit,
+        kwds.get('galaxy_python_version') or DEFAULT_PYTHON_VERSION,
+    ]
+    key = hashlib.sha256("\n".join(key_parts).encode("utf-8")).hexdigest()[:16]
+    snapshots_directory = os.path.join(ctx.workspace, GALAXY_ROOT_SNAPSHOTS_DIRECTORY)
+    snapshot = os.path.join(snapshots_directory, key)
+    if os.path.isdir(snapshot):
+        ctx.vlog("Using Galaxy root snapshot [%s] for commit [%s]" % (snapshot, commit))
+        os.utime(snapshot, None)
+        _prune_galaxy_root_snapshots(ctx, snapshots_directory)
+        return snapshot
+
+    if not os.path.exists(snapshots_directory):
+        os.makedirs(snapshots_directory)
+    build_directory = mkdtemp(dir=snapshots_directory, prefix=GALAXY_ROOT_BUILD_PREFIX)
+    try:
+        build_root = os.path.join(build_directory, "galaxy")
+        _clone_and_install_galaxy(ctx, gx_repo, branch, build_root, env, kwds)
+        try:
+            os.rename(build_root, snapshot)
+        except OSError:
+            # Another planemo process finished the same snapshot first.
+            if not os.path.isdir(snapshot):
+                raise
+    finally:
+        shutil.rmtree(build_directory, ignore_errors=True)
+    os.utime(snapshot, None)
+    _prune_galaxy_root_snapshots(ctx, snapshots_directory)
+    return snapshot
+
+
+def _prune_galaxy_root_snapshots(ctx, snapshots_directory):
+    """Remove all but the ``GALAXY_ROOT_SNAPSHOTS_KEEP`` most recently used snapshots."""
+    snapshots = [
+        os.path.join(snapshots_directory, name) for name in os.listdir(snapshots_directory)
+        if not name.startswith(GALAXY_ROOT_BUILD_PREFIX)
+    ]
+    snapshots.sort(key=os.path.getmtime, reverse=True)
+    for snapshot in snapshots[GALAXY_ROOT_SNAPSHOTS_KEEP:]:
+        ctx.vlog("Removing Galaxy root snapshot [%s]" % snapshot)
+        shutil.rmtree(snapshot, ignore_errors=True)
+
+
+def _copy_galaxy_root(snapshot, galaxy_root):
+    """Copy a Galaxy root snapshot, sharing blocks with it where the filesystem allows."""
+    if sys.platform.startswith("linux"):
+        if shell(['cp', '-a', '--reflink=auto', snapshot, galaxy_root]) == 0:
+            return
+        shutil.rmtree(galaxy_root, ignore_errors=True)
+    shutil.copytree(snapshot, galaxy_root, symlinks=True)
+
+
 def _build_eggs_cache(ctx, env, kwds):
     if kwds.get("no_cache_galaxy", False):
         return None
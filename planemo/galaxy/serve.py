@@ -14,6 +14,11 @@ from .ephemeris_sleep import sleep
 from .run import (
     run_galaxy_command,
 )
+from .warm import (
+    attach_warm_galaxy,
+    find_warm_galaxy,
+    register_warm_galaxy,
+)
 INSTALLING_MESSAGE = "Installing repositories - this may take some time..."
 
 
@@ -63,6 +68,9 @@ def _serve(ctx, runnables, **kwds):
         if not galaxy_alive:
             raise Exception("Attempted to serve Galaxy at %s, but it failed to start in %d seconds." % (galaxy_url, timeout))
         config.install_workflows()
+        if daemon and kwds.get("warm_galaxy"):
+            register_warm_galaxy(ctx, kwds["warm_galaxy"], config, **kwds)
+            io.info("Warm Galaxy [%s] serving at %s (pid file %s)" % (kwds["warm_galaxy"], galaxy_url, config.pid_file))
         if kwds.get("pid_file"):
             real_pid_file = config.pid_file
             if os.path.exists(config.pid_file):
@@ -118,6 +126,26 @@ def serve_daemon(ctx, runnables=None, **kwds):
                 config.cleanup()
 
 
+@contextlib.contextmanager
+def warm_galaxy_config(ctx, runnables, **kwds):
+    """Attach to (starting if needed) the warm Galaxy named by ``warm_galaxy``.
+
+    Unlike :func:`serve_daemon` the Galaxy process is left running on exit so
+    later Planemo invocations can reuse it.
+    """
+    name = kwds["warm_galaxy"]
+    record = find_warm_galaxy(ctx, name)
+    if record is None:
+        io.info("No running warm Galaxy [%s] found, starting one." % name)
+        serve_kwds = kwds.copy()
+        serve_kwds["daemon"] = True
+        serve(ctx, runnables, **serve_kwds)
+        record = find_warm_galaxy(ctx, name)
+        if record is None:
+            raise Exception("Failed to start warm Galaxy [%s]." % name)
+    yield attach_warm_galaxy(ctx, record, runnables, **kwds)
+
+
 def sleep_for_serve():
     # This is bad, do something better...
     time.sleep(1000000)
@@ -127,4 +155,5 @@ __all__ = (
     "serve",
     "serve_daemon",
     "shed_serve",
+    "warm_galaxy_config",
 )
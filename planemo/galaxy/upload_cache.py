@@ -0,0 +1,129 @@
+"""Content-addressed cache of datasets uploaded to Galaxy while staging inputs.
+
+Entries map a hash of the uploaded file's contents, the target Galaxy, the
+user's API key and the upload parameters to the HDA that upload produced.
+On a hit the HDA is copied into the new history instead of uploading the
+file again.
+
+Managed Galaxy instances are recreated on the same URL with the same
+``id_secret``, so an encoded HDA id may refer to a different dataset in a
+later instance. Entries therefore also record the dataset's UUID and hits
+are only used when the dataset Galaxy returns for the id still has it.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+UPLOAD_CACHE_DIRECTORY = "upload_cache"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_file_hashes = {}
+_file_hashes_lock = threading.Lock()
+
+
+class UploadCache(object):
+    """Record and reuse Galaxy datasets created from local files."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @classmethod
+    def for_context(cls, ctx):
+        return cls(os.path.join(ctx.workspace, UPLOAD_CACHE_DIRECTORY))
+
+    def key(self, galaxy_url, path, api_path, payload, api_key=None):
+        """Build a cache key for uploading ``path`` with the supplied API payload."""
+        upload_parameters = dict((k, v) for k, v in payload.items() if k not in ["__files", "history_id"])
+        key_dict = {
+            "galaxy_url": galaxy_url.rstrip("/"),
+            "api_key": hashlib.sha256(api_key.encode("utf-8")).hexdigest() if api_key else None,
+            "file_hash": file_hash(path),
+            "api_path": api_path,
+            "upload_parameters": upload_parameters,
+        }
+        return hashlib.sha256(json.dumps(key_dict, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def copy_to_history(self, user_gi, key, history_id):
+        """Copy a previously uploaded dataset into history, return None on a miss.
+
+        Entries whose dataset is no longer usable (deleted, purged, in an
+        error state or not accessible) or is not the recorded dataset (its
+        UUID differs) are treated as misses.
+        """
+        entry = self._entry(key)
+        if entry is None or not entry.get("dataset_uuid"):
+            return None
+        dataset_id = entry["dataset_id"]
+        try:
+            dataset = user_gi.datasets.show_dataset(dataset_id)
+            if dataset.get("uuid") != entry["dataset_uuid"]:
+                return None
+            if dataset.get("deleted") or dataset.get("purged") or dataset.get("state") != "ok":
+                return None
+            return user_gi.histories.copy_dataset(history_id, dataset_id)
+        except Exception:
+            return None
+
+    def record(self, key, dataset_id, dataset_uuid):
+        """Record dataset ``dataset_id`` as the result of the upload described by key."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"dataset_id": dataset_id, "dataset_uuid": dataset_uuid}, f)
+        os.rename(temp_path, self._path(key))
+
+    def _entry(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except ValueError:
+            return None
+        if not isinstance(entry, dict) or "dataset_id" not in entry:
+            return None
+        return entry
+
+    def _path(self, key):
+        return os.path.join(self.directory, "%s.json" % key)
+
+
+def file_hash(path):
+    """Return sha256 of file contents, memoized on path, size and mtime."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime)
+    with _file_hashes_lock:
+        if memo_key in _file_hashes:
+            return _file_hashes[memo_key]
+    checksum = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            checksum.update(chunk)
+    digest = checksum.hexdigest()
+    with _file_hashes_lock:
+        _file_hashes[memo_key] = digest
+    return digest
+
+
+def is_simple_upload(api_path, payload):
+    """Return True if payload uploads a single attached file as a single dataset."""
+    if api_path == "tools/fetch":
+        targets = payload.get("targets", [])
+        if len(targets) != 1 or len(targets[0].get("elements", [])) != 1:
+            return False
+        return targets[0]["elements"][0].get("src") == "files"
+    elif api_path == "tools":
+        inputs = payload.get("inputs", {})
+        return payload.get("tool_id") == "upload1" and "file_count" not in inputs
+    return False
+
+
+__all__ = (
+    "file_hash",
+    "is_simple_upload",
+    "UploadCache",
+)
@@ -0,0 +1,146 @@
+"""Batched, adaptive waiting on Galaxy job, history and invocation states."""
+import threading
+import time
+
+from requests.exceptions import RequestException
+
+from planemo.bioblend import ensure_module
+from planemo.bioblend import galaxy
+from planemo.io import wait_on
+
+NON_TERMINAL_STATES = ["running", "queued", "new", "ready"]
+DEFAULT_TIMEOUT = 60 * 60 * 24
+# Timeout of a single polling request, slower responses are retried.
+POLLING_REQUEST_TIMEOUT = 60
+# Polling starts quickly and backs off geometrically (with jitter) up to this
+# many seconds between ticks so long running jobs don't hammer the API.
+BACKOFF_FACTOR = 1.5
+MAX_POLLING_DELTA = 10
+
+
+class StateWaiter(object):
+    """Wait on Galaxy jobs, histories and invocations for a single activity.
+
+    Job states are checked in batches - each polling tick issues one jobs index
+    request per history regardless of how many jobs are pending in it. The
+    number of API requests issued is tracked in ``api_calls``. Requests are
+    retried on timeouts, ``gi`` should be a client of its own created with
+    :func:`polling_gi`.
+    """
+
+    def __init__(self, ctx, gi, polling_backoff=0, timeout=DEFAULT_TIMEOUT):
+        self._ctx = ctx
+        self._gi = gi
+        self._polling_backoff = polling_backoff or 0
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self.api_calls = 0
+
+    def wait_for_jobs(self, job_ids, history_id=None):
+        """Wait for jobs to reach terminal states and return a dict of their final states."""
+        pending = set(job_ids)
+        final_states = {}
+        if not pending:
+            return final_states
+
+        def check():
+            for job_id, state in self._job_states(pending, history_id).items():
+                if _is_terminal(state):
+                    final_states[job_id] = state
+                    pending.discard(job_id)
+            return None if pending else final_states
+
+        return self._wait_on(check, "jobs %s" % sorted(job_ids))
+
+    def wait_for_job(self, job_id, history_id=None):
+        """Wait for a single job and return its final state."""
+        return self.wait_for_jobs([job_id], history_id=history_id)[job_id]
+
+    def wait_for_history(self, history_id):
+        """Wait for a history to reach a terminal state and return it."""
+        return self._wait_on_state(
+            lambda gi: gi.histories.show_history(history_id),
+            "history [%s]" % history_id,
+        )
+
+    def wait_for_invocation(self, workflow_id, invocation_id):
+        """Wait for an invocation to reach a terminal state and return it."""
+        return self._wait_on_state(
+            lambda gi: gi.workflows.show_invocation(workflow_id, invocation_id),
+            "invocation [%s]" % invocation_id,
+        )
+
+    def _job_states(self, job_ids, history_id):
+        states = {}
+        if history_id is not None:
+            jobs = self._request(
+                lambda gi: gi.jobs._get(url=gi.url + "/jobs", params={"history_id": history_id})
+            )
+            states = dict((j["id"], j["state"]) for j in jobs if j["id"] in job_ids)
+        for job_id in job_ids:
+            # Fallback for jobs the index didn't list (or no history known).
+            if job_id not in states:
+                states[job_id] = self._request(lambda gi: gi.jobs.show_job(job_id))["state"]
+        return states
+
+    def _wait_on_state(self, show_func, desc):
+
+        def get_state():
+            state = self._request(show_func)["state"]
+            return state if _is_terminal(state) else None
+
+        return self._wait_on(get_state, desc)
+
+    def _wait_on(self, function, desc):
+        return wait_on(
+            function,
+            desc,
+            self._timeout,
+            polling_backoff=self._polling_backoff,
+            backoff_factor=BACKOFF_FACTOR,
+            max_delta=MAX_POLLING_DELTA,
+            jitter=True,
+        )
+
+    def _request(self, f):
+        with self._lock:
+            self.api_calls += 1
+        return retry_on_timeouts(self._ctx, self._gi, f)
+
+
+def polling_gi(gi):
+    """Return a new client for ``gi``'s Galaxy that times out slow requests.
+
+    ``gi`` may be shared between threads (e.g. with ``--test_parallelism``),
+    so it is left untouched rather than having its timeout changed.
+    """
+    ensure_module()
+    client = galaxy.GalaxyInstance(url=gi.base_url, key=gi.key, verify=gi.verify)
+    client.timeout = POLLING_REQUEST_TIMEOUT
+    return client
+
+
+def retry_on_timeouts(ctx, gi, f):
+    try_count = 5
+    for try_num in range(try_count):
+        start_time = time.time()
+        try:
+            return f(gi)
+        except RequestException:
+            end_time = time.time()
+            if end_time - start_time > 45 and (try_num + 1) < try_count:
+                ctx.vlog("Galaxy seems to have timedout, retrying to fetch status.")
+                continue
+            else:
+                raise
+
+
+def _is_terminal(state):
+    return str(state) not in NON_TERMINAL_STATES
+
+
+__all__ = (
+    "polling_gi",
+    "retry_on_timeouts",
+    "StateWaiter",
+)
@@ -0,0 +1,162 @@
+"""Records of long-lived ("warm") Galaxy daemons later Planemo invocations attach to.
+
+A warm Galaxy is a daemonized, Planemo-managed Galaxy registered under a name
+in Planemo's workspace. Subsequent commands started with the same
+``--warm_galaxy`` name attach to it through its pid file and hot-load any new
+tools by rewriting its ``tool_conf.xml`` and reloading the toolbox instead of
+installing and booting a fresh Galaxy.
+"""
+import errno
+import json
+import os
+import tempfile
+
+from galaxy.tool_util.parser import get_tool_source
+
+from planemo.io import wait_on
+from planemo.runnable import RunnableType
+from .config import (
+    _all_tool_paths,
+    _write_tool_conf,
+    BaseGalaxyConfig,
+)
+
+WARM_GALAXIES_DIRECTORY = "warm_galaxies"
+TOOL_LOAD_TIMEOUT = 120
+
+
+class WarmGalaxyConfig(BaseGalaxyConfig):
+    """A :class:`BaseGalaxyConfig` describing an attached warm Galaxy."""
+
+    def __init__(self, ctx, record, runnables, kwds):
+        super(WarmGalaxyConfig, self).__init__(
+            ctx=ctx,
+            galaxy_url=record["galaxy_url"],
+            master_api_key=record["master_api_key"],
+            user_api_key=None,
+            runnables=runnables,
+            kwds=kwds,
+        )
+        self.record = record
+
+    @property
+    def log_contents(self):
+        log_file = self.record.get("log_file")
+        if not log_file or not os.path.exists(log_file):
+            return ""
+        with open(log_file, "r") as f:
+            return f.read()
+
+    @property
+    def default_use_path_paste(self):
+        # Planemo started this Galaxy locally so file paths can be pasted.
+        return self.user_is_admin
+
+
+def register_warm_galaxy(ctx, name, config, **kwds):
+    """Record a freshly served local Galaxy as warm Galaxy ``name``."""
+    if not hasattr(config, "pid_file"):
+        raise Exception("Warm Galaxy [%s] requires a locally managed (non-Docker) Galaxy." % name)
+    record = {
+        "name": name,
+        "galaxy_url": config.galaxy_url,
+        "master_api_key": config.master_api_key,
+        "pid_file": config.pid_file,
+        "log_file": config.log_file,
+        "config_directory": config.config_directory,
+        "tool_conf": os.path.join(config.config_directory, "tool_conf.xml"),
+        "tool_paths": _all_tool_paths(config.runnables, **kwds),
+    }
+    _write_record(ctx, record)
+    return record
+
+
+def find_warm_galaxy(ctx, name):
+    """Return the record for warm Galaxy ``name`` if its daemon is still running."""
+    record_path = _record_path(ctx, name)
+    if not os.path.exists(record_path):
+        return None
+    with open(record_path, "r") as f:
+        record = json.load(f)
+    if not _pid_file_alive(record["pid_file"]):
+        ctx.vlog("Warm Galaxy [%s] is no longer running, discarding its record." % name)
+        os.remove(record_path)
+        return None
+    return record
+
+
+def attach_warm_galaxy(ctx, record, runnables, **kwds):
+    """Hot-load runnables' tools into a warm Galaxy and return a config for it.
+
+    Workflow runnables are imported into the warm Galaxy as well.
+    """
+    config = WarmGalaxyConfig(ctx, record, runnables, kwds)
+    new_tool_paths = [p for p in _all_tool_paths(runnables, **kwds) if p not in record["tool_paths"]]
+    if new_tool_paths:
+        ctx.vlog("Hot-loading tools %s into warm Galaxy [%s]" % (new_tool_paths, record["name"]))
+        record["tool_paths"] = record["tool_paths"] + new_tool_paths
+        _write_tool_conf(ctx, record["tool_paths"], record["tool_conf"])
+        _write_record(ctx, record)
+        admin_gi = config.gi
+        admin_gi.make_put_request(admin_gi.url + "/configuration/toolbox")
+    _wait_for_tools(config, runnables)
+    config.install_workflows()
+    return config
+
+
+def _wait_for_tools(config, runnables):
+    tool_ids = [
+        get_tool_source(r.path).parse_id()
+        for r in runnables if r.type in [RunnableType.galaxy_tool, RunnableType.cwl_tool]
+    ]
+    if not tool_ids:
+        return
+    admin_gi = config.gi
+
+    def loaded():
+        for tool_id in tool_ids:
+            try:
+                admin_gi.tools.show_tool(tool_id)
+            except Exception:
+                return None
+        return True
+
+    wait_on(loaded, "tools %s to load in warm Galaxy" % tool_ids, timeout=TOOL_LOAD_TIMEOUT)
+
+
+def _pid_file_alive(pid_file):
+    try:
+        with open(pid_file, "r") as f:
+            pid = int(f.read())
+    except (IOError, OSError, ValueError):
+        return False
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except OSError as e:
+        return e.errno == errno.EPERM
+    return True
+
+
+def _write_record(ctx, record):
+    record_path = _record_path(ctx, record["name"])
+    directory = os.path.dirname(record_path)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(record, f)
+    os.rename(temp_path, record_path)
+
+
+def _record_path(ctx, name):
+    return os.path.join(ctx.workspace, WARM_GALAXIES_DIRECTORY, "%s.json" % name)
+
+
+__all__ = (
+    "attach_warm_galaxy",
+    "find_warm_galaxy",
+    "register_warm_galaxy",
+    "WarmGalaxyConfig",
+)
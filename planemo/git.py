@@ -59,7 +59,7 @@ def checkout(ctx, remote_repo, local_path, branch=None, remote="origin", from_br
         io.communicate(["git", "merge", "--ff-only", "%s/%s" % (remote, from_branch)], env=env)
 
 
-def command_clone(ctx, src, dest, mirror=False, branch=None):
+def command_clone(ctx, src, dest, mirror=False, branch=None, depth=None):
     """Produce a command-line string to clone a repository.
 
     Take in ``ctx`` to allow more configurability down the road.
@@ -69,10 +69,25 @@ def command_clone(ctx, src, dest, mirror=False, branch=None):
         cmd.append("--mirror")
     if branch is not None:
         cmd.extend(["--branch", branch])
+    if depth is not None:
+        cmd.extend(["--depth", str(depth)])
     cmd.extend([src, dest])
     return cmd
 
 
+def checkout_shallow(ctx, src, dest, revision="HEAD"):
+    """Check out ``revision`` of ``src`` into ``dest`` fetching only that commit.
+
+    ``dest`` is initialized on first use and updated with ``git fetch`` on
+    later calls, any local modifications are discarded.
+    """
+    if not os.path.exists(os.path.join(dest, ".git")):
+        io.communicate(["git", "init", "--quiet", dest])
+    io.communicate(["git", "fetch", "--quiet", "--depth", "1", src, revision], cwd=dest)
+    io.communicate(["git", "checkout", "--quiet", "--force", "--detach", "FETCH_HEAD"], cwd=dest)
+    io.communicate(["git", "clean", "--quiet", "-ffdx"], cwd=dest)
+
+
 def diff(ctx, directory, range):
     """Produce a list of diff-ed files for commit range."""
     cmd_template = "cd '%s' && git diff --name-only '%s' --"
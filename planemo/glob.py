@@ -1,12 +1,16 @@
 from __future__ import absolute_import
 from __future__ import print_function
 
+import os
+
 NO_GLOB_2 = "glob2 library unavailabile, please install with pip install glob2."
 
 try:
     from glob2 import glob as _glob
+    from glob2.impl import Globber
 except ImportError:
     _glob = None
+    Globber = object
 
 
 def glob(*args, **kwds):
@@ -15,6 +19,62 @@ def glob(*args, **kwds):
     return _glob(*args, **kwds)
 
 
+class IndexedGlobber(Globber):
+    """A glob2 globber answering from an in-memory index of the file system.
+
+    Each directory is listed at most once and the type of every entry is
+    recorded from that listing, so expanding many patterns (e.g. several
+    ``**`` includes and excludes) over the same tree walks it only once.
+    The index is never invalidated - use a fresh instance to see changes.
+    """
+
+    def __init__(self):
+        self._listings = {}
+        self._entries = {}
+
+    def glob(self, *args, **kwds):
+        if _glob is None:
+            raise Exception(NO_GLOB_2)
+        return super(IndexedGlobber, self).glob(*args, **kwds)
+
+    def listdir(self, path):
+        if path not in self._listings:
+            try:
+                listing = []
+                for entry in os.scandir(path or os.curdir):
+                    listing.append(entry.name)
+                    self._entries[os.path.join(path, entry.name)] = (True, _is_dir(entry), entry.is_symlink())
+                self._listings[path] = listing
+            except OSError as e:
+                self._listings[path] = e
+        listing = self._listings[path]
+        if isinstance(listing, OSError):
+            raise listing
+        return list(listing)
+
+    def exists(self, path):
+        return self._entry(path)[0]
+
+    def isdir(self, path):
+        return self._entry(path)[1]
+
+    def islink(self, path):
+        return self._entry(path)[2]
+
+    def _entry(self, path):
+        if path not in self._entries:
+            self._entries[path] = (os.path.lexists(path), os.path.isdir(path), os.path.islink(path))
+        return self._entries[path]
+
+
+def _is_dir(entry):
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
 __all__ = (
     "glob",
+    "IndexedGlobber",
 )
@@ -0,0 +1,34 @@
+"""Helpers for building content based cache keys."""
+import hashlib
+
+import pkg_resources
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+_galaxy_tool_util_version = None
+
+
+def content_hash(path):
+    """Return the sha256 hex digest of the contents of ``path``."""
+    checksum = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def galaxy_tool_util_version():
+    """Return the installed galaxy-tool-util version (or ``unknown``)."""
+    global _galaxy_tool_util_version
+    if _galaxy_tool_util_version is None:
+        try:
+            _galaxy_tool_util_version = pkg_resources.get_distribution("galaxy-tool-util").version
+        except pkg_resources.DistributionNotFound:
+            _galaxy_tool_util_version = "unknown"
+    return _galaxy_tool_util_version
+
+
+__all__ = (
+    "content_hash",
+    "galaxy_tool_util_version",
+)
@@ -6,10 +6,12 @@ import contextlib
 import errno
 import fnmatch
 import os
+import random
 import shutil
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 from sys import platform as _platform
 from xml.sax.saxutils import escape
@@ -283,6 +285,96 @@ def captured_io_for_xunit(kwds, captured_io):
         captured_io["time"] = None
 
 
+@contextlib.contextmanager
+def thread_buffered_io():
+    """Allow threads to buffer their own stdout and stderr.
+
+    While active, ``sys.stdout`` and ``sys.stderr`` are replaced with proxies
+    that write to the current thread's buffer when one has been set up with
+    :func:`thread_output_buffer`, and to the original stream otherwise.
+    """
+    original_stdout = sys.stdout
+    original_stderr = sys.stderr
+    if isinstance(original_stdout, _ThreadLocalStream):
+        yield
+        return
+    sys.stdout = _ThreadLocalStream(original_stdout)
+    sys.stderr = _ThreadLocalStream(original_stderr)
+    try:
+        yield
+    finally:
+        sys.stdout = original_stdout
+        sys.stderr = original_stderr
+
+
+@contextlib.contextmanager
+def thread_output_buffer():
+    """Collect this thread's stdout and stderr into a single :class:`StringIO`.
+
+    Must be used inside :func:`thread_buffered_io`.
+    """
+    output = StringIO()
+    streams = [sys.stdout, sys.stderr]
+    for stream in streams:
+        stream.push(output)
+    try:
+        yield output
+    finally:
+        for stream in streams:
+            stream.pop()
+
+
+class _ThreadLocalStream(object):
+    """Text stream proxy that redirects writes to per-thread buffers."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+
+    def push(self, buffer):
+        if not hasattr(self._local, "buffers"):
+            self._local.buffers = []
+        self._local.buffers.append(buffer)
+
+    def pop(self):
+        return self._local.buffers.pop()
+
+    @property
+    def _target(self):
+        buffers = getattr(self._local, "buffers", None)
+        return buffers[-1] if buffers else self._stream
+
+    @property
+    def encoding(self):
+        return getattr(self._stream, "encoding", None) or "utf-8"
+
+    @property
+    def errors(self):
+        return getattr(self._stream, "errors", None) or "strict"
+
+    def write(self, data):
+        return self._target.write(data)
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        self._target.flush()
+
+    def isatty(self):
+        target = self._target
+        return target.isatty() if hasattr(target, "isatty") else False
+
+    def fileno(self):
+        # Raises while a buffer is active, galaxy.util.commands then pipes
+        # subprocess output and writes it here instead of to the real stream.
+        return self._target.fileno()
+
+    def writable(self):
+        return True
+
+
 class _Capturing(list):
     """Function context which captures stdout/stderr
 
@@ -299,8 +391,15 @@ class _Capturing(list):
     def __enter__(self):
         self._stdout = sys.stdout
         self._stderr = sys.stderr
-        sys.stdout = self._stringio_stdout = StringIO()
-        sys.stderr = self._stringio_stderr = StringIO()
+        self._stringio_stdout = StringIO()
+        self._stringio_stderr = StringIO()
+        if isinstance(self._stdout, _ThreadLocalStream):
+            # Other threads are writing too, only capture this thread's output.
+            self._stdout.push(self._stringio_stdout)
+            self._stderr.push(self._stringio_stderr)
+        else:
+            sys.stdout = self._stringio_stdout
+            sys.stderr = self._stringio_stderr
         return self
 
     def __exit__(self, *args):
@@ -309,8 +408,12 @@ class _Capturing(list):
         self.extend([{'logger': 'stderr', 'data': x} for x in
                      self._stringio_stderr.getvalue().splitlines()])
 
-        sys.stdout = self._stdout
-        sys.stderr = self._stderr
+        if isinstance(self._stdout, _ThreadLocalStream):
+            self._stdout.pop()
+            self._stderr.pop()
+        else:
+            sys.stdout = self._stdout
+            sys.stderr = self._stderr
 
 
 def tee_captured_output(output):
@@ -327,10 +430,13 @@ def tee_captured_output(output):
             sys.stderr.write(message['data'] + '\n')
 
 
-def wait_on(function, desc, timeout=5, polling_backoff=0):
+def wait_on(function, desc, timeout=5, polling_backoff=0, backoff_factor=1, max_delta=None, jitter=False):
     """Wait on given function's readiness.
 
-    Grow the polling interval incrementally by the polling_backoff.
+    Grow the polling interval incrementally by the polling_backoff and
+    geometrically by backoff_factor, capped at max_delta if set. If jitter
+    is set, each sleep is randomized so concurrent waiters don't poll in
+    lockstep.
     """
     delta = .25
     timing = 0
@@ -339,11 +445,13 @@ def wait_on(function, desc, timeout=5, polling_backoff=0):
             message = "Timed out waiting on %s." % desc
             raise Exception(message)
         timing += delta
-        delta += polling_backoff
+        delta = delta * backoff_factor + polling_backoff
+        if max_delta is not None:
+            delta = min(delta, max_delta)
         value = function()
         if value is not None:
             return value
-        time.sleep(delta)
+        time.sleep(random.uniform(delta / 2, delta) if jitter else delta)
 
 
 @contextlib.contextmanager
@@ -3,14 +3,16 @@ from __future__ import absolute_import
 
 import os
 
-import requests
 from galaxy.tool_util.lint import LintContext
-from six.moves.urllib.request import urlopen
 
 from planemo.io import error
 from planemo.shed import find_urls_for_xml
+from planemo.url_checks import get_url_checker
 from planemo.xml import validation
 
+# This is from Google Chome on macOS, current at time of writing:
+BROWSER_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_12_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/62.0.3202.75 Safari/537.36"
+
 
 def build_lint_args(ctx, **kwds):
     """Handle common report, error, and skip linting arguments."""
@@ -50,10 +52,20 @@ def handle_lint_complete(lint_ctx, lint_args, failed=False):
 def lint_dois(tool_xml, lint_ctx):
     """Find referenced DOIs and check they have valid with https://doi.org."""
     dois = find_dois_for_xml(tool_xml)
+    prefetch_dois(dois)
     for publication in dois:
         is_doi(publication, lint_ctx)
 
 
+def prefetch_dois(dois):
+    """Start checking DOIs in the background so later :func:`is_doi` calls don't block."""
+    url_checker = get_url_checker()
+    for publication_id in dois:
+        doiless_publication_id = _doiless_publication_id(publication_id)
+        if doiless_publication_id:
+            url_checker.check_doi(doiless_publication_id)
+
+
 def find_dois_for_xml(tool_xml):
     dois = []
     for element in tool_xml.getroot().findall("citations"):
@@ -65,26 +77,33 @@ def find_dois_for_xml(tool_xml):
 
 def is_doi(publication_id, lint_ctx):
     """Check if dx.doi knows about the ``publication_id``."""
-    base_url = "https://doi.org"
     if publication_id is None:
         lint_ctx.error('Empty DOI citation')
         return
     publication_id = publication_id.strip()
-    doiless_publication_id = publication_id.split("doi:", 1)[-1]
+    doiless_publication_id = _doiless_publication_id(publication_id)
     if not doiless_publication_id:
         lint_ctx.error('Empty DOI citation')
         return
-    url = "%s/%s" % (base_url, doiless_publication_id)
-    r = requests.get(url)
-    if r.status_code == 200:
+    result = get_url_checker().check_doi(doiless_publication_id).result()
+    status_code = result["status_code"]
+    if status_code is None:
+        lint_ctx.warn("Failed to check DOI %s: %s" % (publication_id, result["error"]))
+    elif status_code == 200:
         if publication_id != doiless_publication_id:
             lint_ctx.error("%s is valid, but Galaxy expects DOI without 'doi:' prefix" % publication_id)
         else:
             lint_ctx.info("%s is a valid DOI" % publication_id)
-    elif r.status_code == 404:
+    elif status_code == 404:
         lint_ctx.error("%s is not a valid DOI" % publication_id)
     else:
-        lint_ctx.warn("dx.doi returned unexpected status code %d" % r.status_code)
+        lint_ctx.warn("dx.doi returned unexpected status code %d" % status_code)
+
+
+def _doiless_publication_id(publication_id):
+    if publication_id is None:
+        return None
+    return publication_id.strip().split("doi:", 1)[-1]
 
 
 def lint_xsd(lint_ctx, schema_path, path):
@@ -102,44 +121,22 @@ def lint_xsd(lint_ctx, schema_path, path):
 
 def lint_urls(root, lint_ctx):
     """Find referenced URLs and verify they are valid."""
-    urls, docs = find_urls_for_xml(root)
-
-    # This is from Google Chome on macOS, current at time of writing:
-    BROWSER_USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_12_6) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/62.0.3202.75 Safari/537.36"
-
-    def validate_url(url, lint_ctx, user_agent=None):
-        is_valid = True
-        if url.startswith('http://') or url.startswith('https://'):
-            if user_agent:
-                headers = {"User-Agent": user_agent, 'Accept': '*/*'}
-            else:
-                headers = None
-            r = None
-            try:
-                r = requests.get(url, headers=headers, stream=True)
-                r.raise_for_status()
-                next(r.iter_content(1000))
-            except Exception as e:
-                if r and r.status_code == 429:
-                    # too many requests
-                    pass
-                else:
-                    is_valid = False
-                    lint_ctx.error("Error '%s' accessing %s" % (e, url))
-        else:
-            try:
-                with urlopen(url) as handle:
-                    handle.read(100)
-            except Exception as e:
-                is_valid = False
-                lint_ctx.error("Error '%s' accessing %s" % (e, url))
-        if is_valid:
+    futures = prefetch_urls(root)
+    for url, future in futures:
+        result = future.result()
+        if result["ok"]:
             lint_ctx.info("URL OK %s" % url)
+        else:
+            lint_ctx.error("Error '%s' accessing %s" % (result["error"], url))
+
 
-    for url in urls:
-        validate_url(url, lint_ctx)
-    for url in docs:
-        validate_url(url, lint_ctx, BROWSER_USER_AGENT)
+def prefetch_urls(root):
+    """Start checking URLs referenced in ``root``, return a list of ``(url, future)`` pairs."""
+    urls, docs = find_urls_for_xml(root)
+    url_checker = get_url_checker()
+    futures = [(url, url_checker.check_url(url)) for url in urls]
+    futures.extend((url, url_checker.check_url(url, BROWSER_USER_AGENT)) for url in docs)
+    return futures
 
 
 __all__ = (
@@ -148,4 +145,6 @@ __all__ = (
     "lint_dois",
     "lint_urls",
     "lint_xsd",
+    "prefetch_dois",
+    "prefetch_urls",
 )
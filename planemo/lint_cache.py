@@ -0,0 +1,69 @@
+"""Persistent cache of tool lint results keyed on tool content.
+
+Entries are keyed on the contents of a tool file and the macro files it
+imports, the planemo and galaxy-tool-util versions and the active lint
+options. A hit replays the recorded linter output and result without
+loading linters or validating the tool again.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from planemo import __version__ as planemo_version
+from planemo.hashing import content_hash, galaxy_tool_util_version
+
+LINT_CACHE_DIRECTORY = "lint_cache"
+
+
+class LintCache(object):
+    """Record and replay lint results for unchanged tools."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @classmethod
+    def for_context(cls, ctx):
+        return cls(os.path.join(ctx.workspace, LINT_CACHE_DIRECTORY))
+
+    def key(self, tool_path, tool_source, level, skip_types, extra_modules):
+        """Build a cache key for linting ``tool_source`` loaded from ``tool_path``."""
+        macro_paths = getattr(tool_source, "macro_paths", None) or []
+        key_dict = {
+            "tool": content_hash(tool_path),
+            "macros": [content_hash(p) for p in sorted(macro_paths)],
+            "planemo": planemo_version,
+            "galaxy_tool_util": galaxy_tool_util_version(),
+            "level": level,
+            "skip_types": sorted(skip_types or []),
+            "extra_modules": [m.__name__ for m in extra_modules],
+        }
+        return hashlib.sha256(json.dumps(key_dict, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the recorded result for key or None."""
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except ValueError:
+            return None
+
+    def put(self, key, result):
+        """Record a result dictionary (output, found_errors, found_warns) for key."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(result, f)
+        os.rename(temp_path, self._path(key))
+
+    def _path(self, key):
+        return os.path.join(self.directory, "%s.json" % key)
+
+
+__all__ = (
+    "LintCache",
+)
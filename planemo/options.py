@@ -600,6 +600,30 @@ def conda_global_option():
     )
 
 
+def conda_tool_environments_option():
+    return planemo_option(
+        "--tool_environments",
+        is_flag=True,
+        default=False,
+        help=("Install each distinct requirement list found in the target tools "
+              "into the environment Galaxy's Conda dependency resolver would use for "
+              "it, instead of one environment per requirement. Tools sharing "
+              "requirements share a single environment.")
+    )
+
+
+def conda_install_parallelism_option():
+    return planemo_option(
+        "--conda_install_parallelism",
+        type=int,
+        default=1,
+        use_global_config=True,
+        help=("Number of Conda environments to create concurrently with "
+              "--tool_environments. Concurrent creates download packages "
+              "into package caches of their own.")
+    )
+
+
 def required_tool_arg(allow_uris=False):
     """ Decorate click method as requiring the path to a single tool.
     """
@@ -1011,11 +1035,24 @@ def shed_check_diff_option():
     )
 
 
+def shed_skip_unchanged_option():
+    return planemo_option(
+        "--skip_unchanged",
+        is_flag=True,
+        help=("Skip uploading repositories whose realized contents and "
+              ".shed.yml metadata are unchanged since planemo last uploaded "
+              "them to the target tool shed (recorded in planemo's workspace).")
+    )
+
+
 def shed_upload_options():
     return _compose(
         shed_message_option(),
         shed_force_create_option(),
         shed_check_diff_option(),
+        shed_skip_unchanged_option(),
+        shed_compression_level_option(),
+        shed_stream_upload_option(),
     )
 
 
@@ -1024,6 +1061,7 @@ def shed_realization_options():
         shed_project_arg(multiple=True),
         recursive_shed_option(),
         shed_fail_fast_option(),
+        shed_parallelism_option(),
     )
 
 
@@ -1108,6 +1146,21 @@ def galaxy_config_options():
         shed_tools_conf_option(),
         shed_tools_directory_option(),
         single_user_mode_option(),
+        warm_galaxy_option(),
+    )
+
+
+def warm_galaxy_option():
+    return planemo_option(
+        "--warm_galaxy",
+        type=str,
+        default=None,
+        use_global_config=True,
+        help=("Name of a long-lived Galaxy daemon to reuse. If no Galaxy with this "
+              "name is running one is started and left running, later invocations "
+              "with the same name attach to it and hot-load their tools instead "
+              "of installing and starting a new Galaxy. Stop it by killing the "
+              "process in its pid file."),
     )
 
 
@@ -1313,6 +1366,43 @@ def shed_fail_fast_option():
     )
 
 
+def shed_compression_level_option():
+    return planemo_option(
+        "--compression_level",
+        "--compression-level",
+        type=click.IntRange(0, 9),
+        default=9,
+        use_global_config=True,
+        help="gzip compression level (0-9) used when building repository "
+             "tarballs, lower levels trade upload size for speed."
+    )
+
+
+def shed_stream_upload_option():
+    return planemo_option(
+        "--stream_upload/--no_stream_upload",
+        is_flag=True,
+        default=True,
+        use_global_config=True,
+        help="Stream repository tarballs to the Tool Shed as they are built using "
+             "a chunked request body. The Tool Shed (and any proxy in front of it) "
+             "must accept chunked request bodies - if the streamed upload fails it "
+             "is retried from a temporary file, --no_stream_upload always uploads "
+             "from a temporary file."
+    )
+
+
+def shed_parallelism_option():
+    return planemo_option(
+        "--shed_parallelism",
+        type=int,
+        default=1,
+        use_global_config=True,
+        help="Number of repositories to process concurrently. Output for each "
+             "repository is buffered and printed as a block, in order."
+    )
+
+
 def lint_xsd_option():
     return planemo_option(
         "--xsd/--no_xsd",
@@ -1322,6 +1412,30 @@ def lint_xsd_option():
     )
 
 
+def lint_parallelism_option():
+    return planemo_option(
+        "--lint_parallelism",
+        type=int,
+        default=1,
+        use_global_config=True,
+        help=("Number of worker processes used to load and lint tools. Output is "
+              "still reported in the order tools are found."),
+    )
+
+
+def lint_cache_option():
+    return planemo_option(
+        "--lint_cache/--no_lint_cache",
+        is_flag=True,
+        default=False,
+        use_global_config=True,
+        help=("Cache tool lint results in the planemo workspace and replay them for "
+              "tools whose contents, macros and lint options have not changed. "
+              "Results are not cached when linters checking remote resources "
+              "(URLs, DOIs, Conda, BioContainers) are enabled."),
+    )
+
+
 def report_level_option():
     return planemo_option(
         "--report_level",
@@ -1416,6 +1530,31 @@ def engine_options():
         galaxy_url_option(),
         galaxy_admin_key_option(),
         galaxy_user_key_option(),
+        download_concurrency_option(),
+        upload_cache_option(),
+    )
+
+
+def download_concurrency_option():
+    return planemo_option(
+        "--download_concurrency",
+        type=int,
+        default=4,
+        use_global_config=True,
+        help=("Maximum number of Galaxy outputs (including collection elements) "
+              "to download concurrently when collecting results."),
+    )
+
+
+def upload_cache_option():
+    return planemo_option(
+        "--upload_cache",
+        is_flag=True,
+        default=False,
+        use_global_config=True,
+        help=("Cache test inputs uploaded to Galaxy (keyed by file contents and "
+              "Galaxy URL) in Planemo's workspace and copy the existing datasets "
+              "into new histories instead of uploading the same files again."),
     )
 
 
@@ -1632,6 +1771,17 @@ def ci_chunk_count_option():
     )
 
 
+def ci_chunk_durations_option():
+    return planemo_option(
+        "--chunk_durations",
+        type=click.Path(exists=True, file_okay=True, dir_okay=False, resolve_path=True),
+        multiple=True,
+        help=("tool_test_output.json files from previous test runs, or JSON files "
+              "mapping tool or repository paths (or tool ids) to seconds, used to "
+              "balance --chunk_count chunks by expected runtime instead of by count."),
+    )
+
+
 def ci_group_tools_option():
     return planemo_option(
         "--group_tools",
@@ -1665,6 +1815,7 @@ def ci_find_options():
         filter_changed_in_commit_option(),
         ci_chunk_count_option(),
         ci_chunk_option(),
+        ci_chunk_durations_option(),
         ci_output_option(),
     )
 
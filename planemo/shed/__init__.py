@@ -2,6 +2,8 @@
 import contextlib
 import copy
 import fnmatch
+import functools
+import gzip
 import hashlib
 import json
 import os
@@ -9,7 +11,10 @@ import re
 import shutil
 import sys
 import tarfile
+import threading
+import weakref
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import (
     mkstemp,
 )
@@ -33,6 +38,8 @@ from planemo.io import (
     info,
     shell,
     temp_directory,
+    thread_buffered_io,
+    thread_output_buffer,
     warn,
 )
 from planemo.shed2tap.base import BasePackage
@@ -43,8 +50,10 @@ from .interface import (
     download_tar,
     find_category_ids,
     find_repository,
+    invalidate_repositories,
     latest_installable_revision,
     tool_shed_instance,
+    update_repository_from_stream,
     username,
 )
 
@@ -70,6 +79,11 @@ REALIZAION_PROBLEMS_MESSAGE = ("Problem encountered executing action for one or
 INCORRECT_OWNER_MESSAGE = ("Attempting to create a repository with configured "
                            "owner [%s] that does not match API user [%s].")
 PROBLEM_PROCESSING_REPOSITORY_MESSAGE = "Problem processing repositories, exiting."
+DEFAULT_COMPRESSION_LEVEL = 9
+SHED_FINGERPRINTS_DIRECTORY = "shed_fingerprints"
+GIT_CLONES_DIRECTORY = "git_clones"
+GIT_CLONE_PARALLELISM = 4
+FINGERPRINT_CHUNK_SIZE = 1024 * 1024
 
 # Planemo generated or consumed files that do not need to be uploaded to the
 # tool shed.
@@ -176,6 +190,10 @@ yaml.SafeLoader.add_constructor(u'tag:yaml.org,2002:str', construct_yaml_str)
 
 
 _ShedContext = namedtuple("ShedContext", ["tsi", "shed_config", "config_owner"])
+_shed_instances = weakref.WeakKeyDictionary()
+_shed_instances_lock = threading.Lock()
+_git_checkouts = weakref.WeakKeyDictionary()
+_git_checkouts_lock = threading.Lock()
 
 
 class ShedContext(_ShedContext):
@@ -288,11 +306,14 @@ def upload_repository(ctx, realized_repository, **kwds):
     """Upload a tool directory as a tarball to a tool shed."""
     path = realized_repository.path
     tar_path = kwds.get("tar")
-    if not tar_path:
-        tar_path = build_tarball(path, **kwds)
     if kwds.get("tar_only", False):
         name = realized_repository.pattern_to_file_name("shed_upload.tar.gz")
-        shutil.copy(tar_path, name)
+        if tar_path:
+            shutil.copy(tar_path, name)
+        else:
+            with open(name, "wb") as f:
+                for chunk in stream_tarball(path, **kwds):
+                    f.write(chunk)
         return 0
     shed_context = get_shed_context(ctx, **kwds)
     update_kwds = {}
@@ -303,6 +324,12 @@ def upload_repository(ctx, realized_repository, **kwds):
     if repo_id is None:
         return report_non_existent_repository(realized_repository)
 
+    fingerprint = _upload_fingerprint(realized_repository, **kwds)
+    if fingerprint and _fingerprint_unchanged(ctx, shed_context, repo_id, fingerprint):
+        name = realized_repository.name
+        info("Repository [%s] unchanged since last upload, skipping upload." % name)
+        return 0
+
     if kwds.get("check_diff", False):
         is_diff = diff_repo(ctx, realized_repository, **kwds) != 0
         if not is_diff:
@@ -312,22 +339,108 @@ def upload_repository(ctx, realized_repository, **kwds):
 
     # TODO: support updating repo information if it changes in the config file
     try:
-        shed_context.tsi.repositories.update_repository(
-            str(repo_id), tar_path, **update_kwds
-        )
+        _update_repository(shed_context, repo_id, path, tar_path, update_kwds, **kwds)
     except Exception as e:
-        if isinstance(e, bioblend.ConnectionError) and e.status_code == 400 and \
-                '"No changes to repository."' in e.body:
+        if _is_no_changes_error(e):
             warn("Repository %s was not updated because there were no changes" % realized_repository.name)
+            _record_fingerprint(ctx, shed_context, repo_id, fingerprint)
             return 0
         message = api_exception_to_message(e)
         error("Could not update %s" % realized_repository.name)
         error(message)
         return -1
     info("Repository %s updated successfully." % realized_repository.name)
+    _record_fingerprint(ctx, shed_context, repo_id, fingerprint)
     return 0
 
 
+def _update_repository(shed_context, repo_id, path, tar_path, update_kwds, **kwds):
+    if tar_path:
+        shed_context.tsi.repositories.update_repository(str(repo_id), tar_path, **update_kwds)
+        return
+    if kwds.get("stream_upload", True):
+        try:
+            update_repository_from_stream(
+                shed_context.tsi, str(repo_id), stream_tarball(path, **kwds), **update_kwds
+            )
+            return
+        except Exception as e:
+            if _is_no_changes_error(e):
+                raise
+            # The streamed body is sent with chunked transfer encoding, which
+            # some WSGI deployments read as empty - retry with a sized upload.
+            warn("Streamed upload failed (%s), retrying with a temporary tarball." % api_exception_to_message(e))
+    tar_path = build_tarball(path, **kwds)
+    try:
+        shed_context.tsi.repositories.update_repository(str(repo_id), tar_path, **update_kwds)
+    finally:
+        os.remove(tar_path)
+
+
+def _is_no_changes_error(e):
+    return isinstance(e, bioblend.ConnectionError) and e.status_code == 400 and \
+        '"No changes to repository."' in e.body
+
+
+def _upload_fingerprint(realized_repository, **kwds):
+    # A supplied --tar is uploaded as is, the realized contents don't describe it.
+    if not kwds.get("skip_unchanged", False) or kwds.get("tar"):
+        return None
+    return realized_repository.fingerprint()
+
+
+def _fingerprint_unchanged(ctx, shed_context, repo_id, fingerprint):
+    record_path = _fingerprint_record_path(ctx, shed_context, repo_id)
+    if not os.path.exists(record_path):
+        return False
+    try:
+        with open(record_path, "r") as f:
+            record = json.load(f)
+    except ValueError:
+        return False
+    if record.get("fingerprint") != fingerprint:
+        return False
+    # Someone else may have uploaded to the repository since planemo did.
+    recorded_revision = record.get("revision")
+    if recorded_revision is not None:
+        revision = _latest_revision_or_none(ctx, shed_context, repo_id)
+        if revision is not None and revision != recorded_revision:
+            ctx.vlog("Tool shed revision changed from %s to %s since last upload." % (recorded_revision, revision))
+            return False
+    return True
+
+
+def _record_fingerprint(ctx, shed_context, repo_id, fingerprint):
+    if fingerprint is None:
+        return
+    record_path = _fingerprint_record_path(ctx, shed_context, repo_id)
+    directory = os.path.dirname(record_path)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    record = {
+        "fingerprint": fingerprint,
+        "revision": _latest_revision_or_none(ctx, shed_context, repo_id),
+    }
+    fd, temp_path = mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(record, f)
+    os.rename(temp_path, record_path)
+
+
+def _fingerprint_record_path(ctx, shed_context, repo_id):
+    key = "%s|%s" % (shed_context.tsi.base_url, repo_id)
+    name = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(ctx.workspace, SHED_FINGERPRINTS_DIRECTORY, "%s.json" % name)
+
+
+def _latest_revision_or_none(ctx, shed_context, repo_id):
+    try:
+        return latest_installable_revision(shed_context.tsi, str(repo_id))
+    except Exception as e:
+        ctx.vlog("Could not determine latest installable revision: %s" % unicodify(e))
+        return None
+
+
 def _update_commit_message(ctx, realized_repository, update_kwds, **kwds):
     message = kwds.get("message")
     git_rev = realized_repository.git_rev(ctx)
@@ -404,13 +517,14 @@ def _diff_in(ctx, working, realized_repository, **kwds):
 
     output = kwds.get("output")
     raw = kwds.get("raw", False)
+    full = kwds.get("full_report", False)
     xml_diff = 0
     if not raw:
         if output:
             with open(output, "w") as f:
-                xml_diff = diff_and_remove(working, label_a, label_b, f)
+                xml_diff = diff_and_remove(working, label_a, label_b, f, full=full)
         else:
-            xml_diff = diff_and_remove(working, label_a, label_b, sys.stdout)
+            xml_diff = diff_and_remove(working, label_a, label_b, sys.stdout, full=full)
 
     cmd = ['diff', '-r', label_a, label_b]
     if output:
@@ -463,11 +577,24 @@ def get_shed_context(ctx=None, **kwds):
         email = prop("email")
         password = prop("password")
 
-    tsi = tool_shed_instance(url, key, email, password)
+    tsi = _tool_shed_instance_for(ctx, url, key, email, password)
     owner = username
     return ShedContext(tsi, shed_config, owner)
 
 
+def _tool_shed_instance_for(ctx, url, key, email, password):
+    # Share one instance (and so its cached listings) per command invocation
+    # rather than building a new one for every repository.
+    if ctx is None:
+        return tool_shed_instance(url, key, email, password)
+    instance_key = (url, key, email, password)
+    with _shed_instances_lock:
+        instances = _shed_instances.setdefault(ctx, {})
+        if instance_key not in instances:
+            instances[instance_key] = tool_shed_instance(url, key, email, password)
+        return instances[instance_key]
+
+
 def tool_shed_url(ctx, **kwds):
     shed_config, _ = _shed_config_and_username(ctx, **kwds)
     return _shed_config_to_url(shed_config)
@@ -697,6 +824,7 @@ def create_repository_for(ctx, tsi, name, repo_config):
         homepage_url=homepage_url,
         category_ids=category_ids
     )
+    invalidate_repositories(tsi)
     return repo
 
 
@@ -725,6 +853,22 @@ def build_tarball(realized_path, **kwds):
     """Build a tool-shed tar ball for the specified path, caller is
     responsible for deleting this file.
     """
+    fd, temp_path = mkstemp()
+    with os.fdopen(fd, "wb") as f:
+        for chunk in stream_tarball(realized_path, **kwds):
+            f.write(chunk)
+    return temp_path
+
+
+def stream_tarball(realized_path, **kwds):
+    """Generate a gzipped tool-shed tar ball for the specified path as byte chunks.
+
+    Members are added in sorted order and the gzip header carries no
+    timestamp, so the same content always produces the same bytes.
+    """
+    compression_level = kwds.get("compression_level")
+    if compression_level is None:
+        compression_level = DEFAULT_COMPRESSION_LEVEL
 
     # Simplest solution to sorting the files is to use a list,
     files = []
@@ -733,18 +877,39 @@ def build_tarball(realized_path, **kwds):
             files.append(os.path.join(dirpath, f))
     files.sort()
 
-    fd, temp_path = mkstemp()
+    sink = _ChunkSink()
+    gz = gzip.GzipFile(filename="", mode="wb", fileobj=sink, compresslevel=compression_level, mtime=0)
+    tar = tarfile.open(fileobj=gz, mode="w|", dereference=True)
     try:
-        tar = tarfile.open(temp_path, "w:gz", dereference=True)
-        try:
-            for raw in files:
-                name = os.path.relpath(raw, realized_path)
-                tar.add(os.path.join(realized_path, name), arcname=name)
-        finally:
-            tar.close()
+        for raw in files:
+            name = os.path.relpath(raw, realized_path)
+            tar.add(os.path.join(realized_path, name), arcname=name)
+            for chunk in sink.drain():
+                yield chunk
     finally:
-        os.close(fd)
-    return temp_path
+        tar.close()
+        gz.close()
+    for chunk in sink.drain():
+        yield chunk
+
+
+class _ChunkSink(object):
+    """Write-only file object collecting bytes for :func:`stream_tarball` to yield."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        if data:
+            self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self._chunks = self._chunks, []
+        return chunks
 
 
 def find_raw_repositories(ctx, paths, **kwds):
@@ -756,6 +921,10 @@ def find_raw_repositories(ctx, paths, **kwds):
 
 
 def for_each_repository(ctx, function, paths, **kwds):
+    parallelism = kwds.get("shed_parallelism") or 1
+    if parallelism > 1:
+        return _for_each_repository_in_parallel(ctx, function, paths, parallelism, **kwds)
+    _prefetch_git_paths(ctx, paths)
     ret_codes = []
     for path in paths:
         with _path_on_disk(ctx, path) as raw_path:
@@ -773,6 +942,50 @@ def for_each_repository(ctx, function, paths, **kwds):
     return coalesce_return_codes(ret_codes)
 
 
+def _for_each_repository_in_parallel(ctx, function, paths, parallelism, **kwds):
+    """Apply function to realized repositories on a bounded pool of threads.
+
+    Repositories of all paths are submitted before any is waited on. Output
+    of each repository is buffered and written out as a block, in the order
+    repositories were realized.
+    """
+    _prefetch_git_paths(ctx, paths)
+    ret_codes = []
+
+    def buffered_function(realized_repository):
+        with thread_output_buffer() as output:
+            ret_code = function(realized_repository)
+        return ret_code, output.getvalue()
+
+    # Realized repositories live in a base_dir per path, the stack removes
+    # them only after the executor has finished every future.
+    with contextlib.ExitStack() as stack, thread_buffered_io(), \
+            ThreadPoolExecutor(max_workers=parallelism) as executor:
+        futures = []
+        realization_failed = False
+        for path in paths:
+            raw_path = stack.enter_context(_path_on_disk(ctx, path))
+            base_dir = stack.enter_context(temp_directory())
+            try:
+                for realized_repository in _realize_repositories_in(
+                    ctx, raw_path, base_dir, **kwds
+                ):
+                    futures.append(executor.submit(buffered_function, realized_repository))
+            except RealizationException:
+                realization_failed = True
+                break
+        for future in futures:
+            ret_code, output = future.result()
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            ret_codes.append(ret_code)
+    if realization_failed:
+        error(REALIZAION_PROBLEMS_MESSAGE)
+        return 254
+
+    return coalesce_return_codes(ret_codes)
+
+
 def path_to_repo_name(path):
     return os.path.basename(os.path.abspath(path))
 
@@ -809,26 +1022,32 @@ def _realize_effective_repositories(ctx, path, **kwds):
     code repository but are published to the tool shed as one repository per
     tool).
     """
+    with temp_directory() as base_dir:
+        for realized_repo in _realize_repositories_in(ctx, path, base_dir, **kwds):
+            yield realized_repo
+
+
+def _realize_repositories_in(ctx, path, base_dir, **kwds):
+    """Realize repositories for path into existing directory ``base_dir``."""
     raw_repo_objects = _find_raw_repositories(ctx, path, **kwds)
     failed = False
-    with temp_directory() as base_dir:
-        for raw_repo_object in raw_repo_objects:
-            if isinstance(raw_repo_object, Exception):
-                _handle_realization_error(raw_repo_object, **kwds)
+    for raw_repo_object in raw_repo_objects:
+        if isinstance(raw_repo_object, Exception):
+            _handle_realization_error(raw_repo_object, **kwds)
+            failed = True
+            continue
+
+        realized_repos = raw_repo_object.realizations(
+            ctx,
+            base_dir,
+            **kwds
+        )
+        for realized_repo in realized_repos:
+            if isinstance(realized_repo, Exception):
+                _handle_realization_error(realized_repo, **kwds)
                 failed = True
                 continue
-
-            realized_repos = raw_repo_object.realizations(
-                ctx,
-                base_dir,
-                **kwds
-            )
-            for realized_repo in realized_repos:
-                if isinstance(realized_repo, Exception):
-                    _handle_realization_error(realized_repo, **kwds)
-                    failed = True
-                    continue
-                yield realized_repo
+            yield realized_repo
     if failed:
         raise RealizationException()
 
@@ -896,17 +1115,56 @@ def _parse_repos_from_workflow(path):
 
 @contextlib.contextmanager
 def _path_on_disk(ctx, path):
-    git_path = None
-    if path.startswith("git:"):
-        git_path = path
-    elif path.startswith("git+"):
-        git_path = path[len("git+"):]
+    git_path = _git_path(path)
     if git_path is None:
         yield path
     else:
-        with temp_directory() as git_repo:
-            git.clone(ctx, git_path, git_repo)
-            yield git_repo
+        yield _git_checkout(ctx, git_path)
+
+
+def _git_path(path):
+    if path.startswith("git:"):
+        return path
+    elif path.startswith("git+"):
+        return path[len("git+"):]
+    return None
+
+
+def _prefetch_git_paths(ctx, paths):
+    """Check out all git sources in ``paths`` concurrently ahead of processing them."""
+    git_paths = set(filter(None, map(_git_path, paths)))
+    if len(git_paths) < 2:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(git_paths), GIT_CLONE_PARALLELISM)) as executor:
+        for future in [executor.submit(_git_checkout, ctx, p) for p in git_paths]:
+            try:
+                future.result()
+            except Exception as e:
+                # Reported again when the path itself is processed.
+                ctx.vlog("Failed to check out git source: %s" % unicodify(e))
+
+
+def _git_checkout(ctx, git_path):
+    """Return a shallow checkout of ``git_path`` cached in the planemo workspace.
+
+    ``git_path`` may end with ``#<revision>`` (a branch, tag or commit) and
+    defaults to the remote ``HEAD``. Checkouts are keyed on source and
+    revision and brought up to date with a shallow fetch once per command.
+    """
+    url, _, revision = git_path.partition("#")
+    if os.path.exists(url):
+        url = os.path.abspath(url)
+    revision = revision or "HEAD"
+    key = hashlib.sha256(("%s#%s" % (url, revision)).encode("utf-8")).hexdigest()[:16]
+    checkout_path = os.path.join(ctx.workspace, GIT_CLONES_DIRECTORY, key)
+    with _git_checkouts_lock:
+        checkouts = _git_checkouts.setdefault(ctx, {})
+        checkout = checkouts.setdefault(key, {"lock": threading.Lock(), "updated": False})
+    with checkout["lock"]:
+        if not checkout["updated"]:
+            git.checkout_shallow(ctx, url, checkout_path, revision)
+            checkout["updated"] = True
+    return checkout_path
 
 
 def _find_raw_repositories(ctx, path, **kwds):
@@ -996,6 +1254,8 @@ class RawRepositoryDirectory(object):
         self.name = config["name"]
         self.type = shed_repo_type(config, self.name)
         self.multiple = multiple  # operation over many repos?
+        self._glob_cache = {}
+        self._globber = glob.IndexedGlobber()
 
     def _hash(self, name):
         return hashlib.md5(name.encode('utf-8')).hexdigest()
@@ -1021,9 +1281,10 @@ class RawRepositoryDirectory(object):
 
         excludes = _shed_config_excludes(config)
         for exclude in excludes:
-            ignore_list.extend(_glob(self.path, exclude))
+            ignore_list.extend(self._glob(exclude))
+        ignore_set = set(ignore_list)
 
-        realized_files = self._realized_files(name)
+        realized_files = self._realized_files(name, config)
         missing = realized_files.include_failures
         if missing and fail_on_missing:
             msg = "Failed to include files for %s" % missing
@@ -1032,7 +1293,7 @@ class RawRepositoryDirectory(object):
         for realized_file in realized_files.files:
             relative_dest = realized_file.dest
             implicit_ignore = self._implicit_ignores(relative_dest)
-            explicit_ignore = (realized_file.absolute_src in ignore_list)
+            explicit_ignore = (realized_file.absolute_src in ignore_set)
             if implicit_ignore or explicit_ignore:
                 continue
             realized_file.realize_to(directory)
@@ -1053,8 +1314,9 @@ class RawRepositoryDirectory(object):
     def _repo_names(self):
         return self.config.get("repositories").keys()
 
-    def _realized_files(self, name):
-        config = self._realize_config(name)
+    def _realized_files(self, name, config=None):
+        if config is None:
+            config = self._realize_config(name)
         realized_files = []
         missing = []
         for include_info in config["include"]:
@@ -1068,7 +1330,7 @@ class RawRepositoryDirectory(object):
             for source in source_list:
                 include = include_info.copy()
                 include["source"] = source
-                included = RealizedFile.realized_files_for(self.path, include)
+                included = RealizedFile.realized_files_for(self.path, include, glob_function=self._glob)
                 if not included:
                     missing.append(include)
                 else:
@@ -1076,14 +1338,26 @@ class RawRepositoryDirectory(object):
         return RealizedFiles(realized_files, missing)
 
     def _realize_config(self, name):
-        config = copy.deepcopy(self.config)
+        # Only copy the shared settings and this repository's entry - with
+        # auto_tool_repositories the full repositories mapping grows
+        # quadratically with the number of tools.
+        config = copy.deepcopy(dict((k, v) for k, v in self.config.items() if k != "repositories"))
         config["name"] = name
-        repo_config = config.get("repositories", {}).get(name, {})
-        config.update(repo_config)
-        if "repositories" in config:
-            del config["repositories"]
+        repo_config = self.config.get("repositories", {}).get(name, {})
+        config.update(copy.deepcopy(repo_config))
         return config
 
+    def _glob(self, pattern):
+        """Glob pattern relative to this directory, once per pattern.
+
+        Patterns are answered from an index built while walking the
+        directory, so overlapping patterns don't list the same directories
+        again.
+        """
+        if pattern not in self._glob_cache:
+            self._glob_cache[pattern] = _glob(self.path, pattern, globber=self._globber)
+        return self._glob_cache[pattern]
+
     def _implicit_ignores(self, relative_path):
         # Filter out "unwanted files" :) like READMEs for special
         # repository types.
@@ -1150,7 +1424,9 @@ class RealizedFile(object):
                 os.symlink(source_path, target_path)
 
     @staticmethod
-    def realized_files_for(path, include_info):
+    def realized_files_for(path, include_info, glob_function=None):
+        if glob_function is None:
+            glob_function = functools.partial(_glob, path)
         if not isinstance(include_info, dict):
             include_info = {"source": include_info}
         source = include_info.get("source")
@@ -1165,7 +1441,7 @@ class RealizedFile(object):
             if "*" in source or "?" in source or os.path.isdir(abs_source):
                 raise ValueError("destination must be a directory (with trailing slash) if source is a folder or uses wildcards")
         realized_files = []
-        for globbed_file in _glob(path, source):
+        for globbed_file in glob_function(source):
             src = os.path.relpath(globbed_file, path)
             if not destination.endswith("/"):
                 # Given a filename, just use it!
@@ -1229,6 +1505,28 @@ class RealizedRepositry(object):
     def tool_dependencies_path(self):
         return os.path.join(self.path, TOOL_DEPENDENCIES_CONFIG_NAME)
 
+    def fingerprint(self):
+        """Return a stable digest of the realized contents and ``.shed.yml`` metadata.
+
+        Only the file names and contents that would be uploaded and the
+        repository configuration contribute, so repositories realized again
+        from unchanged sources yield the same fingerprint.
+        """
+        files = []
+        for dirpath, dirnames, filenames in os.walk(self.path):
+            for f in filenames:
+                files.append(os.path.join(dirpath, f))
+        checksum = hashlib.sha256()
+        checksum.update(json.dumps(self.config, sort_keys=True, default=str).encode("utf-8"))
+        for path in sorted(files):
+            file_checksum = hashlib.sha256()
+            with open(path, "rb") as fh:
+                for chunk in iter(lambda: fh.read(FINGERPRINT_CHUNK_SIZE), b""):
+                    file_checksum.update(chunk)
+            name = os.path.relpath(path, self.path)
+            checksum.update(("%s\0%s\0" % (name, file_checksum.hexdigest())).encode("utf-8"))
+        return checksum.hexdigest()
+
     def git_rev(self, ctx):
         return git.rev_if_git(ctx, self.real_path)
 
@@ -1332,11 +1630,15 @@ class RealizedRepositry(object):
         )
 
 
-def _glob(path, pattern):
+def _glob(path, pattern, globber=None):
     pattern = os.path.join(path, pattern)
-    if os.path.isdir(pattern):
+    if globber is None:
+        isdir, glob_function = os.path.isdir, glob.glob
+    else:
+        isdir, glob_function = globber.isdir, globber.glob
+    if isdir(pattern):
         pattern = "%s/**" % pattern
-    return glob.glob(pattern)
+    return glob_function(pattern)
 
 
 def _shed_config_excludes(config):
@@ -5,6 +5,7 @@ is beneficial to ignore.
 """
 from __future__ import print_function
 
+import filecmp
 import os
 import sys
 from xml.etree import ElementTree
@@ -12,11 +13,12 @@ from xml.etree import ElementTree
 from planemo.xml import diff
 
 
-def diff_and_remove(working, label_a, label_b, f):
+def diff_and_remove(working, label_a, label_b, f, full=False):
     """Remove tool shed XML files and use a smart XML diff on them.
 
     Return 0 if and only if the XML content is the sam after stripping
-    attirbutes the tool shed updates.
+    attirbutes the tool shed updates. If ``full`` is set, every difference
+    is reported instead of only the first one in each file.
     """
     assert label_a != label_b
     special = ["tool_dependencies.xml", "repository_dependencies.xml"]
@@ -29,23 +31,26 @@ def diff_and_remove(working, label_a, label_b, f):
                 b = os.path.join(working, label_b, os.path.relpath(a, os.path.join(working, label_a)))
                 files_exist = os.path.exists(a) and os.path.exists(b)
                 if files_exist:
-                    deps_diff |= _shed_diff(a, b, f)
+                    deps_diff |= _shed_diff(a, b, f, full=full)
                     os.remove(a)
                     os.remove(b)
     return deps_diff
 
 
-def _shed_diff(file_a, file_b, f=sys.stdout):
+def _shed_diff(file_a, file_b, f=sys.stdout, full=False):
     """Strip attributes the tool shed writes and do smart XML diff.
 
     Returns 0 if and only if the XML content is the same after stripping
     ``tool_shed`` and ``changeset_revision`` attributes.
     """
+    if filecmp.cmp(file_a, file_b, shallow=False):
+        # Byte for byte identical, no need to parse either file.
+        return 0
     xml_a = ElementTree.parse(file_a).getroot()
     xml_b = ElementTree.parse(file_b).getroot()
     _strip_shed_attributes(xml_a)
     _strip_shed_attributes(xml_b)
-    return diff.diff(xml_a, xml_b, reporter=f.write)
+    return diff.diff(xml_a, xml_b, reporter=f.write, full=full)
 
 
 def _strip_shed_attributes(xml_element):
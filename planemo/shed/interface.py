@@ -1,19 +1,47 @@
 """Interface over bioblend and direct access to ToolShed API via requests."""
 
 import json
+import os
+import tarfile
+import threading
+import time
+import uuid
+import weakref
 
+import requests
 from galaxy.util import unicodify
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import (
+    ProtocolError,
+    ReadTimeoutError,
+)
 
 from planemo.bioblend import (
     ensure_module,
     toolshed,
 )
-from planemo.io import untar_to
 
 REPOSITORY_DOWNLOAD_TEMPLATE = (
     "%srepository/download?repository_id=%s"
     "&changeset_revision=default&file_type=gz"
 )
+# Maximum number of simultaneous connections to a tool shed.
+MAX_CONNECTIONS = 8
+DOWNLOAD_ATTEMPTS = 5
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PARTIAL_DOWNLOAD_SUFFIX = ".part"
+TRANSIENT_DOWNLOAD_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    ProtocolError,
+    ReadTimeoutError,
+)
+
+_session = None
+_session_lock = threading.Lock()
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
 
 
 def tool_shed_instance(url, key, email, password):
@@ -31,16 +59,40 @@ def find_repository(tsi, owner, name):
     """ Find repository information for given owner and repository
     name.
     """
-    repos = tsi.repositories.get_repositories()
+    return find_repositories(tsi, [(owner, name)])[(owner, name)]
 
-    def matches(r):
-        return r["owner"] == owner and r["name"] == name
 
-    matching_repos = list(filter(matches, repos))
-    if not matching_repos:
-        return None
-    else:
-        return matching_repos[0]
+def find_repositories(tsi, owner_name_pairs):
+    """Find repository information for many (owner, name) pairs at once.
+
+    Repositories are looked up in a single listing per owner, cached for
+    the lifetime of ``tsi``. Pairs without a matching repository map to
+    ``None``.
+    """
+    found = {}
+    for owner, name in owner_name_pairs:
+        matching_repos = [r for r in owner_repositories(tsi, owner) if r["name"] == name]
+        found[(owner, name)] = matching_repos[0] if matching_repos else None
+    return found
+
+
+def owner_repositories(tsi, owner):
+    """Return the (cached) list of repositories belonging to ``owner``."""
+    def fetch():
+        params = {"owner": owner} if owner else None
+        repos = _get_json(tsi, "/repositories", params=params)
+        # The owner filter is only a hint, older tool sheds ignore it.
+        return [r for r in repos if r["owner"] == owner]
+
+    return _cached(tsi, ("repositories", owner), fetch)
+
+
+def invalidate_repositories(tsi):
+    """Forget cached repository listings (e.g. after creating a repository)."""
+    cache = _cache_for(tsi)
+    with cache["lock"]:
+        for key in [k for k in cache["values"] if k[0] == "repositories"]:
+            del cache["values"][key]
 
 
 def latest_installable_revision(tsi, repository_id):
@@ -87,7 +139,7 @@ def api_exception_to_message(e):
 def find_category_ids(tsi, categories):
     """ Translate human readable category names into their associated IDs.
     """
-    category_list = tsi.categories.get_categories()
+    category_list = _cached(tsi, ("categories",), lambda: _get_json(tsi, "/categories"))
 
     category_ids = []
     for cat in categories:
@@ -105,10 +157,155 @@ def download_tar(tsi, repo_id, destination, to_directory):
         base_url += "/"
     download_url = REPOSITORY_DOWNLOAD_TEMPLATE % (base_url, repo_id)
     if to_directory:
-        tar_args = ['-xzf', '-', '--strip-components=1']
-        untar_to(download_url, tar_args=tar_args, dest_dir=destination)
+        _with_retries(lambda: _extract_tar_stream(tsi, download_url, destination, strip_components=1))
     else:
-        untar_to(download_url, path=destination)
+        download_resumable(tsi, download_url, destination)
+
+
+def download_resumable(tsi, url, path):
+    """Download a gzipped tarball from ``url`` to ``path``.
+
+    Data is written to ``path`` + ``.part`` first. Interrupted transfers
+    (including ones from earlier runs) continue from the end of that file
+    using HTTP Range requests when the server supports them. The result is
+    only moved into place once it reads back as a complete tarball.
+    """
+    partial_path = path + PARTIAL_DOWNLOAD_SUFFIX
+
+    def attempt():
+        offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = {"Range": "bytes=%d-" % offset} if offset else {}
+        r = _get_session().get(url, headers=headers, stream=True, verify=tsi.verify, timeout=tsi.timeout)
+        try:
+            if r.status_code == 416:
+                # Nothing left to fetch past offset.
+                return
+            r.raise_for_status()
+            mode = "ab" if r.status_code == 206 else "wb"
+            with open(partial_path, mode) as f:
+                # Keep the bytes as sent, some servers label .tar.gz as gzip encoded.
+                for chunk in r.raw.stream(DOWNLOAD_CHUNK_SIZE, decode_content=False):
+                    f.write(chunk)
+        finally:
+            r.close()
+
+    _with_retries(attempt)
+    try:
+        with tarfile.open(partial_path, "r:gz") as tar:
+            for _ in tar:
+                pass
+    except (tarfile.TarError, EOFError, OSError) as e:
+        os.remove(partial_path)
+        raise Exception("Downloaded tarball from %s is corrupt: %s" % (url, unicodify(e)))
+    os.rename(partial_path, path)
+
+
+def _extract_tar_stream(tsi, url, destination, strip_components=0):
+    """Extract a gzipped tarball into ``destination`` while it downloads."""
+    if not os.path.exists(destination):
+        os.makedirs(destination)
+    r = _get_session().get(url, stream=True, verify=tsi.verify, timeout=tsi.timeout)
+    try:
+        r.raise_for_status()
+        r.raw.decode_content = False
+        with tarfile.open(fileobj=r.raw, mode="r|gz") as tar:
+            for member in tar:
+                parts = [p for p in member.name.split("/")[strip_components:] if p and p != "."]
+                if not parts:
+                    continue
+                if ".." in parts or os.path.isabs(member.name):
+                    raise Exception("Refusing to extract [%s] outside of [%s]" % (member.name, destination))
+                member.name = "/".join(parts)
+                if member.islnk():
+                    member.linkname = "/".join(member.linkname.split("/")[strip_components:])
+                _check_tar_member(member, destination)
+                if hasattr(tarfile, "data_filter"):
+                    tar.extract(member, destination, filter="data")
+                else:
+                    tar.extract(member, destination)
+    finally:
+        r.close()
+
+
+def _check_tar_member(member, destination):
+    """Refuse members that would write, or link, outside of ``destination``.
+
+    Paths are resolved against what is already extracted, so members can't
+    escape through a symlink extracted earlier either.
+    """
+    root = os.path.realpath(destination)
+    path = os.path.realpath(os.path.join(root, member.name))
+    targets = [path]
+    if member.issym():
+        targets.append(os.path.realpath(os.path.join(os.path.dirname(path), member.linkname)))
+    elif member.islnk():
+        if os.path.isabs(member.linkname) or ".." in member.linkname.split("/"):
+            raise Exception("Refusing to extract hard link [%s] to [%s]" % (member.name, member.linkname))
+        targets.append(os.path.realpath(os.path.join(root, member.linkname)))
+    elif not (member.isfile() or member.isdir()):
+        raise Exception("Refusing to extract special file [%s]" % member.name)
+    for target in targets:
+        if target != root and not target.startswith(root + os.sep):
+            raise Exception("Refusing to extract [%s] outside of [%s]" % (member.name, destination))
+
+
+def _with_retries(func):
+    for attempt in range(DOWNLOAD_ATTEMPTS):
+        try:
+            return func()
+        except TRANSIENT_DOWNLOAD_ERRORS:
+            if attempt == DOWNLOAD_ATTEMPTS - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def update_repository_from_stream(tsi, repo_id, chunks, commit_message=None):
+    """Upload a tarball produced as an iterable of byte chunks to a repository.
+
+    Mirrors bioblend's ``update_repository`` but sends the multipart body
+    with chunked transfer encoding, so the tarball never needs to exist on
+    disk. The Tool Shed, and any proxy or WSGI server in front of it, must
+    accept chunked request bodies (e.g. uWSGI with ``chunked-input``
+    support) - others read the body as empty. The body can't be replayed,
+    so callers needing a retry have to build the tarball again.
+    """
+    ensure_module()
+    import bioblend
+    boundary = uuid.uuid4().hex
+    fields = {"key": tsi.key}
+    if commit_message is not None:
+        # bioblend JSON encodes non-file form values, do the same.
+        fields["commit_message"] = json.dumps(commit_message)
+    url = "%s/repositories/%s/changeset_revision" % (tsi.url, repo_id)
+    headers = {"Content-Type": "multipart/form-data; boundary=%s" % boundary}
+    r = _get_session().post(
+        url,
+        data=_multipart_chunks(boundary, fields, "file", "shed_upload.tar.gz", chunks),
+        headers=headers,
+        verify=tsi.verify,
+        timeout=tsi.timeout,
+    )
+    if r.status_code == 200:
+        return r.json()
+    raise bioblend.ConnectionError(
+        "Unexpected HTTP status code: %s" % r.status_code,
+        body=r.text,
+        status_code=r.status_code,
+    )
+
+
+def _multipart_chunks(boundary, fields, file_field, file_name, chunks):
+    for name, value in fields.items():
+        part = '--%s\r\nContent-Disposition: form-data; name="%s"\r\n\r\n%s\r\n' % (boundary, name, value)
+        yield part.encode("utf-8")
+    file_header = (
+        '--%s\r\nContent-Disposition: form-data; name="%s"; filename="%s"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ) % (boundary, file_field, file_name)
+    yield file_header.encode("utf-8")
+    for chunk in chunks:
+        yield chunk
+    yield ("\r\n--%s--\r\n" % boundary).encode("utf-8")
 
 
 def _user(tsi):
@@ -117,5 +314,56 @@ def _user(tsi):
     """
     # TODO: this should be done with an actual bioblend method,
     # see https://github.com/galaxyproject/bioblend/issues/130.
-    response = tsi.make_get_request(tsi.url + "/users")
-    return response.json()[0]
+    return _cached(tsi, ("user",), lambda: _get_json(tsi, "/users")[0])
+
+
+def _get_json(tsi, path, params=None):
+    """GET a tool shed API path over the shared keep-alive session."""
+    ensure_module()
+    import bioblend
+    request_params = dict(params or {})
+    if tsi.key:
+        request_params["key"] = tsi.key
+    r = _get_session().get(
+        tsi.url + path,
+        params=request_params,
+        verify=tsi.verify,
+        timeout=tsi.timeout,
+    )
+    if r.status_code == 200:
+        return r.json()
+    raise bioblend.ConnectionError(
+        "GET: error %s: %r" % (r.status_code, r.content),
+        body=r.text,
+        status_code=r.status_code,
+    )
+
+
+def _get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            # Block rather than open more than MAX_CONNECTIONS connections per
+            # tool shed when repositories are processed in parallel.
+            adapter = HTTPAdapter(pool_maxsize=MAX_CONNECTIONS, pool_block=True)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _cache_for(tsi):
+    with _caches_lock:
+        if tsi not in _caches:
+            _caches[tsi] = {"lock": threading.Lock(), "values": {}}
+        return _caches[tsi]
+
+
+def _cached(tsi, key, fetch):
+    cache = _cache_for(tsi)
+    # Hold the lock while fetching so concurrent callers share one request.
+    with cache["lock"]:
+        if key not in cache["values"]:
+            cache["values"][key] = fetch()
+        return cache["values"][key]
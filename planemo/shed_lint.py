@@ -5,7 +5,6 @@ import os
 import xml.etree.ElementTree as ET
 
 import yaml
-from galaxy.tool_util.lint import lint_tool_source_with
 from galaxy.tool_util.linters.help import rst_invalid
 from galaxy.util import unicodify
 
@@ -26,8 +25,10 @@ from planemo.shed import (
 )
 from planemo.shed2tap import base
 from planemo.tool_lint import (
+    build_lint_cache,
     build_tool_lint_args,
     handle_tool_load_error,
+    lint_tool_source_cached,
 )
 from planemo.tools import yield_tool_sources
 from planemo.xml import XSDS_PATH
@@ -110,7 +111,8 @@ def lint_repository(ctx, realized_repository, **kwds):
             realized_repository,
         )
     if kwds["tools"]:
-        tools_failed = lint_repository_tools(ctx, realized_repository, lint_ctx, lint_args)
+        lint_cache = build_lint_cache(ctx, lint_args, **kwds)
+        tools_failed = lint_repository_tools(ctx, realized_repository, lint_ctx, lint_args, lint_cache)
         failed = failed or tools_failed
     if kwds["ensure_metadata"]:
         lint_ctx.lint(
@@ -121,7 +123,7 @@ def lint_repository(ctx, realized_repository, **kwds):
     return handle_lint_complete(lint_ctx, lint_args, failed=failed)
 
 
-def lint_repository_tools(ctx, realized_repository, lint_ctx, lint_args):
+def lint_repository_tools(ctx, realized_repository, lint_ctx, lint_args, lint_cache=None):
     path = realized_repository.path
     for (tool_path, tool_source) in yield_tool_sources(ctx, path,
                                                        recursive=True):
@@ -129,10 +131,12 @@ def lint_repository_tools(ctx, realized_repository, lint_ctx, lint_args):
         info("+Linting tool %s" % original_path)
         if handle_tool_load_error(tool_path, tool_source):
             return True
-        lint_tool_source_with(
+        lint_tool_source_cached(
             lint_ctx,
+            tool_path,
             tool_source,
-            extra_modules=lint_args["extra_modules"]
+            lint_args["extra_modules"],
+            lint_cache,
         )
 
 
@@ -0,0 +1,198 @@
+"""Persistent index of parsed tool metadata keyed on tool content.
+
+Commands that only need a tool's id, version, requirements, containers or
+tests (``conda_install``, ``mull``, ``container_register``,
+``ci_find_tools``, ...) can read these from the planemo workspace instead of
+parsing the tool again. An entry is valid while the tool file, the macro
+files it imports, planemo and galaxy-tool-util are unchanged. Anything not
+recorded is answered by loading the tool for real.
+"""
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import traceback
+
+from galaxy.tool_util import loader_directory
+from galaxy.tool_util.deps.requirements import ContainerDescription, ToolRequirement
+from galaxy.tool_util.parser import get_tool_source
+
+from planemo import __version__ as planemo_version
+from planemo.hashing import content_hash, galaxy_tool_util_version
+
+TOOL_INDEX_DIRECTORY = "tool_index"
+
+
+class ToolIndex(object):
+    """Load tool sources, answering metadata queries from recorded entries."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @classmethod
+    def for_context(cls, ctx):
+        return cls(os.path.join(ctx.workspace, TOOL_INDEX_DIRECTORY))
+
+    def load_tool_sources_from_path(self, path, recursive, load_error_handler):
+        """Mirror ``loader_directory.load_tool_sources_from_path`` using the index."""
+        loaded = []
+        for tool_path in loader_directory.find_possible_tools_from_path(
+            path, recursive=recursive, enable_beta_formats=True
+        ):
+            tool_source = self.load(tool_path, load_error_handler)
+            loaded.append((tool_path, tool_source))
+        return loaded
+
+    def load(self, tool_path, load_error_handler):
+        """Return an :class:`IndexedToolSource` for ``tool_path``.
+
+        Load errors are reported with ``load_error_handler(path, message)`` and
+        returned as ``loader_directory.TOOL_LOAD_ERROR``, they are not recorded
+        so a tool that fails to load is parsed again on every call.
+        """
+        entry = self._read(tool_path)
+        if entry is not None:
+            return IndexedToolSource(tool_path, entry)
+
+        try:
+            tool_source = get_tool_source(tool_path)
+        except Exception:
+            # Not recorded - the macro files a broken tool would import are
+            # unknown, so nothing could invalidate the entry once fixed.
+            message = "".join(traceback.format_exception(*sys.exc_info(), limit=1))
+            load_error_handler(tool_path, message)
+            return loader_directory.TOOL_LOAD_ERROR
+        try:
+            entry = tool_source_metadata(tool_source)
+        except Exception:
+            # Leave it to the caller to hit the problem when asking for it.
+            return tool_source
+        self._write(tool_path, entry, getattr(tool_source, "macro_paths", None) or [])
+        indexed_tool_source = IndexedToolSource(tool_path, entry)
+        indexed_tool_source._tool_source = tool_source
+        return indexed_tool_source
+
+    def _key(self, tool_path, dependencies):
+        key_dict = {
+            "tool": content_hash(tool_path),
+            "dependencies": dict((p, content_hash(p)) for p in dependencies),
+            "planemo": planemo_version,
+            "galaxy_tool_util": galaxy_tool_util_version(),
+        }
+        return hashlib.sha256(json.dumps(key_dict, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _read(self, tool_path):
+        path = self._path(tool_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            if entry["key"] != self._key(tool_path, entry["dependencies"]):
+                return None
+        except (ValueError, KeyError, OSError, IOError):
+            return None
+        return entry
+
+    def _write(self, tool_path, entry, dependencies):
+        entry["dependencies"] = sorted(set(dependencies))
+        entry["key"] = self._key(tool_path, entry["dependencies"])
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.rename(temp_path, self._path(tool_path))
+
+    def _path(self, tool_path):
+        digest = hashlib.sha256(os.path.abspath(tool_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, "%s.json" % digest)
+
+
+class IndexedToolSource(object):
+    """Stand-in for a ``ToolSource`` backed by an index entry.
+
+    Recorded metadata is returned directly, any other attribute loads the
+    underlying tool source on first use.
+    """
+
+    def __init__(self, tool_path, entry):
+        self.tool_path = tool_path
+        self._entry = entry
+        self._tool_source = None
+
+    @property
+    def is_tool(self):
+        return self._entry["is_tool"]
+
+    @property
+    def macro_paths(self):
+        return self._entry["dependencies"]
+
+    def parse_id(self):
+        return self._entry["id"]
+
+    def parse_version(self):
+        return self._entry["version"]
+
+    def parse_name(self):
+        return self._entry["name"]
+
+    def parse_requirements_and_containers(self):
+        requirements = [ToolRequirement.from_dict(r) for r in self._entry["requirements"]]
+        containers = [ContainerDescription.from_dict(c) for c in self._entry["containers"]]
+        return requirements, containers
+
+    def parse_tests_to_dict(self):
+        if self._entry["tests"] is None:
+            return self.tool_source.parse_tests_to_dict()
+        return self._entry["tests"]
+
+    @property
+    def tool_source(self):
+        if self._tool_source is None:
+            self._tool_source = get_tool_source(self.tool_path)
+        return self._tool_source
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.tool_source, name)
+
+
+def tool_source_metadata(tool_source):
+    """Extract the metadata recorded in the index from ``tool_source``."""
+    root = getattr(tool_source, "root", None)
+    metadata = {
+        "is_tool": root is None or root.tag == "tool",
+        "id": None,
+        "version": None,
+        "name": None,
+        "requirements": [],
+        "containers": [],
+        "tests": None,
+    }
+    if not metadata["is_tool"]:
+        return metadata
+    requirements, containers = tool_source.parse_requirements_and_containers()
+    metadata["requirements"] = [r.to_dict() for r in requirements]
+    metadata["containers"] = [c.to_dict() for c in containers]
+    metadata["id"] = tool_source.parse_id()
+    metadata["version"] = tool_source.parse_version()
+    metadata["name"] = tool_source.parse_name()
+    try:
+        tests = tool_source.parse_tests_to_dict()
+        json.dumps(tests)
+        metadata["tests"] = tests
+    except Exception:
+        # Not representable as JSON, load the tool when tests are requested.
+        pass
+    return metadata
+
+
+__all__ = (
+    "IndexedToolSource",
+    "ToolIndex",
+    "tool_source_metadata",
+)
@@ -1,14 +1,31 @@
 from __future__ import absolute_import
 
+import importlib
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import (
+    redirect_stderr,
+    redirect_stdout,
+)
+from io import StringIO
 from os.path import basename
 
-from galaxy.tool_util.lint import lint_tool_source
+from galaxy.tool_util.lint import (
+    lint_tool_source_with,
+    LintContext,
+)
+from galaxy.tool_util.loader_directory import find_possible_tools_from_path
 
 import planemo.linters.biocontainer_registered
 import planemo.linters.conda_requirements
 import planemo.linters.doi
 import planemo.linters.urls
 import planemo.linters.xsd
+from planemo.conda import BEST_PRACTICE_CHANNELS
+from planemo.conda_repodata import (
+    configure_repodata_index,
+    get_repodata_index,
+)
 from planemo.exit_codes import (
     EXIT_CODE_GENERIC_FAILURE,
     EXIT_CODE_OK,
@@ -18,39 +35,176 @@ from planemo.io import (
     error,
     info,
 )
-from planemo.lint import build_lint_args
+from planemo.lint import (
+    build_lint_args,
+    find_dois_for_xml,
+    prefetch_dois,
+    prefetch_urls,
+)
+from planemo.lint_cache import LintCache
 from planemo.tools import (
     is_tool_load_error,
+    yield_tool_sources,
     yield_tool_sources_on_paths,
 )
+from planemo.url_checks import configure_url_checker
+from planemo.xml import validation
 
 LINTING_TOOL_MESSAGE = "Linting tool %s"
+# Results of these linters depend on remote resources, not just tool content.
+REMOTE_LINTERS = [
+    planemo.linters.biocontainer_registered,
+    planemo.linters.conda_requirements,
+    planemo.linters.doi,
+    planemo.linters.urls,
+]
 
 
 def build_tool_lint_args(ctx, **kwds):
     lint_args = build_lint_args(ctx, **kwds)
     extra_modules = _lint_extra_modules(**kwds)
     lint_args["extra_modules"] = extra_modules
+    if kwds.get("urls", False) or kwds.get("doi", False):
+        configure_url_checker(ctx)
+    if kwds.get("conda_requirements", False):
+        configure_repodata_index(ctx)
     return lint_args
 
 
+def build_lint_cache(ctx, lint_args, **kwds):
+    """Return a :class:`LintCache` if ``lint_cache`` is enabled and results are cacheable."""
+    if not kwds.get("lint_cache", False):
+        return None
+    remote_linters = [m.__name__ for m in lint_args["extra_modules"] if m in REMOTE_LINTERS]
+    if remote_linters:
+        ctx.vlog("Not caching lint results, linters %s check remote resources." % remote_linters)
+        return None
+    return LintCache.for_context(ctx)
+
+
+def lint_tool_source_cached(lint_ctx, tool_path, tool_source, extra_modules, lint_cache=None):
+    """Lint ``tool_source`` into ``lint_ctx``, replaying a cached result if available."""
+    if lint_cache is None:
+        lint_tool_source_with(lint_ctx, tool_source, extra_modules=extra_modules)
+        return
+    key = lint_cache.key(tool_path, tool_source, lint_ctx.level, lint_ctx.skip_types, extra_modules)
+    result = lint_cache.get(key)
+    if result is None:
+        tool_lint_ctx = LintContext(lint_ctx.level, skip_types=lint_ctx.skip_types, object_name=lint_ctx.object_name)
+        output = StringIO()
+        with redirect_stdout(output):
+            lint_tool_source_with(tool_lint_ctx, tool_source, extra_modules=extra_modules)
+        result = {
+            "output": output.getvalue(),
+            "found_errors": tool_lint_ctx.found_errors,
+            "found_warns": tool_lint_ctx.found_warns,
+        }
+        lint_cache.put(key, result)
+    sys.stdout.write(result["output"])
+    lint_ctx.found_errors = lint_ctx.found_errors or result["found_errors"]
+    lint_ctx.found_warns = lint_ctx.found_warns or result["found_warns"]
+
+
 def lint_tools_on_path(ctx, paths, lint_args, **kwds):
     assert_tools = kwds.get("assert_tools", True)
     recursive = kwds.get("recursive", False)
-    exit_codes = []
-    for (tool_path, tool_xml) in yield_tool_sources_on_paths(ctx, paths, recursive):
-        if handle_tool_load_error(tool_path, tool_xml):
-            exit_codes.append(EXIT_CODE_GENERIC_FAILURE)
-            continue
-        info("Linting tool %s" % tool_path)
-        if not lint_tool_source(tool_xml, name=basename(tool_path), **lint_args):
-            error("Failed linting")
-            exit_codes.append(EXIT_CODE_GENERIC_FAILURE)
-        else:
-            exit_codes.append(EXIT_CODE_OK)
+    parallelism = kwds.get("parallelism") or 1
+    lint_cache = kwds.get("lint_cache")
+    if parallelism > 1:
+        exit_codes = _lint_tools_in_parallel(ctx, paths, lint_args, recursive, parallelism, lint_cache)
+    else:
+        exit_codes = []
+        tool_sources = yield_tool_sources_on_paths(ctx, paths, recursive)
+        if _checks_remote(lint_args["extra_modules"]):
+            # Every tool has to be loaded before its checks can be queued.
+            tool_sources = list(tool_sources)
+            _prefetch_remote_checks(tool_sources, lint_args["extra_modules"])
+        for (tool_path, tool_xml) in tool_sources:
+            exit_codes.append(_lint_tool_source(tool_path, tool_xml, lint_args, lint_cache))
     return coalesce_return_codes(exit_codes, assert_at_least_one=assert_tools)
 
 
+def _checks_remote(extra_modules):
+    return planemo.linters.urls in extra_modules or planemo.linters.doi in extra_modules
+
+
+def _prefetch_remote_checks(tool_sources, extra_modules):
+    """Queue URL and DOI checks for every tool up front so they run concurrently."""
+    check_urls = planemo.linters.urls in extra_modules
+    check_dois = planemo.linters.doi in extra_modules
+    for (tool_path, tool_source) in tool_sources:
+        if is_tool_load_error(tool_source):
+            continue
+        root = getattr(tool_source, "root", None)
+        if root is None:
+            continue
+        try:
+            if check_urls:
+                prefetch_urls(root)
+            if check_dois:
+                prefetch_dois(find_dois_for_xml(tool_source.xml_tree))
+        except Exception:
+            # Best effort, the linters themselves report any problems.
+            continue
+
+
+def _lint_tool_source(tool_path, tool_xml, lint_args, lint_cache=None):
+    if handle_tool_load_error(tool_path, tool_xml):
+        return EXIT_CODE_GENERIC_FAILURE
+    info(LINTING_TOOL_MESSAGE % tool_path)
+    lint_ctx = LintContext(lint_args["level"], skip_types=lint_args["skip_types"], object_name=basename(tool_path))
+    lint_tool_source_cached(lint_ctx, tool_path, tool_xml, lint_args["extra_modules"], lint_cache)
+    if lint_ctx.failed(lint_args["fail_level"]):
+        error("Failed linting")
+        return EXIT_CODE_GENERIC_FAILURE
+    return EXIT_CODE_OK
+
+
+def _lint_tools_in_parallel(ctx, paths, lint_args, recursive, parallelism, lint_cache=None):
+    """Load and lint each candidate tool file in a pool of worker processes.
+
+    Worker output is captured and replayed in discovery order so reports read
+    the same as a serial run.
+    """
+    possible_tool_paths = []
+    for path in paths:
+        possible_tool_paths.extend(find_possible_tools_from_path(path, recursive=recursive, enable_beta_formats=True))
+    # Linter modules can't be pickled, send their names to the workers instead.
+    worker_lint_args = dict(lint_args)
+    worker_lint_args["extra_modules"] = [m.__name__ for m in lint_args.get("extra_modules", [])]
+    if planemo.linters.xsd in lint_args.get("extra_modules", []):
+        # Compile the tool XSD once up front, forked workers inherit it.
+        validator = validation.get_validator(require=False)
+        if validator is not None:
+            validator.prepare(planemo.linters.xsd.TOOL_XSD)
+    if planemo.linters.conda_requirements in lint_args.get("extra_modules", []):
+        # Likewise index the best practice channels once rather than per worker.
+        get_repodata_index(BEST_PRACTICE_CHANNELS).prepare()
+    exit_codes = []
+    with ProcessPoolExecutor(max_workers=parallelism) as executor:
+        futures = [
+            executor.submit(_lint_tool_path, ctx, tool_path, worker_lint_args, lint_cache)
+            for tool_path in possible_tool_paths
+        ]
+        for future in futures:
+            output, tool_exit_codes = future.result()
+            sys.stdout.write(output)
+            sys.stdout.flush()
+            exit_codes.extend(tool_exit_codes)
+    return exit_codes
+
+
+def _lint_tool_path(ctx, tool_path, lint_args, lint_cache):
+    lint_args = dict(lint_args)
+    lint_args["extra_modules"] = [importlib.import_module(m) for m in lint_args["extra_modules"]]
+    output = StringIO()
+    exit_codes = []
+    with redirect_stdout(output), redirect_stderr(output):
+        for (tool_path, tool_xml) in yield_tool_sources(ctx, tool_path):
+            exit_codes.append(_lint_tool_source(tool_path, tool_xml, lint_args, lint_cache))
+    return output.getvalue(), exit_codes
+
+
 def _lint_extra_modules(**kwds):
     linters = []
     if kwds.get("xsd", True):
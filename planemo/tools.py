@@ -9,6 +9,7 @@ from galaxy.tool_util import loader_directory
 from galaxy.tool_util.fetcher import ToolLocationFetcher
 
 from planemo.io import error, info
+from planemo.tool_index import IndexedToolSource, ToolIndex
 
 is_tool_load_error = loader_directory.is_tool_load_error
 SKIP_XML_MESSAGE = "Skipping XML file - does not appear to be a tool %s."
@@ -32,22 +33,34 @@ def uris_to_paths(ctx, uris):
     return paths
 
 
-def yield_tool_sources_on_paths(ctx, paths, recursive=False, yield_load_errors=True, exclude_deprecated=False):
-    """Walk paths and yield ToolSource objects discovered."""
+def yield_tool_sources_on_paths(ctx, paths, recursive=False, yield_load_errors=True, exclude_deprecated=False, use_index=False):
+    """Walk paths and yield ToolSource objects discovered.
+
+    With ``use_index`` tool metadata is answered from the workspace's
+    :class:`planemo.tool_index.ToolIndex` where possible, set ``tool_index``
+    to false in ``~/.planemo.yml`` to always parse tools.
+    """
     for path in paths:
-        for (tool_path, tool_source) in yield_tool_sources(ctx, path, recursive, yield_load_errors):
+        for (tool_path, tool_source) in yield_tool_sources(ctx, path, recursive, yield_load_errors, use_index=use_index):
             if exclude_deprecated and 'deprecated' in tool_path:
                 continue
             yield (tool_path, tool_source)
 
 
-def yield_tool_sources(ctx, path, recursive=False, yield_load_errors=True):
+def yield_tool_sources(ctx, path, recursive=False, yield_load_errors=True, use_index=False):
     """Walk single path and yield ToolSource objects discovered."""
-    tools = load_tool_sources_from_path(
-        path,
-        recursive,
-        register_load_errors=True,
-    )
+    if use_index and ctx.global_config.get("tool_index", True):
+        tools = ToolIndex.for_context(ctx).load_tool_sources_from_path(
+            path,
+            recursive,
+            _report_load_error,
+        )
+    else:
+        tools = load_tool_sources_from_path(
+            path,
+            recursive,
+            register_load_errors=True,
+        )
     for (tool_path, tool_source) in tools:
         if is_tool_load_error(tool_source):
             if yield_load_errors:
@@ -72,19 +85,26 @@ def load_tool_sources_from_path(path, recursive, register_load_errors=False):
 
 
 def _load_exception_handler(path, exc_info):
+    _report_load_error(path, "".join(traceback.format_exception(*exc_info, limit=1)))
+
+
+def _report_load_error(path, message):
     error(LOAD_ERROR_MESSAGE % path)
-    traceback.print_exception(*exc_info, limit=1, file=sys.stderr)
+    sys.stderr.write(message)
 
 
 def _is_tool_source(ctx, tool_path, tool_source):
     if os.path.basename(tool_path) in SHED_FILES:
         return False
-    root = getattr(tool_source, "root", None)
-    if root is not None:
-        if root.tag != "tool":
-            if ctx.verbose:
-                info(SKIP_XML_MESSAGE % tool_path)
-            return False
+    if isinstance(tool_source, IndexedToolSource):
+        is_tool = tool_source.is_tool
+    else:
+        root = getattr(tool_source, "root", None)
+        is_tool = root is None or root.tag == "tool"
+    if not is_tool:
+        if ctx.verbose:
+            info(SKIP_XML_MESSAGE % tool_path)
+        return False
     return True
 
 
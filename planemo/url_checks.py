@@ -0,0 +1,169 @@
+"""Concurrent, deduplicated and cached checks of remote URLs and DOIs for linting.
+
+A single :class:`UrlChecker` is shared by all linters in a process so each
+distinct URL or DOI is requested at most once per lint run, with at most a
+few requests in flight per host. Definitive results (successes and HTTP 4xx
+failures) are recorded on disk in the planemo workspace and reused until
+they expire.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from six.moves.urllib.parse import urlparse
+from six.moves.urllib.request import urlopen
+
+URL_CACHE_DIRECTORY = "url_cache"
+DEFAULT_CACHE_TTL = 60 * 60 * 24
+DEFAULT_MAX_WORKERS = 16
+DEFAULT_PER_HOST = 4
+DEFAULT_TIMEOUT = 30
+DOI_BASE_URL = "https://doi.org"
+
+_url_checker_settings = {}
+_url_checker = None
+_url_checker_lock = threading.Lock()
+
+
+class UrlChecker(object):
+    """Check URLs and DOIs on a thread pool, sharing results across callers.
+
+    ``check_url`` and ``check_doi`` return futures; requesting the same URL
+    or DOI again returns the same future.
+    """
+
+    def __init__(self, cache_directory=None, cache_ttl=DEFAULT_CACHE_TTL,
+                 max_workers=DEFAULT_MAX_WORKERS, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT):
+        self.cache_directory = cache_directory
+        if cache_directory and not os.path.exists(cache_directory):
+            os.makedirs(cache_directory)
+        self.cache_ttl = cache_ttl
+        self.per_host = per_host
+        self.timeout = timeout
+        self.pid = os.getpid()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._futures = {}
+        self._host_semaphores = {}
+        self._lock = threading.Lock()
+
+    def check_url(self, url, user_agent=None):
+        """Return a future for a ``{"ok": bool, "error": str}`` result for ``url``."""
+        return self._submit(("url", url, user_agent), self._fetch_url, url, user_agent)
+
+    def check_doi(self, doi):
+        """Return a future for a ``{"status_code": int, "error": str}`` result for ``doi``."""
+        return self._submit(("doi", doi), self._fetch_doi, doi)
+
+    def _submit(self, key, func, *args):
+        with self._lock:
+            future = self._futures.get(key)
+            if future is None:
+                future = self._executor.submit(self._cached, key, func, *args)
+                self._futures[key] = future
+            return future
+
+    def _cached(self, key, func, *args):
+        cache_path = self._cache_path(key)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r") as f:
+                    entry = json.load(f)
+                if time.time() - entry["time"] < self.cache_ttl:
+                    return entry["result"]
+            except (ValueError, KeyError):
+                pass
+        result, cacheable = func(*args)
+        if cache_path and cacheable:
+            fd, temp_path = tempfile.mkstemp(dir=self.cache_directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"time": time.time(), "result": result}, f)
+            os.rename(temp_path, cache_path)
+        return result
+
+    def _fetch_url(self, url, user_agent):
+        if not (url.startswith('http://') or url.startswith('https://')):
+            try:
+                with urlopen(url, timeout=self.timeout) as handle:
+                    handle.read(100)
+            except Exception as e:
+                return {"ok": False, "error": str(e)}, False
+            return {"ok": True, "error": None}, True
+
+        if user_agent:
+            headers = {"User-Agent": user_agent, 'Accept': '*/*'}
+        else:
+            headers = None
+        r = None
+        try:
+            with self._host_semaphore(url):
+                r = self._session.get(url, headers=headers, stream=True, timeout=self.timeout)
+                try:
+                    r.raise_for_status()
+                    next(r.iter_content(1000))
+                finally:
+                    r.close()
+        except Exception as e:
+            if r is not None and r.status_code == 429:
+                # too many requests - don't flag the URL and check it again next time
+                return {"ok": True, "error": None}, False
+            # Server errors, connection problems and timeouts may be transient,
+            # only record client errors.
+            return {"ok": False, "error": str(e)}, r is not None and 400 <= r.status_code < 500
+        return {"ok": True, "error": None}, True
+
+    def _fetch_doi(self, doi):
+        url = "%s/%s" % (DOI_BASE_URL, doi)
+        try:
+            with self._host_semaphore(url):
+                r = self._session.get(url, timeout=self.timeout)
+        except Exception as e:
+            return {"status_code": None, "error": str(e)}, False
+        return {"status_code": r.status_code, "error": None}, r.status_code in [200, 404]
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_semaphores:
+                self._host_semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_semaphores[host]
+
+    def _cache_path(self, key):
+        if not self.cache_directory:
+            return None
+        digest = hashlib.sha256(json.dumps(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_directory, "%s.json" % digest)
+
+
+def configure_url_checker(ctx):
+    """Configure the process-wide checker to cache results in ``ctx``'s workspace."""
+    global _url_checker
+    with _url_checker_lock:
+        _url_checker_settings["cache_directory"] = os.path.join(ctx.workspace, URL_CACHE_DIRECTORY)
+        _url_checker = None
+
+
+def get_url_checker():
+    """Return the process-wide :class:`UrlChecker`, creating it if needed."""
+    global _url_checker
+    with _url_checker_lock:
+        # Thread pools don't survive fork, create a fresh checker in child processes.
+        if _url_checker is None or _url_checker.pid != os.getpid():
+            _url_checker = UrlChecker(**_url_checker_settings)
+        return _url_checker
+
+
+__all__ = (
+    "configure_url_checker",
+    "get_url_checker",
+    "UrlChecker",
+)
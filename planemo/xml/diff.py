@@ -1,7 +1,9 @@
+import hashlib
 
-def diff(x1, x2, reporter=None):
+
+def diff(x1, x2, reporter=None, full=False):
     """Return 0 if and only if the XML has the same content."""
-    compare = xml_compare(x1, x2, reporter)
+    compare = xml_compare(x1, x2, reporter, full=full)
     return_val = 0 if compare else 1
     return return_val
 
@@ -9,48 +11,101 @@ def diff(x1, x2, reporter=None):
 # From
 # bitbucket.org/ianb/formencode/src/tip/formencode/doctest_xml_compare.py
 # with (PSF license)
-def xml_compare(x1, x2, reporter=None):
+def xml_compare(x1, x2, reporter=None, full=False):
+    """Compare two elements, reporting differences to ``reporter``.
+
+    Elements are first compared by a digest of their normalized content so
+    identical trees (and later identical subtrees) are not walked. By default
+    comparison stops at the first difference, if ``full`` is set every
+    difference is reported.
+    """
     if reporter is None:
         def reporter(x):
             return None
 
+    digests = {}
+    if element_digest(x1, digests) == element_digest(x2, digests):
+        return True
+    return _compare(x1, x2, reporter, full, digests)
+
+
+def element_digest(element, digests=None):
+    """Return a digest of element's tag, attributes, stripped text and children.
+
+    Two elements have the same digest if and only if :func:`xml_compare`
+    considers them equal. ``digests`` memoizes digests of visited elements.
+    """
+    if digests is None:
+        digests = {}
+    key = id(element)
+    if key not in digests:
+        checksum = hashlib.sha1()
+        parts = [element.tag, (element.text or '').strip(), (element.tail or '').strip()]
+        parts.extend("%s=%s" % item for item in sorted(element.attrib.items()))
+        for part in parts:
+            checksum.update(("%s\0" % part).encode("utf-8"))
+        for child in element:
+            checksum.update(element_digest(child, digests).encode("utf-8"))
+        digests[key] = checksum.hexdigest()
+    return digests[key]
+
+
+def _compare(x1, x2, reporter, full, digests):
+    same = True
     if x1.tag != x2.tag:
         reporter('Tags do not match: %s and %s\n' % (x1.tag, x2.tag))
-        return False
+        if not full:
+            return False
+        same = False
     for name, value in x1.attrib.items():
         if x2.attrib.get(name) != value:
             reporter('Attributes do not match: %s=%r, %s=%r\n'
                      % (name, value, name, x2.attrib.get(name)))
-            return False
+            if not full:
+                return False
+            same = False
     for name in x2.attrib.keys():
         if name not in x1.attrib:
             reporter('x2 has an attribute x1 is missing: %s\n'
                      % name)
-            return False
+            if not full:
+                return False
+            same = False
     if not text_compare(x1.text, x2.text):
         reporter('text: %r != %r\n' % (x1.text, x2.text))
-        return False
+        if not full:
+            return False
+        same = False
     if not text_compare(x1.tail, x2.tail):
         reporter('tail: %r != %r\n' % (x1.tail, x2.tail))
-        return False
-    return _compare_children(x1, x2, reporter)
+        if not full:
+            return False
+        same = False
+    return _compare_children(x1, x2, reporter, full, digests) and same
 
 
-def _compare_children(x1, x2, reporter):
+def _compare_children(x1, x2, reporter, full, digests):
     cl1 = list(x1)
     cl2 = list(x2)
+    same = True
     if len(cl1) != len(cl2):
         reporter('children length differs, %i != %i\n'
                  % (len(cl1), len(cl2)))
-        return False
+        if not full:
+            return False
+        same = False
     i = 0
     for c1, c2 in zip(cl1, cl2):
         i += 1
-        if not xml_compare(c1, c2, reporter=reporter):
+        if element_digest(c1, digests) == element_digest(c2, digests):
+            continue
+        if not _compare(c1, c2, reporter, full, digests):
             reporter('children %i do not match: %s\n'
                      % (i, c1.tag))
-            return False
-    return True
+            if not full:
+                return False
+            same = False
+    return same
 
 
 def text_compare(t1, t2):
@@ -1,6 +1,8 @@
 """Module describing abstractions for validating XML content."""
 import abc
+import os
 import subprocess
+import threading
 from collections import namedtuple
 
 from galaxy.tool_util.deps.commands import which
@@ -29,6 +31,9 @@ class XsdValidator(object):
         :return type: ValidationResult
         """
 
+    def prepare(self, schema_path):
+        """Do any per-schema setup ahead of validation (e.g. before forking workers)."""
+
     @abc.abstractmethod
     def enabled(self):
         """Return True iff system has dependencies for this validator.
@@ -41,18 +46,40 @@ ValidationResult = namedtuple("ValidationResult", ["passed", "output"])
 
 
 class LxmlValidator(XsdValidator):
-    """Validate XSD files using lxml library."""
+    """Validate XSD files using lxml library.
+
+    Compiled schemas are cached for the life of the process (keyed on path,
+    size and modification time), schemas compiled before forking worker
+    processes are shared with those workers.
+    """
+
+    def __init__(self):
+        self._schemas = {}
+        self._lock = threading.Lock()
 
     def validate(self, schema_path, target_path):
         try:
-            xsd_doc = etree.parse(schema_path)
-            xsd = etree.XMLSchema(xsd_doc)
+            xsd, xsd_lock = self._compiled_schema(schema_path)
             xml = etree.parse(target_path)
-            passed = xsd.validate(xml)
-            return ValidationResult(passed, xsd.error_log)
+            # error_log belongs to the schema object, don't interleave validations.
+            with xsd_lock:
+                passed = xsd.validate(xml)
+                return ValidationResult(passed, xsd.error_log)
         except etree.XMLSyntaxError as e:
             return ValidationResult(False, unicodify(e))
 
+    def prepare(self, schema_path):
+        self._compiled_schema(schema_path)
+
+    def _compiled_schema(self, schema_path):
+        stat = os.stat(schema_path)
+        key = (os.path.abspath(schema_path), stat.st_size, stat.st_mtime)
+        with self._lock:
+            if key not in self._schemas:
+                xsd_doc = etree.parse(schema_path)
+                self._schemas[key] = (etree.XMLSchema(xsd_doc), threading.Lock())
+            return self._schemas[key]
+
     def enabled(self):
         return etree is not None
 
@@ -0,0 +1,123 @@
+"""Unit tests for ``planemo.ci``."""
+import json
+import os
+
+from planemo import ci
+from .test_utils import (
+    TempDirectoryTestCase,
+    test_context,
+    TEST_DATA_DIR,
+)
+
+TOOL_XML = """<tool id="%s" name="%s" version="1.0">
+    <macros>
+        <import>%s</import>
+    </macros>
+    <command>cat</command>
+    <tests>
+        <test>
+            <param name="input" value="%s" />
+        </test>
+    </tests>
+</tool>
+"""
+
+
+class ChangeIndexTestCase(TempDirectoryTestCase):
+
+    def setUp(self):
+        super(ChangeIndexTestCase, self).setUp()
+        self._write("macros/shared.xml", "<macros />")
+        self._write("repo1/.shed.yml", "name: repo1")
+        self._write("repo1/macros.xml", "<macros />")
+        self._write("repo1/cat1.xml", TOOL_XML % ("cat1", "cat1", "macros.xml", "1.fa"))
+        self._write("repo1/cat2.xml", TOOL_XML % ("cat2", "cat2", "macros.xml", "2.fa"))
+        self._write("repo1/test-data/1.fa", ">1")
+        self._write("repo1/test-data/2.fa", ">2")
+        self._write("repo1/test-data/unused.fa", ">3")
+        self._write("repo1/script.py", "")
+        self._write("repo2/.shed.yml", "name: repo2")
+        self._write("repo2/cat3.xml", TOOL_XML % ("cat3", "cat3", "../macros/shared.xml", "3.fa"))
+        self.repos = [self._path("repo1"), self._path("repo2")]
+        self.tools = [self._path(p) for p in ["repo1/cat1.xml", "repo1/cat2.xml", "repo2/cat3.xml"]]
+
+    def test_affected_tools(self):
+        assert self._affected_tools("repo1/cat1.xml") == ["repo1/cat1.xml"]
+        assert self._affected_tools("repo1/test-data/2.fa") == ["repo1/cat2.xml"]
+        assert self._affected_tools("repo1/macros.xml") == ["repo1/cat1.xml", "repo1/cat2.xml"]
+        assert self._affected_tools("repo1/script.py") == ["repo1/cat1.xml", "repo1/cat2.xml"]
+        assert self._affected_tools("repo1/test-data/unused.fa") == ["repo1/cat1.xml", "repo1/cat2.xml"]
+        assert self._affected_tools("macros/shared.xml") == ["repo2/cat3.xml"]
+        assert self._affected_tools("README.md") == []
+
+    def test_test_data_matched_exactly(self):
+        self._write("repo1/cat4.xml", TOOL_XML % ("cat4", "cat4", "macros.xml", "sub/21.fa"))
+        self._write("repo1/test-data/sub/21.fa", ">21")
+        self.tools.append(self._path("repo1/cat4.xml"))
+        assert self._affected_tools("repo1/test-data/1.fa") == ["repo1/cat1.xml"]
+        assert self._affected_tools("repo1/test-data/sub/21.fa") == ["repo1/cat4.xml"]
+
+    def test_affected_repos(self):
+        assert self._affected_repos("repo1/test-data/1.fa") == ["repo1"]
+        assert self._affected_repos("repo2/.shed.yml") == ["repo2"]
+        assert self._affected_repos("macros/shared.xml") == ["repo2"]
+        assert self._affected_repos("README.md") == []
+
+    def _affected_tools(self, changed_file):
+        change_index = ci.ChangeIndex(test_context(), [changed_file], directory=self.temp_directory)
+        return self._relative(change_index.affected_tools(self.tools))
+
+    def _affected_repos(self, changed_file):
+        change_index = ci.ChangeIndex(test_context(), [changed_file], directory=self.temp_directory)
+        return self._relative(change_index.affected_repos(self.repos))
+
+    def _relative(self, paths):
+        return sorted(os.path.relpath(p, self.temp_directory) for p in paths)
+
+    def _path(self, path):
+        return os.path.join(self.temp_directory, path)
+
+    def _write(self, path, contents):
+        path = self._path(path)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, "w") as f:
+            f.write(contents)
+
+
+def test_chunk_paths_by_count():
+    paths = ["a", "b", "c", "d", "e"]
+    chunks = [ci.chunk_paths(paths, 2, i) for i in range(2)]
+    assert chunks == [["a", "b", "c"], ["d", "e"]]
+
+
+def test_chunk_paths_by_duration():
+    paths = ["a", "b", "c", "d", "e", "f"]
+    durations = {"a": 100, "b": 60, "c": 50, "d": 10, "e": 5}
+    chunks = [ci.chunk_paths(paths, 2, i, durations) for i in range(2)]
+    # f has no recorded duration and is assumed to take the average (45s).
+    assert chunks == [["a", "f"], ["b", "c", "d", "e"]]
+    assert sorted(sum(chunks, [])) == paths
+
+
+def test_load_durations():
+    durations = ci.load_durations([os.path.join(TEST_DATA_DIR, "tt_success.json")])
+    assert abs(durations["cat"] - 3.589455) < 1e-6
+
+
+class LoadDurationsTestCase(TempDirectoryTestCase):
+
+    def test_averaged_across_files(self):
+        test_output = {"tests": [
+            {"id": "cat1-0", "data": {"tool_id": "cat1", "time_seconds": 10}},
+            {"id": "cat1-1", "data": {"tool_id": "cat1", "time_seconds": 20}},
+            {"id": "cat2-0", "data": {"tool_id": "toolshed.g2.bx.psu.edu/repos/iuc/cat/cat2/1.0", "time_seconds": 5}},
+        ]}
+        timings = {"cat1": 50, "repo/cat3.xml": 7}
+        duration_files = []
+        for name, contents in [("tool_test_output.json", test_output), ("timings.json", timings)]:
+            duration_files.append(os.path.join(self.temp_directory, name))
+            with open(duration_files[-1], "w") as f:
+                json.dump(contents, f)
+        durations = ci.load_durations(duration_files)
+        assert durations == {"cat1": 40.0, "cat2": 5.0, "repo/cat3.xml": 7.0}
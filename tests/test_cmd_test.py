@@ -3,6 +3,7 @@ import json
 import os
 from tempfile import NamedTemporaryFile
 
+from planemo.io import kill_pid_file
 from .test_utils import (
     assert_exists,
     CliTestCase,
@@ -74,6 +75,30 @@ class CmdTestTestCase(CliTestCase):
             #        print(o.read())
             #    raise
 
+    @skip_if_environ("PLANEMO_SKIP_GALAXY_TESTS")
+    def test_workflow_test_simple_ga_warm_galaxy(self):
+        """Test testing a simple GA workflow against a warm Galaxy, started and then attached to."""
+        with self._isolate() as f:
+            cat = os.path.join(PROJECT_TEMPLATES_DIR, "demo", "cat.xml")
+            test_artifact = os.path.join(TEST_DATA_DIR, "wf2.ga")
+            workspace = os.path.join(f, "workspace")
+            try:
+                for _ in range(2):
+                    test_command = ["--directory", workspace] + self._test_command()
+                    test_command = self.append_profile_argument_if_needed(test_command)
+                    test_command += [
+                        "--warm_galaxy", "wf_test",
+                        "--no_dependency_resolution",
+                        "--extra_tools", cat,
+                        test_artifact,
+                    ]
+                    self._check_exit_code(test_command, exit_code=0)
+            finally:
+                record_path = os.path.join(workspace, "warm_galaxies", "wf_test.json")
+                if os.path.exists(record_path):
+                    with open(record_path, "r") as record_file:
+                        kill_pid_file(json.load(record_file)["pid_file"])
+
     @skip_if_environ("PLANEMO_SKIP_GALAXY_TESTS")
     def test_workflow_test_distro_tool(self):
         """Test testing a workflow that uses distro tools."""
@@ -0,0 +1,89 @@
+"""Unit tests for ``planemo.conda``."""
+import os
+from contextlib import redirect_stdout
+
+from galaxy.tool_util.deps import conda_util
+
+from planemo.commands.cmd_conda_install import _create_environments
+from planemo.conda import collect_conda_environments
+from planemo.io import shell
+from .test_utils import (
+    TempDirectoryTestCase,
+    test_context,
+)
+
+# Records its package caches and waits for the other environment to start,
+# so both creates are known to run at the same time.
+FAKE_CONDA = """#!/bin/sh
+while [ "$1" != "--name" ]; do shift; done
+name=$2
+echo "start $name $CONDA_PKGS_DIRS"
+touch "%(prefix)s/started_$name"
+for i in $(seq 100); do
+    [ $(ls "%(prefix)s" | grep -c started_) -ge 2 ] && break
+    sleep 0.1
+done
+echo "end $name"
+"""
+TOOL_TEMPLATE = """<tool id="%s" name="%s" version="1.0">
+    <requirements>%s</requirements>
+    <command>true</command>
+</tool>
+"""
+
+
+class CollectCondaEnvironmentsTestCase(TempDirectoryTestCase):
+
+    def test_shared_requirements_deduplicated(self):
+        tools = {
+            "a": ["samtools@1.9", "bwa@0.7.17"],
+            "b": ["samtools@1.9", "bwa@0.7.17"],
+            "c": ["samtools@1.9"],
+            "d": ["samtools@1.9"],
+            "e": [],
+        }
+        for tool_id, requirements in tools.items():
+            requirements_xml = "".join(
+                '<requirement type="package" version="%s">%s</requirement>' % tuple(reversed(r.split("@")))
+                for r in requirements
+            )
+            with open(os.path.join(self.temp_directory, "%s.xml" % tool_id), "w") as f:
+                f.write(TOOL_TEMPLATE % (tool_id, tool_id, requirements_xml))
+
+        environments = collect_conda_environments(test_context(), [self.temp_directory])
+        assert len(environments) == 2
+        assert [str(t) for t in environments["__samtools@1.9"]] == ["CondaTarget[samtools,version=1.9]"]
+        mulled = [name for name in environments if name.startswith("mulled-v1-")]
+        assert len(mulled) == 1
+        assert [t.package for t in environments[mulled[0]]] == ["samtools", "bwa"]
+
+
+class CreateEnvironmentsTestCase(TempDirectoryTestCase):
+
+    def test_parallel_creates_isolated_and_buffered(self):
+        conda_exec = os.path.join(self.temp_directory, "conda")
+        with open(conda_exec, "w") as f:
+            f.write(FAKE_CONDA % {"prefix": self.temp_directory})
+        os.chmod(conda_exec, 0o755)
+        conda_context = conda_util.CondaContext(
+            conda_prefix=self.temp_directory, conda_exec=conda_exec, shell_exec=shell,
+        )
+        environments = {
+            "__a@1.0": [conda_util.CondaTarget("a", "1.0")],
+            "__b@1.0": [conda_util.CondaTarget("b", "1.0")],
+        }
+        # A real file, unbuffered subprocess output would be written to it directly.
+        output_path = os.path.join(self.temp_directory, "output")
+        with open(output_path, "w") as f, redirect_stdout(f):
+            assert _create_environments(test_context(), conda_context, environments, 2) == 0
+        with open(output_path, "r") as f:
+            lines = [line.split() for line in f.read().splitlines() if line.startswith(("start", "end"))]
+        assert [line[:2] for line in lines] == [
+            ["start", "__a@1.0"], ["end", "__a@1.0"], ["start", "__b@1.0"], ["end", "__b@1.0"],
+        ]
+        for env_name, line in [("__a@1.0", lines[0]), ("__b@1.0", lines[2])]:
+            pkgs_dirs = line[2].split(",")
+            assert os.path.basename(pkgs_dirs[0]) == env_name
+            assert pkgs_dirs[1] == os.path.join(self.temp_directory, "pkgs")
+            # Removed once all environments are created.
+            assert not os.path.exists(pkgs_dirs[0])
@@ -0,0 +1,101 @@
+"""Unit tests for ``planemo.conda_repodata``."""
+import json
+import os
+import threading
+
+from galaxy.tool_util.deps.conda_util import CondaTarget
+from six.moves import BaseHTTPServer
+
+from planemo.conda_repodata import RepodataIndex
+from planemo.io import temp_directory
+
+REPODATA = {
+    "packages": {
+        "samtools-1.9-h1.tar.bz2": {"name": "samtools", "version": "1.9", "build": "h1", "build_number": 1},
+        "samtools-1.10-h0.tar.bz2": {"name": "samtools", "version": "1.10", "build": "h0", "build_number": 0},
+        "samtools-1.10-h2.tar.bz2": {"name": "samtools", "version": "1.10", "build": "h2", "build_number": 2},
+    },
+    "packages.conda": {
+        "bwa-0.7.17-h0.conda": {"name": "bwa", "version": "0.7.17", "build": "h0", "build_number": 0},
+    },
+}
+NOARCH_REPODATA = {
+    "packages": {
+        "multiqc-1.9-py_1.tar.bz2": {"name": "multiqc", "version": "1.9", "build": "py_1", "build_number": 1},
+    },
+}
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):  # noqa: N802
+        _Handler.requests.append((self.path, self.headers.get("If-None-Match")))
+        if not self.path.startswith("/linux-64/"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(REPODATA).encode("utf-8")
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_file_channel_search():
+    with temp_directory() as channel:
+        for subdir, repodata in [("linux-64", REPODATA), ("noarch", NOARCH_REPODATA)]:
+            os.makedirs(os.path.join(channel, subdir))
+            with open(os.path.join(channel, subdir, "repodata.json"), "w") as f:
+                json.dump(repodata, f)
+        index = RepodataIndex(["file://%s" % channel], platform="linux-64")
+
+        hit, exact = index.best_search_result(CondaTarget("samtools"))
+        assert exact
+        assert (hit["version"], hit["build_number"]) == ("1.10", 2)
+
+        hit, exact = index.best_search_result(CondaTarget("samtools", "1.9"))
+        assert exact
+        assert hit["version"] == "1.9"
+
+        hit, exact = index.best_search_result(CondaTarget("samtools", "1.8"))
+        assert not exact
+        assert hit["version"] == "1.10"
+
+        assert index.best_search_result(CondaTarget("bwa"))[0]["version"] == "0.7.17"
+        assert index.best_search_result(CondaTarget("multiqc"))[0]["subdir"] == "noarch"
+        assert index.best_search_result(CondaTarget("missing")) == (None, None)
+
+
+def test_http_channel_revalidated_and_offline():
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    channel = "http://127.0.0.1:%d" % server.server_port
+    _Handler.requests = []
+    with temp_directory() as cache_directory:
+        try:
+            index = RepodataIndex([channel], platform="linux-64", cache_directory=cache_directory)
+            assert index.best_search_result(CondaTarget("samtools"))[0]["version"] == "1.10"
+            assert ("/linux-64/repodata.json", None) in _Handler.requests
+
+            _Handler.requests = []
+            index = RepodataIndex([channel], platform="linux-64", cache_directory=cache_directory)
+            assert index.best_search_result(CondaTarget("samtools"))[0]["version"] == "1.10"
+            assert ("/linux-64/repodata.json", '"v1"') in _Handler.requests
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        # With the channel unreachable the cached index is used.
+        index = RepodataIndex([channel], platform="linux-64", cache_directory=cache_directory, timeout=5)
+        assert index.best_search_result(CondaTarget("samtools"))[0]["version"] == "1.10"
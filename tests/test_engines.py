@@ -1,8 +1,13 @@
 """Unit tests for engines and runnables."""
 
+import contextlib
 import os
+import threading
+import time
 
 from planemo.engine import engine_context
+from planemo.engine.galaxy import GalaxyEngine
+from planemo.engine.interface import BaseEngine
 from planemo.runnable import (
     for_path,
     get_outputs,
@@ -55,3 +60,70 @@ def test_runnable_types():
     assert RunnableType.galaxy_workflow.is_galaxy_artifact
     assert not RunnableType.cwl_tool.is_galaxy_artifact
     assert not RunnableType.cwl_workflow.is_galaxy_artifact
+
+
+class _SleepyEngine(BaseEngine):
+    handled_runnable_types = [RunnableType.cwl_tool]
+
+    def __init__(self, ctx, **kwds):
+        super(_SleepyEngine, self).__init__(ctx, **kwds)
+        self.thread_names = set()
+
+    def _run(self, runnable, job_path):
+        raise NotImplementedError()
+
+    def _run_test_case(self, test_case):
+        self.thread_names.add(threading.current_thread().name)
+        # Later cases finish first, results must still come back in order.
+        time.sleep(0.05 * (4 - test_case))
+        return "response %d" % test_case
+
+
+def test_collect_test_results_parallel_order():
+    ctx = test_context()
+    engine = _SleepyEngine(ctx, test_parallelism=4)
+    test_results = engine._collect_test_results([0, 1, 2, 3])
+    assert test_results == [(i, "response %d" % i) for i in range(4)]
+    assert len(engine.thread_names) > 1
+
+
+def test_collect_test_results_serial_by_default():
+    ctx = test_context()
+    engine = _SleepyEngine(ctx)
+    test_results = engine._collect_test_results([0, 1])
+    assert test_results == [(0, "response 0"), (1, "response 1")]
+    assert engine.thread_names == {threading.current_thread().name}
+
+
+class _CountingGalaxyEngine(GalaxyEngine):
+
+    def __init__(self, ctx, **kwds):
+        super(_CountingGalaxyEngine, self).__init__(ctx, **kwds)
+        self.served = []
+        self.test_case_configs = []
+
+    @contextlib.contextmanager
+    def ensure_runnables_served(self, runnables):
+        self.served.append(runnables)
+        yield _FakeGalaxyConfig()
+
+    def _collect_test_results(self, test_cases):
+        for test_case in test_cases:
+            with self._runnables_served([test_case.runnable]) as config:
+                self.test_case_configs.append(config)
+        return []
+
+
+class _FakeGalaxyConfig(object):
+    user_api_key = "fakekey"
+
+
+def test_galaxy_engine_serves_runnables_once():
+    ctx = test_context()
+    engine = _CountingGalaxyEngine(ctx)
+    runnables = [for_path(A_GALAXY_GA_WORKFLOW), for_path(A_GALAXY_YAML_WORKFLOW)]
+    engine.test(runnables)
+    assert engine.served == [runnables]
+    assert len(engine.test_case_configs) == 2
+    assert len(set(map(id, engine.test_case_configs))) == 1
+    assert engine._served_config is None
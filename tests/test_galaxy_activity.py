@@ -0,0 +1,95 @@
+"""Unit tests for output downloading in :mod:`planemo.galaxy.activity`."""
+import os
+
+from requests.exceptions import ChunkedEncodingError
+
+from planemo.galaxy.activity import (
+    _collection_dataset_ids,
+    _resumable_download,
+)
+from planemo.io import temp_directory
+
+
+class _FakeResponse(object):
+
+    def __init__(self, status_code, body, content_length=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = {}
+        if content_length is not None:
+            self.headers["Content-Length"] = str(content_length)
+
+    def raise_for_status(self):
+        assert self.status_code < 400
+
+    def iter_content(self, chunk_size=None):
+        yield self._body
+
+    def close(self):
+        pass
+
+
+class _FakeSession(object):
+
+    def __init__(self, content, truncate_first=0):
+        self._content = content
+        self._truncate_first = truncate_first
+        self.ranges = []
+
+    def get(self, url, params=None, headers=None, **kwds):
+        range_header = (headers or {}).get("Range")
+        self.ranges.append(range_header)
+        if range_header:
+            offset = int(range_header[len("bytes="):-1])
+            body = self._content[offset:]
+            return _FakeResponse(206, body, content_length=len(body))
+        body = self._content
+        if self._truncate_first:
+            body = body[:self._truncate_first]
+            self._truncate_first = 0
+        return _FakeResponse(200, body, content_length=len(self._content))
+
+
+def test_resumable_download_resumes_partial_file():
+    content = b"0123456789" * 10
+    session = _FakeSession(content, truncate_first=25)
+    with temp_directory() as dir:
+        to_path = os.path.join(dir, "out")
+        try:
+            _resumable_download(session, "http://galaxy/display", {}, to_path)
+            raise AssertionError("Expected truncated download to be detected.")
+        except ChunkedEncodingError:
+            pass
+        assert not os.path.exists(to_path)
+        assert os.path.getsize(to_path + ".part") == 25
+        _resumable_download(session, "http://galaxy/display", {}, to_path)
+        with open(to_path, "rb") as f:
+            assert f.read() == content
+        assert not os.path.exists(to_path + ".part")
+    assert session.ranges == [None, "bytes=25-"]
+
+
+def test_resumable_download_replaces_stale_destination():
+    content = b"0123456789" * 10
+    session = _FakeSession(content)
+    with temp_directory() as dir:
+        to_path = os.path.join(dir, "out")
+        with open(to_path, "wb") as f:
+            f.write(b"stale")
+        _resumable_download(session, "http://galaxy/display", {}, to_path)
+        with open(to_path, "rb") as f:
+            assert f.read() == content
+    assert session.ranges == [None]
+
+
+def test_collection_dataset_ids_nested():
+    collection = {
+        "elements": [
+            {"element_type": "hda", "object": {"id": "a"}},
+            {"element_type": "dataset_collection", "object": {"elements": [
+                {"element_type": "hda", "object": {"id": "b"}},
+                {"element_type": "hda", "object": {"id": "c"}},
+            ]}},
+        ]
+    }
+    assert _collection_dataset_ids(collection) == ["a", "b", "c"]
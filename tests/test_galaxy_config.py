@@ -1,8 +1,14 @@
 """Unit tests for ``planemo.galaxy.config``."""
 import contextlib
 import os
+import subprocess
+from unittest import mock
 
-from planemo.galaxy.config import galaxy_config
+from planemo.galaxy import config
+from planemo.galaxy.config import (
+    _install_galaxy_via_git,
+    galaxy_config,
+)
 from .test_utils import (
     skip_if_environ,
     TempDirectoryContext,
@@ -50,3 +56,72 @@ def _test_galaxy_config(tool_paths=[], **kwargs):
         kwargs["test_data"] = test_data
         with galaxy_config(ctx, tool_paths, **kwargs) as gc:
             yield gc
+
+
+def test_galaxy_root_snapshot_reused():
+    """Test installed Galaxy roots are snapshotted and copied per commit."""
+    with TempDirectoryContext() as tdc:
+        source, startup_log = _galaxy_source(tdc.temp_directory)
+        ctx = _snapshot_context(tdc.temp_directory)
+        kwds = dict(galaxy_source=source, galaxy_branch="dev", skip_venv=True)
+        for name in ["root1", "root2"]:
+            galaxy_root = os.path.join(tdc.temp_directory, name)
+            _install_galaxy_via_git(ctx, galaxy_root, {}, kwds)
+            assert os.path.isdir(os.path.join(galaxy_root, "lib"))
+            assert os.path.exists(os.path.join(galaxy_root, "scripts", "common_startup.sh"))
+        with open(startup_log, "r") as f:
+            assert f.read().count("ran") == 1
+        assert len(os.listdir(os.path.join(ctx.workspace, "gx_roots"))) == 1
+
+
+def test_galaxy_root_snapshots_pruned():
+    """Test only the most recently used Galaxy root snapshots are kept."""
+    with TempDirectoryContext() as tdc:
+        source, _ = _galaxy_source(tdc.temp_directory)
+        ctx = _snapshot_context(tdc.temp_directory)
+        kwds = dict(galaxy_source=source, galaxy_branch="dev", skip_venv=True)
+        with mock.patch.object(config, "GALAXY_ROOT_SNAPSHOTS_KEEP", 1):
+            for i in range(2):
+                _git(source, "-c", "user.name=planemo", "-c", "user.email=planemo@example.com",
+                     "commit", "-q", "--allow-empty", "-m", "commit %d" % i)
+                _install_galaxy_via_git(ctx, os.path.join(tdc.temp_directory, "root%d" % i), {}, kwds)
+        assert len(os.listdir(os.path.join(ctx.workspace, "gx_roots"))) == 1
+
+
+def test_galaxy_root_unresolved_commit_not_snapshotted():
+    """Test Galaxy is installed without a snapshot if the commit is unknown."""
+    with TempDirectoryContext() as tdc:
+        source, startup_log = _galaxy_source(tdc.temp_directory)
+        ctx = _snapshot_context(tdc.temp_directory)
+        kwds = dict(galaxy_source=source, galaxy_branch="dev", skip_venv=True)
+        galaxy_root = os.path.join(tdc.temp_directory, "root")
+        with mock.patch.object(config, "_galaxy_commit", return_value=None):
+            _install_galaxy_via_git(ctx, galaxy_root, {}, kwds)
+        assert os.path.isdir(os.path.join(galaxy_root, "lib"))
+        assert not os.path.exists(os.path.join(ctx.workspace, "gx_roots"))
+        assert config._galaxy_commit(os.path.join(source, ".git"), "missing") is None
+
+
+def _galaxy_source(directory):
+    source = os.path.join(directory, "galaxy_source")
+    startup_log = os.path.join(directory, "startup.log")
+    os.makedirs(os.path.join(source, "scripts"))
+    startup = os.path.join(source, "scripts", "common_startup.sh")
+    with open(startup, "w") as f:
+        f.write("#!/bin/sh\nmkdir -p lib\necho ran >> '%s'\n" % startup_log)
+    os.chmod(startup, 0o755)
+    _git(source, "init", "-q")
+    _git(source, "checkout", "-q", "-b", "dev")
+    _git(source, "add", ".")
+    _git(source, "-c", "user.name=planemo", "-c", "user.email=planemo@example.com", "commit", "-q", "-m", "init")
+    return source, startup_log
+
+
+def _snapshot_context(directory):
+    ctx = test_context()
+    ctx.planemo_directory = os.path.join(directory, "planemo")
+    return ctx
+
+
+def _git(repo, *args):
+    subprocess.check_call(["git"] + list(args), cwd=repo)
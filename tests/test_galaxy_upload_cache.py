@@ -0,0 +1,98 @@
+"""Unit tests for :mod:`planemo.galaxy.upload_cache`."""
+import os
+
+from planemo.galaxy.upload_cache import (
+    is_simple_upload,
+    UploadCache,
+)
+from planemo.io import temp_directory
+
+
+class _FakeDatasetsClient(object):
+
+    def __init__(self, datasets):
+        self._datasets = datasets
+
+    def show_dataset(self, dataset_id):
+        return self._datasets[dataset_id]
+
+
+class _FakeHistoriesClient(object):
+
+    def __init__(self):
+        self.copies = []
+
+    def copy_dataset(self, history_id, dataset_id, source="hda"):
+        self.copies.append((history_id, dataset_id))
+        return {"id": "copy_of_%s" % dataset_id}
+
+
+class _FakeGalaxyInstance(object):
+
+    def __init__(self, datasets):
+        self.datasets = _FakeDatasetsClient(datasets)
+        self.histories = _FakeHistoriesClient()
+
+
+def _fetch_payload(history_id, ext="auto"):
+    return {
+        "history_id": history_id,
+        "targets": [{"destination": {"type": "hdas"}, "elements": [{"ext": ext, "src": "files", "name": "a.txt"}]}],
+        "__files": {},
+    }
+
+
+def test_upload_cache_hit_and_miss():
+    with temp_directory() as dir:
+        input_path = os.path.join(dir, "a.txt")
+        with open(input_path, "w") as f:
+            f.write("hello")
+        cache = UploadCache(os.path.join(dir, "cache"))
+        gi = _FakeGalaxyInstance({"hda1": {"state": "ok", "uuid": "uuid1"}})
+        url = "http://localhost:8080"
+
+        key = cache.key(url, input_path, "tools/fetch", _fetch_payload("hist1"))
+        assert cache.copy_to_history(gi, key, "hist1") is None
+        cache.record(key, "hda1", "uuid1")
+
+        # Same contents and parameters in a different history hit the cache.
+        key2 = cache.key(url, input_path, "tools/fetch", _fetch_payload("hist2"))
+        assert key2 == key
+        assert cache.copy_to_history(gi, key2, "hist2") == {"id": "copy_of_hda1"}
+        assert gi.histories.copies == [("hist2", "hda1")]
+
+        # Different upload parameters, Galaxy or contents do not.
+        assert cache.key(url, input_path, "tools/fetch", _fetch_payload("hist2", ext="txt")) != key
+        assert cache.key("http://localhost:8081", input_path, "tools/fetch", _fetch_payload("hist2")) != key
+        assert cache.key(url, input_path, "tools/fetch", _fetch_payload("hist2"), api_key="other") != key
+        with open(input_path, "w") as f:
+            f.write("hello world")
+        assert cache.key(url, input_path, "tools/fetch", _fetch_payload("hist2")) != key
+
+
+def test_upload_cache_ignores_unusable_datasets():
+    with temp_directory() as dir:
+        cache = UploadCache(dir)
+        gi = _FakeGalaxyInstance({
+            "hda1": {"state": "ok", "deleted": True, "uuid": "uuid1"},
+            "hda2": {"state": "error", "uuid": "uuid2"},
+            "hda3": {"state": "ok", "uuid": "uuid3"},
+        })
+        cache.record("key1", "hda1", "uuid1")
+        cache.record("key2", "hda2", "uuid2")
+        cache.record("key3", "missing", "uuid4")
+        # A recreated Galaxy decoding the same id to a different dataset.
+        cache.record("key4", "hda3", "uuid_from_previous_instance")
+        for key in ["key1", "key2", "key3", "key4"]:
+            assert cache.copy_to_history(gi, key, "hist1") is None
+        assert gi.histories.copies == []
+
+
+def test_is_simple_upload():
+    assert is_simple_upload("tools/fetch", _fetch_payload("hist1"))
+    composite = _fetch_payload("hist1")
+    composite["targets"][0]["elements"][0]["src"] = "composite"
+    assert not is_simple_upload("tools/fetch", composite)
+    assert is_simple_upload("tools", {"tool_id": "upload1", "inputs": {}})
+    assert not is_simple_upload("tools", {"tool_id": "upload1", "inputs": {"file_count": "2"}})
+    assert not is_simple_upload("dataset_collections", {})
@@ -0,0 +1,77 @@
+"""Unit tests for :mod:`planemo.galaxy.wait`."""
+
+from planemo.bioblend import galaxy
+from planemo.galaxy.wait import (
+    polling_gi,
+    POLLING_REQUEST_TIMEOUT,
+    StateWaiter,
+)
+from .test_utils import test_context
+
+
+class _FakeJobsClient(object):
+
+    def __init__(self, job_states):
+        # job id -> list of states to report on successive polls
+        self._job_states = job_states
+        self.index_calls = 0
+        self.show_calls = 0
+
+    def _get(self, url=None, params=None):
+        self.index_calls += 1
+        return [{"id": job_id, "state": self._next_state(job_id)} for job_id in sorted(self._job_states)]
+
+    def show_job(self, job_id, full_details=False):
+        self.show_calls += 1
+        return {"id": job_id, "state": self._next_state(job_id)}
+
+    def _next_state(self, job_id):
+        states = self._job_states[job_id]
+        return states.pop(0) if len(states) > 1 else states[0]
+
+
+class _FakeGalaxyInstance(object):
+    url = "http://localhost:8080/api"
+
+    def __init__(self, job_states):
+        self.jobs = _FakeJobsClient(job_states)
+
+
+def test_wait_for_jobs_batches_by_history():
+    gi = _FakeGalaxyInstance({
+        "job1": ["queued", "running", "ok"],
+        "job2": ["new", "error"],
+        "job3": ["ok"],
+    })
+    waiter = StateWaiter(test_context(), gi)
+    final_states = waiter.wait_for_jobs(["job1", "job2", "job3"], history_id="hist1")
+    assert final_states == {"job1": "ok", "job2": "error", "job3": "ok"}
+    assert gi.jobs.show_calls == 0
+    assert gi.jobs.index_calls == 3
+    assert waiter.api_calls == 3
+
+
+def test_wait_for_job_without_history():
+    gi = _FakeGalaxyInstance({"job1": ["running", "ok"]})
+    waiter = StateWaiter(test_context(), gi)
+    assert waiter.wait_for_job("job1") == "ok"
+    assert gi.jobs.index_calls == 0
+    assert gi.jobs.show_calls == 2
+    assert waiter.api_calls == 2
+
+
+def test_wait_for_no_jobs():
+    gi = _FakeGalaxyInstance({})
+    waiter = StateWaiter(test_context(), gi)
+    assert waiter.wait_for_jobs([], history_id="hist1") == {}
+    assert waiter.api_calls == 0
+
+
+def test_polling_gi_leaves_shared_client_untouched():
+    gi = galaxy.GalaxyInstance(url="http://localhost:8080", key="test_key")
+    client = polling_gi(gi)
+    assert client is not gi
+    assert client.timeout == POLLING_REQUEST_TIMEOUT
+    assert client.url == gi.url
+    assert client.key == gi.key
+    assert gi.timeout is None
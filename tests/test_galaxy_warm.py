@@ -0,0 +1,76 @@
+"""Unit tests for warm Galaxy records in :mod:`planemo.galaxy.warm`."""
+import os
+import subprocess
+from unittest import mock
+
+from planemo.galaxy.warm import (
+    attach_warm_galaxy,
+    find_warm_galaxy,
+    register_warm_galaxy,
+)
+from planemo.io import temp_directory
+from planemo.runnable import for_path
+from .test_utils import (
+    test_context,
+    TEST_DATA_DIR,
+)
+
+
+class _FakeLocalGalaxyConfig(object):
+
+    def __init__(self, directory, pid):
+        self.galaxy_url = "http://localhost:9090"
+        self.master_api_key = "test_key"
+        self.config_directory = directory
+        self.pid_file = os.path.join(directory, "main.pid")
+        self.log_file = os.path.join(directory, "main.log")
+        self.runnables = []
+        with open(self.pid_file, "w") as f:
+            f.write(str(pid))
+
+
+def _context(workspace):
+    ctx = test_context()
+    ctx.planemo_directory = workspace
+    return ctx
+
+
+def test_register_and_attach_warm_galaxy():
+    with temp_directory() as workspace:
+        ctx = _context(workspace)
+        config = _FakeLocalGalaxyConfig(workspace, os.getpid())
+        register_warm_galaxy(ctx, "ci", config)
+        record = find_warm_galaxy(ctx, "ci")
+        assert record["galaxy_url"] == "http://localhost:9090"
+        assert record["tool_conf"] == os.path.join(workspace, "tool_conf.xml")
+        assert find_warm_galaxy(ctx, "other") is None
+
+        warm_config = attach_warm_galaxy(ctx, record, [])
+        assert warm_config.galaxy_url == "http://localhost:9090"
+        assert warm_config.master_api_key == "test_key"
+
+
+def test_dead_warm_galaxy_discarded():
+    with temp_directory() as workspace:
+        ctx = _context(workspace)
+        process = subprocess.Popen(["true"])
+        process.wait()
+        config = _FakeLocalGalaxyConfig(workspace, process.pid)
+        register_warm_galaxy(ctx, "ci", config)
+        assert find_warm_galaxy(ctx, "ci") is None
+        assert not os.listdir(os.path.join(workspace, "warm_galaxies"))
+
+
+def test_attach_warm_galaxy_installs_workflows():
+    with temp_directory() as workspace:
+        ctx = _context(workspace)
+        workflow = for_path(os.path.join(TEST_DATA_DIR, "wf2.ga"))
+        config = _FakeLocalGalaxyConfig(workspace, os.getpid())
+        config.runnables = [workflow]
+        register_warm_galaxy(ctx, "ci", config)
+        record = find_warm_galaxy(ctx, "ci")
+        with mock.patch("planemo.galaxy.config.user_api_key", return_value="user_key"), \
+                mock.patch("planemo.galaxy.config.import_workflow", return_value={"id": "wf_id"}) as import_workflow:
+            warm_config = attach_warm_galaxy(ctx, record, [workflow])
+        assert import_workflow.call_count == 1
+        assert warm_config.workflow_id(workflow.path) == "wf_id"
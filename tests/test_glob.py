@@ -0,0 +1,21 @@
+"""Test :class:`planemo.glob.IndexedGlobber` agrees with glob2."""
+import os
+
+from planemo import glob
+from .test_utils import TempDirectoryTestCase
+
+
+class IndexedGlobberTestCase(TempDirectoryTestCase):
+
+    def test_matches_glob2(self):
+        for path in ["a.xml", "b.txt", ".hidden", "sub/c.xml", "sub/deeper/d.xml", "sub/.git/config"]:
+            full_path = os.path.join(self.temp_directory, path)
+            if not os.path.exists(os.path.dirname(full_path)):
+                os.makedirs(os.path.dirname(full_path))
+            open(full_path, "w").close()
+        os.symlink(os.path.join(self.temp_directory, "sub"), os.path.join(self.temp_directory, "linked"))
+
+        globber = glob.IndexedGlobber()
+        for pattern in ["**", "*.xml", "**/*.xml", "sub/**", "sub/*", "linked/*.xml", "sub/", "missing/*", "b.txt", ".*"]:
+            pattern = os.path.join(self.temp_directory, pattern)
+            assert sorted(globber.glob(pattern)) == sorted(glob.glob(pattern)), pattern
@@ -1,5 +1,6 @@
 import glob
 import os
+import shutil
 
 from .test_utils import (
     CliTestCase,
@@ -50,6 +51,38 @@ class LintTestCase(CliTestCase):
             exit_code=0
         )
 
+    def test_lint_parallel(self):
+        names = ["fail_citation.xml", "fail_order.xml", "ok_conditional.xml"]
+        paths = list(map(lambda p: os.path.join(TEST_TOOLS_DIR, p), names))
+        serial = self._check_exit_code(["lint"] + paths, exit_code=1)
+        parallel = self._check_exit_code(["lint", "--lint_parallelism", "3"] + paths, exit_code=1)
+        assert parallel.output == serial.output
+        self._check_exit_code(
+            ["lint", "--lint_parallelism", "2", "--skip", "citations,xml_order"] + paths,
+            exit_code=0
+        )
+        invalid = os.path.join(TEST_TOOLS_DIR, "fail_xml_invalid.xml")
+        self._check_exit_code(["lint", "--lint_parallelism", "2", invalid], exit_code=1)
+
+    def test_lint_cache(self):
+        with self._isolate() as f:
+            tool_path = os.path.join(f, "fail_citation.xml")
+            shutil.copy(os.path.join(TEST_TOOLS_DIR, "fail_citation.xml"), tool_path)
+            lint_cmd = ["--directory", os.path.join(f, "workspace"), "lint", "--lint_cache", tool_path]
+            first = self._check_exit_code(lint_cmd, exit_code=1)
+            cache_directory = os.path.join(f, "workspace", "lint_cache")
+            assert len(os.listdir(cache_directory)) == 1
+            second = self._check_exit_code(lint_cmd, exit_code=1)
+            assert second.output == first.output
+            assert len(os.listdir(cache_directory)) == 1
+
+            # Changing lint options or the tool itself misses the cache.
+            self._check_exit_code(lint_cmd[:-1] + ["--skip", "citations", tool_path], exit_code=0)
+            with open(tool_path, "a") as fh:
+                fh.write("\n")
+            self._check_exit_code(lint_cmd, exit_code=1)
+            assert len(os.listdir(cache_directory)) == 3
+
     def test_skips(self):
         fail_citation = os.path.join(TEST_TOOLS_DIR, "fail_citation.xml")
         lint_cmd = ["lint", fail_citation]
@@ -22,6 +22,28 @@ class ShedExpansionTestCase(TempDirectoryTestCase):
         with self.assertRaises(Exception):
             self._repos(name="repo1", recursive=True)
 
+    def test_realize_config_per_repository(self):
+        config = {
+            "name": "suite",
+            "owner": "iuc",
+            "categories": ["Text Manipulation"],
+            "repositories": {
+                "repo1": {"include": ["a.txt"]},
+                "repo2": {"include": ["b.txt"], "owner": "devteam"},
+            },
+        }
+        raw = shed.RawRepositoryDirectory(self.temp_directory, config, True)
+        config1 = raw._realize_config("repo1")
+        config2 = raw._realize_config("repo2")
+        assert "repositories" not in config1
+        assert config1["name"] == "repo1"
+        assert config1["owner"] == "iuc"
+        assert config2["owner"] == "devteam"
+        config1["categories"].append("Other")
+        config1["include"].append("c.txt")
+        assert config["categories"] == ["Text Manipulation"]
+        assert config["repositories"]["repo1"]["include"] == ["a.txt"]
+
     def _make_shed_yml(self, path, **kwds):
         shed_dir = os.path.join(self.temp_directory, path)
         os.makedirs(shed_dir)
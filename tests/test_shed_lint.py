@@ -36,6 +36,18 @@ class ShedLintTestCase(CliTestCase):
         with self._isolate_repo("bad_invalid_yaml"):
             self._check_exit_code(["shed_lint"], exit_code=254)
 
+    def test_parallel_repos(self):
+        with self._isolate() as f:
+            for name in ["single_tool", "package_1", "suite_1", "bad_readme_rst"]:
+                self._copy_repo(name, join(f, name))
+            serial = self._check_exit_code(["shed_lint", "-r", "--tools"], exit_code=1)
+            parallel = self._check_exit_code(["shed_lint", "-r", "--tools", "--shed_parallelism", "4"], exit_code=1)
+            assert parallel.output == serial.output
+        with self._isolate() as f:
+            for name in ["bad_invalid_yaml", "single_tool_exclude"]:
+                self._copy_repo(name, join(f, name))
+            self._check_exit_code(["shed_lint", "-r", "--shed_parallelism", "2"], exit_code=254)
+
     def test_tool_linting(self):
         # Make sure bad_invalid_tool_xml only when used with --tools.
         with self._isolate_repo("bad_invalid_tool_xml"):
@@ -1,10 +1,19 @@
 """Test some lower-level utilities in planemo.shed."""
 
+import io
 import os
+import tarfile
+import threading
+
+from six.moves import BaseHTTPServer
 
 from planemo import shed
+from planemo.io import shell, temp_directory
+from planemo.shed import interface
+from .shed_app_test_utils import mock_shed
 from .test_utils import (
     mock_shed_context,
+    test_context,
     TEST_REPOS_DIR,
 )
 
@@ -50,6 +59,29 @@ def test_find_repository_id_missing_exception():
         assert exception is not None
 
 
+def test_find_repositories_single_listing():
+    with mock_shed() as mock_shed_obj:
+        model = mock_shed_obj.model
+        listings = []
+        get_repositories = model.get_repositories
+
+        def counting_get_repositories():
+            listings.append(1)
+            return get_repositories()
+
+        model.get_repositories = counting_get_repositories
+        tsi = shed.get_shed_context(shed_target=mock_shed_obj.url).tsi
+        found = interface.find_repositories(tsi, [("iuc", "test_repo_1"), ("iuc", "test_repo_absent")])
+        assert found[("iuc", "test_repo_1")]["id"] == "r1"
+        assert found[("iuc", "test_repo_absent")] is None
+        assert interface.find_repository(tsi, "iuc", "test_repo_1")["id"] == "r1"
+        assert len(listings) == 1
+
+        interface.invalidate_repositories(tsi)
+        assert interface.find_repository(tsi, "iuc", "test_repo_1")["id"] == "r1"
+        assert len(listings) == 2
+
+
 def test_find_category_ids():
     with mock_shed_context() as shed_context:
         category_ids = shed.find_category_ids(
@@ -80,6 +112,23 @@ def test_create_simple():
         assert repo_id == create_response["id"]
 
 
+def test_for_each_repository_parallel_paths(capfd):
+    names = ["single_tool", "package_1"]
+    barrier = threading.Barrier(len(names), timeout=10)
+
+    def function(realized_repository):
+        shell(["echo", "start %s" % realized_repository.name])
+        # Only passes when repositories of both paths run at the same time.
+        barrier.wait()
+        shell(["echo", "end %s" % realized_repository.name])
+        return 0
+
+    paths = [os.path.join(TEST_REPOS_DIR, name) for name in names]
+    assert shed.for_each_repository(test_context(), function, paths, shed_parallelism=2) == 0
+    lines = [line for line in capfd.readouterr().out.splitlines() if line.startswith(("start", "end"))]
+    assert lines == ["start single_tool", "end single_tool", "start package_1", "end package_1"]
+
+
 def test_suite_repositories_different_owners():
     with mock_shed_context() as shed_context:
         path = os.path.join(TEST_REPOS_DIR, "multi_repos_flat_configured_owners")
@@ -88,3 +137,107 @@ def test_suite_repositories_different_owners():
             repo_config["repositories"]["suite_cat"]["_files"]["repository_dependencies.xml"], repo_config
         assert '<repository owner="devteam" name="cs-cat2" />' in \
             repo_config["repositories"]["suite_cat"]["_files"]["repository_dependencies.xml"], repo_config
+
+
+class _RangeHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    payload = b""
+    ranges = []
+
+    def do_GET(self):  # noqa: N802
+        range_header = self.headers.get("Range")
+        _RangeHandler.ranges.append(range_header)
+        body = _RangeHandler.payload
+        if range_header:
+            start = int(range_header[len("bytes="):-1])
+            body = body[start:]
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_download_resumable():
+    contents = io.BytesIO()
+    with tarfile.open(fileobj=contents, mode="w:gz") as tar:
+        data = os.urandom(64 * 1024)
+        info = tarfile.TarInfo("repo/data.bin")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    _RangeHandler.payload = contents.getvalue()
+    _RangeHandler.ranges = []
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _RangeHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        with mock_shed_context() as shed_context, temp_directory() as directory:
+            url = "http://127.0.0.1:%d/download" % server.server_port
+            path = os.path.join(directory, "download.tar.gz")
+            half = len(_RangeHandler.payload) // 2
+            with open(path + ".part", "wb") as f:
+                f.write(_RangeHandler.payload[:half])
+            interface.download_resumable(shed_context.tsi, url, path)
+            assert _RangeHandler.ranges == ["bytes=%d-" % half]
+            assert not os.path.exists(path + ".part")
+            with open(path, "rb") as f:
+                assert f.read() == _RangeHandler.payload
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _tarball(members):
+    contents = io.BytesIO()
+    with tarfile.open(fileobj=contents, mode="w:gz") as tar:
+        for name, link_type, linkname in members:
+            info = tarfile.TarInfo(name)
+            if link_type is None:
+                tar.addfile(info, io.BytesIO(b""))
+            else:
+                info.type = link_type
+                info.linkname = linkname
+                tar.addfile(info)
+    return contents.getvalue()
+
+
+def test_extract_tar_stream_confined():
+    escaping_tarballs = [
+        [("repo/link", tarfile.SYMTYPE, "/tmp"), ("repo/link/evil", None, None)],
+        [("repo/link", tarfile.SYMTYPE, "../.."), ("repo/link/evil", None, None)],
+        [("repo/evil", tarfile.LNKTYPE, "repo/../../evil")],
+        [("repo/fifo", tarfile.FIFOTYPE, "")],
+    ]
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _RangeHandler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        with mock_shed_context() as shed_context, temp_directory() as directory:
+            url = "http://127.0.0.1:%d/download" % server.server_port
+            for i, members in enumerate(escaping_tarballs):
+                _RangeHandler.payload = _tarball(members)
+                destination = os.path.join(directory, "escaping_%d" % i)
+                try:
+                    interface._extract_tar_stream(shed_context.tsi, url, destination, strip_components=1)
+                except Exception as e:
+                    assert "Refusing" in str(e), e
+                else:
+                    raise AssertionError("Extracted %s" % members)
+                assert not os.path.exists(os.path.join(directory, "evil"))
+
+            _RangeHandler.payload = _tarball([
+                ("repo/data.txt", None, None),
+                ("repo/link.txt", tarfile.SYMTYPE, "data.txt"),
+                ("repo/hard.txt", tarfile.LNKTYPE, "repo/data.txt"),
+            ])
+            destination = os.path.join(directory, "confined")
+            interface._extract_tar_stream(shed_context.tsi, url, destination, strip_components=1)
+            assert sorted(os.listdir(destination)) == ["data.txt", "hard.txt", "link.txt"]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -8,7 +8,9 @@ import os
 import shutil
 import tarfile
 from os.path import exists, join
+from unittest import mock
 
+import bioblend
 from galaxy.util import unicodify
 
 from planemo import git
@@ -30,6 +32,21 @@ class ShedUploadTestCase(CliShedTestCase):
             self._check_exit_code(upload_command)
             assert_exists(join(f, "shed_upload.tar.gz"))
 
+    def test_tar_deterministic(self):
+        with self._isolate_repo("single_tool") as f:
+            tars = []
+            for level in ["9", "9", "1"]:
+                upload_command = ["shed_upload", "--tar_only", "--compression_level", level]
+                upload_command.extend(self._shed_args())
+                self._check_exit_code(upload_command)
+                with open(join(f, "shed_upload.tar.gz"), "rb") as fh:
+                    tars.append(fh.read())
+            assert tars[0] == tars[1]
+            with tarfile.open(join(f, "shed_upload.tar.gz"), "r:gz") as tar:
+                names = tar.getnames()
+            assert names == sorted(names)
+            assert "cat.xml" in names
+
     def test_upload_not_exists(self):
         with self._isolate_repo("single_tool"):
             upload_command = ["shed_upload"]
@@ -100,6 +117,27 @@ class ShedUploadTestCase(CliShedTestCase):
 
             self._assert_shed_diff(diff=0)
 
+    def test_update_skip_unchanged(self):
+        with self._isolate_repo("single_tool") as f:
+            upload_command = [
+                "shed_update", "--force_repository_creation", "--skip_unchanged"
+            ]
+            upload_command.extend(self._shed_args())
+            r = self._check_exit_code(upload_command)
+            assert "unchanged since last upload" not in r.output
+
+            r = self._check_exit_code(upload_command)
+            assert "unchanged since last upload, skipping upload." in r.output
+
+            with open(join(f, "related_file"), "w") as rf:
+                rf.write("new_contents")
+
+            r = self._check_exit_code(upload_command)
+            assert "unchanged since last upload" not in r.output
+            target = self._verify_upload(f, ["related_file"])
+            with open(join(target, "related_file"), "r") as rf:
+                assert rf.read() == "new_contents"
+
     def test_update_with_force_create_metadata_only(self):
         with self._isolate_repo("single_tool") as f:
             upload_command = ["shed_update", "--force_repository_creation", "--skip_upload"]
@@ -114,6 +152,25 @@ class ShedUploadTestCase(CliShedTestCase):
             self._check_exit_code(upload_command)
             self._verify_single_uploaded(f)
 
+    def test_update_no_stream_upload(self):
+        with self._isolate_repo("single_tool") as f:
+            upload_command = ["shed_update", "--force_repository_creation", "--no_stream_upload"]
+            upload_command.extend(self._shed_args())
+            with mock.patch("planemo.shed.update_repository_from_stream") as stream_upload:
+                self._check_exit_code(upload_command)
+            assert not stream_upload.called
+            self._verify_single_uploaded(f)
+
+    def test_update_stream_upload_rejected(self):
+        with self._isolate_repo("single_tool") as f:
+            upload_command = ["shed_update", "--force_repository_creation"]
+            upload_command.extend(self._shed_args())
+            rejected = bioblend.ConnectionError("Unexpected HTTP status code: 411", body="", status_code=411)
+            with mock.patch("planemo.shed.update_repository_from_stream", side_effect=rejected) as stream_upload:
+                self._check_exit_code(upload_command)
+            assert stream_upload.called
+            self._verify_single_uploaded(f)
+
     def test_tar_from_git(self):
         with self._isolate() as f:
             with self._git_configured():
@@ -159,6 +216,43 @@ class ShedUploadTestCase(CliShedTestCase):
                 assert "repository https://github.com/galaxyproject" in message
                 assert rev in message
 
+    def test_upload_from_git_revision(self):
+        with self._isolate() as f:
+            with self._git_configured():
+                dest = join(f, "single_tool")
+                self._copy_repo("single_tool", dest)
+                shell(" && ".join([
+                    "cd %s" % dest,
+                    "git init",
+                    "git add .",
+                    "git commit -m 'initial commit'",
+                    "git checkout -b dev",
+                    "echo 'dev contents' > related_file",
+                    "git commit -am 'dev commit'",
+                    "git checkout -",
+                ]))
+                upload_command = [
+                    "shed_update", "--force_repository_creation",
+                    "git+single_tool/.git#dev"
+                ]
+                upload_command.extend(self._shed_args())
+                self._check_exit_code(upload_command)
+                target = self._verify_upload(f, ["related_file"], ["single_tool"])
+                with open(join(target, "related_file"), "r") as rf:
+                    assert rf.read() == "dev contents\n"
+
+                # A later command fetches new commits into the cached checkout.
+                shell(" && ".join([
+                    "cd %s" % dest,
+                    "git checkout dev",
+                    "echo 'more dev contents' > related_file",
+                    "git commit -am 'second dev commit'",
+                ]))
+                self._check_exit_code(upload_command)
+                target = self._verify_upload(f, ["related_file"], ["single_tool"])
+                with open(join(target, "related_file"), "r") as rf:
+                    assert rf.read() == "more dev contents\n"
+
     @contextlib.contextmanager
     def _git_configured(self):
         with modify_environ({
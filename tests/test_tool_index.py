@@ -0,0 +1,92 @@
+"""Unit tests for ``planemo.tool_index``."""
+import os
+
+from planemo import tool_index
+from planemo.tools import is_tool_load_error
+from .test_utils import TempDirectoryTestCase
+
+TOOL_XML = """<tool id="seqtk_seq" name="Convert" version="%s">
+    <macros>
+        <import>macros.xml</import>
+    </macros>
+    <expand macro="requirements" />
+    <command>seqtk seq</command>
+</tool>
+"""
+MACROS_XML = """<macros>
+    <xml name="requirements">
+        <requirements>
+            <requirement type="package" version="%s">seqtk</requirement>
+        </requirements>
+    </xml>
+</macros>
+"""
+
+
+class ToolIndexTestCase(TempDirectoryTestCase):
+
+    def setUp(self):
+        super(ToolIndexTestCase, self).setUp()
+        self.tool_path = os.path.join(self.temp_directory, "seqtk_seq.xml")
+        self.index = tool_index.ToolIndex(os.path.join(self.temp_directory, "index"))
+        self.load_errors = []
+        self._write("seqtk_seq.xml", TOOL_XML % "1.0")
+        self._write("macros.xml", MACROS_XML % "1.2")
+
+    def test_metadata_recorded_and_invalidated_by_macros(self):
+        self._assert_loaded("1.0", "1.2", parses=1)
+        self._assert_loaded("1.0", "1.2", parses=0)
+
+        self._write("macros.xml", MACROS_XML % "1.3")
+        self._assert_loaded("1.0", "1.3", parses=1)
+        self._write("seqtk_seq.xml", TOOL_XML % "1.1")
+        self._assert_loaded("1.1", "1.3", parses=1)
+
+    def test_load_errors_not_recorded(self):
+        self._write("seqtk_seq.xml", "<tool id=")
+        for _ in range(2):
+            tool_source = self.index.load(self.tool_path, self._load_error)
+            assert is_tool_load_error(tool_source)
+        assert len(self.load_errors) == 2
+        assert os.listdir(self.index.directory) == []
+
+        self._write("seqtk_seq.xml", TOOL_XML % "1.0")
+        self._assert_loaded("1.0", "1.2", parses=1)
+
+    def test_missing_macro_fixed(self):
+        os.remove(os.path.join(self.temp_directory, "macros.xml"))
+        tool_source = self.index.load(self.tool_path, self._load_error)
+        assert is_tool_load_error(tool_source)
+
+        # Only the macro file changes, the tool must still be parsed again.
+        self._write("macros.xml", MACROS_XML % "1.2")
+        self._assert_loaded("1.0", "1.2", parses=1)
+
+    def _assert_loaded(self, version, requirement_version, parses):
+        original_get_tool_source = tool_index.get_tool_source
+        calls = []
+
+        def get_tool_source(path):
+            calls.append(path)
+            return original_get_tool_source(path)
+
+        tool_index.get_tool_source = get_tool_source
+        try:
+            tool_sources = self.index.load_tool_sources_from_path(self.temp_directory, False, self._load_error)
+            assert [p for (p, _) in tool_sources] == [self.tool_path]
+            tool_source = tool_sources[0][1]
+            assert tool_source.parse_id() == "seqtk_seq"
+            assert tool_source.parse_version() == version
+            requirements, containers = tool_source.parse_requirements_and_containers()
+            assert [(r.name, r.version) for r in requirements] == [("seqtk", requirement_version)]
+            assert containers == []
+            assert len(calls) == parses
+        finally:
+            tool_index.get_tool_source = original_get_tool_source
+
+    def _load_error(self, path, message):
+        self.load_errors.append((path, message))
+
+    def _write(self, name, contents):
+        with open(os.path.join(self.temp_directory, name), "w") as f:
+            f.write(contents)
@@ -0,0 +1,72 @@
+"""Unit tests for ``planemo.url_checks``."""
+import os
+import threading
+
+from six.moves import BaseHTTPServer
+
+from planemo.io import temp_directory
+from planemo.url_checks import UrlChecker
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):  # noqa: N802
+        _Handler.requests.append(self.path)
+        if self.path.startswith("/missing"):
+            self.send_response(404)
+            self.end_headers()
+            return
+        if self.path.startswith("/unavailable"):
+            self.send_response(503)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_url_checks_deduplicated_and_cached():
+    server = BaseHTTPServer.HTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    base_url = "http://127.0.0.1:%d" % server.server_port
+    _Handler.requests = []
+    try:
+        with temp_directory() as cache_directory:
+            checker = UrlChecker(cache_directory=cache_directory)
+            futures = [checker.check_url(base_url + "/ok") for _ in range(5)]
+            assert all(f is futures[0] for f in futures)
+            assert futures[0].result() == {"ok": True, "error": None}
+            missing = checker.check_url(base_url + "/missing").result()
+            assert not missing["ok"]
+            assert "404" in missing["error"]
+            assert len(_Handler.requests) == 2
+            assert len(os.listdir(cache_directory)) == 2
+
+            # A new checker (e.g. the next lint run) reuses the on-disk results.
+            checker = UrlChecker(cache_directory=cache_directory)
+            assert checker.check_url(base_url + "/ok").result()["ok"]
+            assert not checker.check_url(base_url + "/missing").result()["ok"]
+            assert len(_Handler.requests) == 2
+
+            # Expired entries are checked again.
+            checker = UrlChecker(cache_directory=cache_directory, cache_ttl=0)
+            assert checker.check_url(base_url + "/ok").result()["ok"]
+            assert len(_Handler.requests) == 3
+
+            # Server errors may be transient and are not recorded.
+            checker = UrlChecker(cache_directory=cache_directory)
+            assert not checker.check_url(base_url + "/unavailable").result()["ok"]
+            checker = UrlChecker(cache_directory=cache_directory)
+            assert not checker.check_url(base_url + "/unavailable").result()["ok"]
+            assert len(_Handler.requests) == 5
+            assert len(os.listdir(cache_directory)) == 2
+    finally:
+        server.shutdown()
+        server.server_close()
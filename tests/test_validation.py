@@ -23,6 +23,17 @@ def test_xmllint_validation():
     _check_validator(xmllint_xsd_validator)
 
 
+@skip_unless_module("lxml")
+def test_lxml_schema_compiled_once():
+    lxml_xsd_validator = validation.LxmlValidator()
+    schema = _path("xsd_schema_1.xsd")
+    lxml_xsd_validator.prepare(schema)
+    compiled = lxml_xsd_validator._compiled_schema(schema)
+    _check_validator(lxml_xsd_validator)
+    assert lxml_xsd_validator._compiled_schema(schema) is compiled
+    assert len(lxml_xsd_validator._schemas) == 1
+
+
 def test_tool_dependencies_validation():
     _assert_validates(shed_lint.TOOL_DEPENDENCIES_XSD,
                       _path("tool_dependencies_good_1.xml"))
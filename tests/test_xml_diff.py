@@ -2,7 +2,7 @@ import os
 import sys
 from xml.etree import ElementTree
 
-from planemo.xml.diff import diff
+from planemo.xml.diff import diff, element_digest
 from .test_utils import TEST_DIR
 
 
@@ -12,6 +12,28 @@ def test_diff():
     _check(None)
 
 
+def test_diff_full_report():
+    x1 = ElementTree.fromstring('<moo a="1"><c>x</c><d/><e>y</e></moo>')
+    x2 = ElementTree.fromstring('<moo a="2"><c>x1</c><d/><e>y1</e></moo>')
+    messages = []
+    assert diff(x1, x2, messages.append)
+    assert len(messages) == 1
+    messages = []
+    assert diff(x1, x2, messages.append, full=True)
+    assert any("Attributes do not match" in m for m in messages)
+    assert any("'x' != 'x1'" in m for m in messages)
+    assert any("'y' != 'y1'" in m for m in messages)
+
+
+def test_element_digest():
+    x1 = ElementTree.fromstring('<moo b="2" a="1">\n  <c>cow </c>\n</moo>')
+    x2 = ElementTree.fromstring('<moo a="1" b="2"><c>cow</c></moo>')
+    assert element_digest(x1) == element_digest(x2)
+    assert not diff(x1, x2)
+    x3 = ElementTree.fromstring('<moo a="1" b="2"><c>cow</c><c/></moo>')
+    assert element_digest(x1) != element_digest(x3)
+
+
 def _check(reporter):
     assert not diff(ElementTree.fromstring("<moo>cow</moo>"),
                     ElementTree.fromstring("<moo>cow</moo>"),